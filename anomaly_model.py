@@ -4,19 +4,21 @@ import pandas as pd
 from sklearn.ensemble import IsolationForest
 
 
-def detect_anomalies(
+def score_anomalies(
     df: pd.DataFrame,
     features: list,
     contamination: float,
     random_state: int,
-    target: str,
-) -> pd.DataFrame:
-    """
-    Trains an IsolationForest model and identifies the top 5 anomalies
-    ranked by the specified target feature.
+    sample_weight=None,
+) -> IsolationForest:
     """
-    print(f"Training model and predicting anomalies, ranking by '{target}'...")
+    Trains an IsolationForest model and labels every row of the DataFrame.
 
+    Adds an 'anomaly' column (-1 for anomalies, 1 for inliers) and an
+    'anomaly_score' column (higher means more anomalous) to df in place,
+    and returns the fitted model. Rows with a lower sample_weight (e.g.
+    from days with little wear time) have less influence on the fit.
+    """
     model = IsolationForest(contamination=contamination, random_state=random_state)
 
     # Ensure only columns that actually exist in the dataframe are used
@@ -25,10 +27,21 @@ def detect_anomalies(
     # Select only numeric data for the model
     numeric_df = df[train_features].select_dtypes(include="number")
 
-    model.fit(numeric_df)
+    model.fit(numeric_df, sample_weight=sample_weight)
     df["anomaly"] = model.predict(numeric_df)
+    df["anomaly_score"] = -model.score_samples(numeric_df)
 
-    anomalies = df[df["anomaly"] == -1].copy()
+    return model
+
+
+def rank_anomalies(
+    df: pd.DataFrame, anomalies: pd.DataFrame, target: str, top_n: int = 5
+) -> pd.DataFrame:
+    """
+    Ranks the given anomalies by the specified target feature and returns
+    the top_n. df is the full dataset, used for the target's overall mean.
+    """
+    anomalies = anomalies.copy()
 
     if target == "heart_rate":
         anomalies["z_score"] = (
@@ -42,9 +55,27 @@ def detect_anomalies(
         anomalies[f"{target}_deviation"] = (anomalies[target] - overall_mean).abs()
         sort_key = f"{target}_deviation"
 
-    top_5_anomalies = anomalies.sort_values(by=sort_key, ascending=False, key=abs).head(
-        5
-    )
+    return anomalies.sort_values(by=sort_key, ascending=False, key=abs).head(top_n)
+
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    features: list,
+    contamination: float,
+    random_state: int,
+    target: str,
+    sample_weight=None,
+) -> pd.DataFrame:
+    """
+    Trains an IsolationForest model and identifies the top 5 anomalies
+    ranked by the specified target feature.
+    """
+    print(f"Training model and predicting anomalies, ranking by '{target}'...")
+
+    score_anomalies(df, features, contamination, random_state, sample_weight)
+
+    anomalies = df[df["anomaly"] == -1]
+    top_5_anomalies = rank_anomalies(df, anomalies, target)
 
     print(
         f"Found {len(anomalies)} total anomalies. Focusing on the top 5 by '{target}'."
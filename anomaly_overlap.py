@@ -0,0 +1,208 @@
+# anomaly_overlap.py
+
+import numpy as np
+import pandas as pd
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+
+
+def to_int64_ns(timestamps) -> np.ndarray:
+    """Converts timestamps (strings or datetimes) to int64 UTC nanoseconds."""
+    parsed = pd.to_datetime(pd.Series(timestamps), utc=True, format="ISO8601")
+    return parsed.dt.tz_convert(None).astype("datetime64[ns]").to_numpy().view("int64")
+
+
+def load_anomalies(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads a model's flagged rows from a results CSV.
+
+    Only the 'timestamp' column and the requested columns are parsed. The
+    returned frame is sorted by an int64 'ts_ns' column (UTC nanoseconds)
+    and deduplicated on it.
+    """
+    wanted = {"timestamp", *(columns or [])}
+    df = pd.read_csv(path, usecols=lambda col: col in wanted)
+    df["ts_ns"] = to_int64_ns(df.pop("timestamp"))
+    return df.sort_values("ts_ns").drop_duplicates("ts_ns").reset_index(drop=True)
+
+
+def load_anomaly_times(path: str) -> np.ndarray:
+    """Loads only the sorted, unique int64 timestamps of a results CSV."""
+    return load_anomalies(path)["ts_ns"].to_numpy()
+
+
+def load_result_set_times(path: str) -> dict:
+    """
+    Loads the sorted, unique int64 timestamps of every model in a Parquet
+    result set written by evaluation.py, keyed by model name.
+    """
+    result_set = pd.read_parquet(path, columns=["model", "timestamp"])
+    result_set["ts_ns"] = to_int64_ns(result_set["timestamp"])
+    return {
+        str(name): np.unique(group["ts_ns"].to_numpy())
+        for name, group in result_set.groupby("model", observed=True)
+    }
+
+
+def result_set_run(path: str) -> dict:
+    """
+    The participant_id, start_date and end_date of the evaluation.py run
+    that wrote a Parquet result set; empty for result sets without them.
+    """
+    return pd.read_parquet(path, columns=["model"]).attrs
+
+
+def match_within(times: np.ndarray, reference: np.ndarray, tolerance_ns: int):
+    """
+    For each entry of times, returns True if any entry of reference lies
+    within tolerance_ns of it. Both arrays must be sorted int64.
+
+    Runs in O((n + m) log m) via a binary-search merge of the two arrays.
+    """
+    if len(times) == 0 or len(reference) == 0:
+        return np.zeros(len(times), dtype=bool)
+
+    right = np.searchsorted(reference, times, side="left")
+    left = np.clip(right - 1, 0, len(reference) - 1)
+    right = np.clip(right, 0, len(reference) - 1)
+
+    nearest = np.minimum(
+        np.abs(times - reference[left]), np.abs(reference[right] - times)
+    )
+    return nearest <= tolerance_ns
+
+
+def overlap_summary(a: np.ndarray, b: np.ndarray, tolerance_ns: int) -> dict:
+    """
+    Summarizes the agreement of two sorted timestamp arrays.
+
+    With a tolerance, one timestamp can match several on the other side,
+    so the intersection is taken as the mean of the matched counts on
+    either side, which keeps the Jaccard index symmetric.
+    """
+    matched_a = int(match_within(a, b, tolerance_ns).sum())
+    matched_b = int(match_within(b, a, tolerance_ns).sum())
+    intersection = (matched_a + matched_b) / 2
+    union = len(a) + len(b) - intersection
+
+    return {
+        "count_a": len(a),
+        "count_b": len(b),
+        "matched_a": matched_a,
+        "matched_b": matched_b,
+        "only_a": len(a) - matched_a,
+        "only_b": len(b) - matched_b,
+        "jaccard": intersection / union if union else 1.0,
+    }
+
+
+def per_day_agreement(a: np.ndarray, b: np.ndarray, tolerance_ns: int) -> pd.DataFrame:
+    """Returns the counts, matches and Jaccard index of a and b for each UTC day."""
+    if len(a) == 0 and len(b) == 0:
+        return pd.DataFrame(
+            columns=["date", "count_a", "count_b", "matched_a", "matched_b", "jaccard"]
+        )
+
+    day_a = a // NS_PER_DAY
+    day_b = b // NS_PER_DAY
+    all_days = np.concatenate([day_a, day_b])
+    first_day = all_days.min()
+    n_days = int(all_days.max() - first_day) + 1
+
+    count_a = np.bincount(day_a - first_day, minlength=n_days)
+    count_b = np.bincount(day_b - first_day, minlength=n_days)
+    matched_a = np.bincount(
+        day_a - first_day, weights=match_within(a, b, tolerance_ns), minlength=n_days
+    )
+    matched_b = np.bincount(
+        day_b - first_day, weights=match_within(b, a, tolerance_ns), minlength=n_days
+    )
+
+    intersection = (matched_a + matched_b) / 2
+    union = count_a + count_b - intersection
+    with np.errstate(invalid="ignore", divide="ignore"):
+        jaccard = np.where(union > 0, intersection / union, np.nan)
+
+    days = (first_day + np.arange(n_days)) * NS_PER_DAY
+    result = pd.DataFrame(
+        {
+            "date": pd.to_datetime(days).date,
+            "count_a": count_a,
+            "count_b": count_b,
+            "matched_a": matched_a.astype(np.int64),
+            "matched_b": matched_b.astype(np.int64),
+            "jaccard": jaccard,
+        }
+    )
+    return result[(result["count_a"] > 0) | (result["count_b"] > 0)].reset_index(
+        drop=True
+    )
+
+
+def precision_recall(
+    predicted: np.ndarray, labels: np.ndarray, tolerance_ns: int
+) -> dict:
+    """
+    Scores predicted anomaly timestamps against a labeled set.
+
+    A prediction is a true positive if a label lies within the tolerance;
+    a label is recalled if a prediction lies within the tolerance.
+    """
+    precision = (
+        match_within(predicted, labels, tolerance_ns).mean() if len(predicted) else 0.0
+    )
+    recall = (
+        match_within(labels, predicted, tolerance_ns).mean() if len(labels) else 0.0
+    )
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": float(precision), "recall": float(recall), "f1": float(f1)}
+
+
+def compare_models(
+    model_times: dict, tolerance_seconds: float, labels: np.ndarray = None
+) -> pd.DataFrame:
+    """
+    Builds a pairwise comparison table of several models' anomaly timestamps.
+
+    Args:
+        model_times: Maps model name to its sorted int64 timestamp array.
+        tolerance_seconds: Maximum distance for two timestamps to match.
+        labels: Optional sorted int64 array of labeled anomaly timestamps.
+            When given, each model's precision/recall is added as a row
+            against the pseudo-model 'labels'.
+    """
+    tolerance_ns = int(tolerance_seconds * NS_PER_SECOND)
+    names = list(model_times)
+    rows = []
+    for i, name_a in enumerate(names):
+        for name_b in names[i + 1 :]:
+            summary = overlap_summary(
+                model_times[name_a], model_times[name_b], tolerance_ns
+            )
+            rows.append({"model_a": name_a, "model_b": name_b, **summary})
+
+    if labels is not None:
+        for name in names:
+            summary = overlap_summary(model_times[name], labels, tolerance_ns)
+            scores = precision_recall(model_times[name], labels, tolerance_ns)
+            rows.append({"model_a": name, "model_b": "labels", **summary, **scores})
+
+    return pd.DataFrame(rows)
+
+
+def representative_examples(anomalies: pd.DataFrame, n: int = 1) -> pd.DataFrame:
+    """
+    Picks the n most representative anomalies: those with the highest
+    'anomaly_score', or the largest heart rate z-score when the results
+    were saved without scores.
+    """
+    if "anomaly_score" in anomalies.columns:
+        score = anomalies["anomaly_score"]
+    else:
+        score = (
+            (anomalies["heart_rate"] - anomalies["hr_rolling_avg"])
+            / anomalies["hr_rolling_std"]
+        ).abs()
+    score = score.replace([np.inf, -np.inf], np.nan).fillna(0)
+    return anomalies.loc[score.nlargest(n).index]
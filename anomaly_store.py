@@ -0,0 +1,282 @@
+# anomaly_store.py
+#
+# Persistent store of detected anomalies and their explanations, so past
+# analyses can be queried by participant, time range, model and score
+# without rerunning the pipeline. Every analysis is recorded as a run; its
+# anomalies are upserted per (participant, model, model version, timestamp).
+
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+
+QUERY_ORDERS = {"score": "score DESC", "time": "ts_ns"}
+# Columns stored next to the JSON copy of every anomaly row
+ANOMALY_FIELDS = [
+    "participant_id",
+    "model",
+    "model_version",
+    "timestamp",
+    "score",
+    "heart_rate",
+    "steps",
+    "explanation",
+    "run_id",
+]
+
+
+def connect(db_path: str = None) -> sqlite3.Connection:
+    """Opens the store, creating the tables and indexes if needed."""
+    connection = sqlite3.connect(db_path or config.ANOMALY_STORE_DB, timeout=30)
+    # WAL lets the API read while analyses write
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            participant_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            model TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            start_date TEXT,
+            end_date TEXT,
+            params TEXT,
+            anomaly_count INTEGER,
+            created_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS anomalies (
+            participant_id TEXT NOT NULL,
+            model TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            ts_ns INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            score REAL,
+            heart_rate REAL,
+            steps REAL,
+            data TEXT,
+            explanation TEXT,
+            run_id INTEGER,
+            PRIMARY KEY (participant_id, model, model_version, ts_ns)
+        );
+        CREATE INDEX IF NOT EXISTS anomalies_by_time
+            ON anomalies (participant_id, ts_ns);
+        CREATE INDEX IF NOT EXISTS anomalies_by_score
+            ON anomalies (participant_id, score DESC);
+        """)
+    return connection
+
+
+def model_version(params: dict) -> str:
+    """Short, stable hash of the parameters that determine a model's output."""
+    canonical = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def _utc_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """int64 UTC nanoseconds of timestamps; naive timestamps are taken as UTC."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.asi8
+
+
+def _explained_rows(explanations: list) -> pd.DataFrame:
+    """The anomaly rows of get_anomaly_explanations results, with explanations."""
+    rows = [dict(item["anomaly_data"]) for item in explanations]
+    frame = pd.DataFrame(rows)
+    frame.index = pd.to_datetime(frame.pop("timestamp"), utc=True, format="ISO8601")
+    frame["explanation"] = [item["explanation"] for item in explanations]
+    return frame
+
+
+def store_results(
+    participant_id: str,
+    source: str,
+    model: str,
+    params: dict,
+    anomalies: pd.DataFrame,
+    start_date: str = None,
+    end_date: str = None,
+    explanations: list = None,
+    db_path: str = None,
+) -> int:
+    """
+    Records a run and upserts its anomalies (a frame indexed by timestamp
+    with an 'anomaly_score' column). explanations are the results of
+    get_anomaly_explanations; each is stored with the anomaly at its
+    timestamp, which is added if the frame does not contain it (e.g. a
+    drilled-down raw sample). A stored explanation is kept when a later
+    run of the same model version scores the anomaly again without one.
+    Returns the run ID.
+    """
+    version = model_version({"model": model, **params})
+    frame = anomalies.copy()
+    frame.index = pd.to_datetime(frame.index, utc=True)
+    frame["explanation"] = None
+    if explanations:
+        explained = _explained_rows(explanations)
+        known = frame.index.isin(explained.index)
+        frame = pd.concat([frame[~known], explained])
+
+    ts_ns = _utc_ns(frame.index)
+    scores = frame.get("anomaly_score", pd.Series(np.nan, index=frame.index))
+    data = json.loads(
+        frame.drop(columns=["explanation"]).to_json(
+            orient="records", date_format="iso", default_handler=str
+        )
+    )
+
+    now = time.time()
+    with connect(db_path) as connection:
+        cursor = connection.execute(
+            "INSERT INTO runs (participant_id, source, model, model_version, "
+            "start_date, end_date, params, anomaly_count, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                participant_id,
+                source,
+                model,
+                version,
+                start_date,
+                end_date,
+                json.dumps(params, sort_keys=True, default=str),
+                len(frame),
+                now,
+            ),
+        )
+        run_id = cursor.lastrowid
+
+        rows = [
+            (
+                participant_id,
+                model,
+                version,
+                int(ts),
+                timestamp.isoformat(),
+                None if pd.isna(score) else float(score),
+                _optional_float(record.get("heart_rate")),
+                _optional_float(record.get("steps")),
+                json.dumps(record),
+                explanation,
+                run_id,
+            )
+            for ts, timestamp, score, record, explanation in zip(
+                ts_ns, frame.index, scores, data, frame["explanation"]
+            )
+        ]
+        connection.executemany(
+            "INSERT INTO anomalies (participant_id, model, model_version, ts_ns, "
+            "timestamp, score, heart_rate, steps, data, explanation, run_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (participant_id, model, model_version, ts_ns) DO UPDATE SET "
+            "score = excluded.score, heart_rate = excluded.heart_rate, "
+            "steps = excluded.steps, data = excluded.data, run_id = excluded.run_id, "
+            "explanation = COALESCE(excluded.explanation, anomalies.explanation)",
+            rows,
+        )
+    connection.close()
+    return run_id
+
+
+def _optional_float(value):
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def record_results(*args, **kwargs):
+    """
+    store_results for analyses: failures are reported but never raised, so
+    the store can't break an analysis. Returns the run ID or None.
+    """
+    try:
+        run_id = store_results(*args, **kwargs)
+        print(f"Stored the anomalies of run {run_id} in the result store.")
+        return run_id
+    except Exception as e:
+        print(f"[WARNING] Could not store the anomalies: {e}")
+        return None
+
+
+def query_anomalies(
+    participant_id: str,
+    start_date: str = None,
+    end_date: str = None,
+    model: str = None,
+    version: str = None,
+    min_score: float = None,
+    order: str = "score",
+    limit: int = None,
+    db_path: str = None,
+) -> list:
+    """
+    Returns stored anomalies of a participant, optionally restricted to
+    [start_date, end_date] (whole UTC days), a model and model version and
+    a minimum score, ordered by score (highest first) or time.
+    """
+    if order not in QUERY_ORDERS:
+        raise ValueError(
+            f"Unknown order '{order}'. Expected one of {list(QUERY_ORDERS)}."
+        )
+
+    conditions = ["participant_id = ?"]
+    values = [participant_id]
+    if start_date:
+        conditions.append("ts_ns >= ?")
+        values.append(int(_utc_ns([pd.Timestamp(start_date)])[0]))
+    if end_date:
+        conditions.append("ts_ns < ?")
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        values.append(int(_utc_ns([end])[0]))
+    if model:
+        conditions.append("model = ?")
+        values.append(model)
+    if version:
+        conditions.append("model_version = ?")
+        values.append(version)
+    if min_score is not None:
+        conditions.append("score >= ?")
+        values.append(min_score)
+    values.append(limit or config.ANOMALY_QUERY_LIMIT)
+
+    connection = connect(db_path)
+    try:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(
+            f"SELECT {', '.join(ANOMALY_FIELDS)}, data FROM anomalies "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {QUERY_ORDERS[order]} LIMIT ?",
+            values,
+        ).fetchall()
+    finally:
+        connection.close()
+
+    results = []
+    for row in rows:
+        anomaly = dict(row)
+        anomaly["anomaly_data"] = json.loads(anomaly.pop("data"))
+        results.append(anomaly)
+    return results
+
+
+def list_runs(participant_id: str, limit: int = None, db_path: str = None) -> list:
+    """Returns a participant's most recent runs, newest first."""
+    connection = connect(db_path)
+    try:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(
+            "SELECT * FROM runs WHERE participant_id = ? "
+            "ORDER BY run_id DESC LIMIT ?",
+            (participant_id, limit or config.ANOMALY_QUERY_LIMIT),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    runs = []
+    for row in rows:
+        run = dict(row)
+        run["params"] = json.loads(run["params"])
+        runs.append(run)
+    return runs
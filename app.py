@@ -1,7 +1,10 @@
 # app.py
 
+import re
 from flask import Flask, request, jsonify
-from pipeline import run_pipeline
+from pipeline import run_pipeline, run_incremental_pipeline, run_out_of_core_pipeline
+from profiler import should_profile, run_profiled
+from warmup import is_ready, start_warm_up
 import warnings
 import config
 
@@ -9,18 +12,42 @@ warnings.simplefilter(action="ignore", category=FutureWarning)
 
 app = Flask(__name__)
 
+# Preload dependencies, models and feature caches in the background.
+# /ready reports 503 until this has finished.
+start_warm_up()
+
+PARTICIPANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+@app.route("/ready", methods=["GET"])
+def readiness():
+    """
+    Readiness probe. Returns 200 once the warm-up has finished and 503
+    before, so load balancers only route traffic to warm workers.
+    """
+    if not is_ready():
+        return jsonify({"status": "warming_up"}), 503
+    return jsonify({"status": "ready"})
+
 
 @app.route("/analyze_range", methods=["GET"])
 def analyze_data_range():
     """
     API endpoint to trigger the anomaly detection pipeline for a date range.
-    Accepts 'start_date', 'end_date', and an optional 'target' query parameter.
-    e.g., /analyze_range?start_date=...&end_date=...&target=steps
+    Accepts 'start_date', 'end_date', and optional 'target', 'resolution'
+    (raw, 1min, 5min or 1h), 'drill_down' (1 to report raw samples from
+    the flagged buckets), 'mode' (sample or window) and 'out_of_core' (1 to
+    stream long ranges with bounded memory) query parameters.
+    e.g., /analyze_range?start_date=...&end_date=...&target=steps&resolution=5min
     """
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
 
     target_feature = request.args.get("target", config.DEFAULT_TARGET_FEATURE)
+    resolution = request.args.get("resolution", config.DEFAULT_RESOLUTION)
+    drill_down = request.args.get("drill_down") == "1"
+    mode = request.args.get("mode", config.DEFAULT_DETECTION_MODE)
+    out_of_core = request.args.get("out_of_core") == "1"
 
     if not all([start_date, end_date]):
         return (
@@ -33,10 +60,94 @@ def analyze_data_range():
             400,
         )
 
+    if resolution not in config.RESOLUTIONS:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"Invalid 'resolution'. Use one of {list(config.RESOLUTIONS)}.",
+                }
+            ),
+            400,
+        )
+
+    if mode not in config.DETECTION_MODES:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"Invalid 'mode'. Use one of {list(config.DETECTION_MODES)}.",
+                }
+            ),
+            400,
+        )
+
+    if out_of_core and (resolution != "raw" or mode != "sample"):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "'out_of_core' only supports the raw resolution and sample mode.",
+                }
+            ),
+            400,
+        )
+
     print(f"Received request to analyze data from: {start_date} to {end_date}")
     print(f"Target feature for ranking: {target_feature}")
 
-    analysis_result = run_pipeline(start_date, end_date, target_feature)
+    if out_of_core:
+        pipeline_func = run_out_of_core_pipeline
+        args = (start_date, end_date, target_feature)
+    else:
+        pipeline_func = run_pipeline
+        args = (start_date, end_date, target_feature, resolution, drill_down, mode)
+
+    force_profile = request.headers.get("X-Profile-Request") == "1"
+    if should_profile(force_profile):
+        analysis_result = run_profiled(
+            pipeline_func,
+            {
+                "start": start_date,
+                "end": end_date,
+                "target": target_feature,
+                "resolution": resolution,
+                "mode": mode,
+                "out_of_core": int(out_of_core),
+            },
+            *args,
+        )
+    else:
+        analysis_result = pipeline_func(*args)
+
+    if analysis_result.get("status") == "error":
+        return jsonify(analysis_result), 500
+
+    return jsonify(analysis_result)
+
+
+@app.route("/analyze_incremental", methods=["GET"])
+def analyze_incremental():
+    """
+    API endpoint to score only the days added since a participant's last
+    incremental run, using their stored model.
+    e.g., /analyze_incremental?participant=participant_01&target=heart_rate
+    """
+    participant_id = request.args.get("participant", "")
+    target_feature = request.args.get("target", config.DEFAULT_TARGET_FEATURE)
+
+    if not PARTICIPANT_ID_PATTERN.match(participant_id):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Missing or invalid 'participant' parameter.",
+                }
+            ),
+            400,
+        )
+
+    analysis_result = run_incremental_pipeline(participant_id, target_feature)
 
     if analysis_result.get("status") == "error":
         return jsonify(analysis_result), 500
@@ -44,5 +155,162 @@ def analyze_data_range():
     return jsonify(analysis_result)
 
 
+@app.route("/overview", methods=["GET"])
+def overview():
+    """
+    API endpoint answering multi-month dashboard requests from the daily
+    summary index, without touching raw data. Use /analyze_range on a
+    single day to drill into it.
+    e.g., /overview?participant=default&start_date=2025-04-01&end_date=2025-06-30
+    """
+    from daily_summary import query_overview
+
+    participant_id = request.args.get("participant", config.DEFAULT_PARTICIPANT_ID)
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+
+    if not all([start_date, end_date]):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Missing 'start_date' or 'end_date' parameter.",
+                }
+            ),
+            400,
+        )
+    if not PARTICIPANT_ID_PATTERN.match(participant_id):
+        return (
+            jsonify({"status": "error", "message": "Invalid 'participant' parameter."}),
+            400,
+        )
+
+    try:
+        days = query_overview(participant_id, start_date, end_date)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    return jsonify(
+        {
+            "status": "success",
+            "participant_id": participant_id,
+            "date_range": f"{start_date} to {end_date}",
+            "days": days,
+        }
+    )
+
+
+@app.route("/coverage", methods=["GET"])
+def coverage():
+    """
+    API endpoint reporting the per-day heart rate and steps coverage of the
+    export from the coverage index, and which days /analyze_range skips.
+    e.g., /coverage?start_date=2025-04-01&end_date=2025-06-30
+    """
+    from data_coverage import coverage_report
+
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+
+    if not all([start_date, end_date]):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Missing 'start_date' or 'end_date' parameter.",
+                }
+            ),
+            400,
+        )
+
+    try:
+        days = coverage_report(
+            config.BASE_PATH, start_date, end_date, config.COVERAGE_MIN_WEAR_FRACTION
+        )
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    return jsonify(
+        {
+            "status": "success",
+            "date_range": f"{start_date} to {end_date}",
+            "min_wear_fraction": config.COVERAGE_MIN_WEAR_FRACTION,
+            "days": days,
+        }
+    )
+
+
+@app.route("/anomalies", methods=["GET"])
+def anomalies():
+    """
+    API endpoint answering queries over the stored anomalies of past
+    analyses (see anomaly_store.py) without rerunning the pipeline.
+    Every filter is optional except the participant, which defaults to
+    config.DEFAULT_PARTICIPANT_ID.
+    e.g., /anomalies?participant=default&start_date=2025-04-01&end_date=2025-06-30
+          &model=sample_isolation_forest&min_score=0.6&order=score&limit=50
+    """
+    from anomaly_store import QUERY_ORDERS, query_anomalies
+
+    participant_id = request.args.get("participant", config.DEFAULT_PARTICIPANT_ID)
+    order = request.args.get("order", "score")
+
+    if not PARTICIPANT_ID_PATTERN.match(participant_id):
+        return (
+            jsonify({"status": "error", "message": "Invalid 'participant' parameter."}),
+            400,
+        )
+    if order not in QUERY_ORDERS:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"Invalid 'order' parameter. Choose from {list(QUERY_ORDERS)}.",
+                }
+            ),
+            400,
+        )
+    try:
+        min_score = request.args.get("min_score")
+        min_score = None if min_score is None else float(min_score)
+        limit = int(request.args.get("limit", config.ANOMALY_QUERY_LIMIT))
+        if not 0 < limit <= config.ANOMALY_QUERY_MAX_LIMIT:
+            raise ValueError
+    except ValueError:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Invalid 'min_score', or 'limit' not between 1 and "
+                    f"{config.ANOMALY_QUERY_MAX_LIMIT}.",
+                }
+            ),
+            400,
+        )
+
+    try:
+        results = query_anomalies(
+            participant_id,
+            request.args.get("start_date"),
+            request.args.get("end_date"),
+            model=request.args.get("model"),
+            version=request.args.get("model_version"),
+            min_score=min_score,
+            order=order,
+            limit=limit,
+        )
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    return jsonify(
+        {
+            "status": "success",
+            "participant_id": participant_id,
+            "count": len(results),
+            "results": results,
+        }
+    )
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
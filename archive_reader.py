@@ -0,0 +1,139 @@
+# archive_reader.py
+#
+# Lets every data path point either to the extracted export or into a Fitbit
+# takeout zip, e.g. "takeout.zip/Takeout/Fitbit/Physical Activity_GoogleData/".
+# Members are read straight from the archive without extracting it.
+
+import glob as file_glob
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+
+import pandas as pd
+
+import config
+
+# Open archives keyed by path: (mtime, ZipFile, {directory: {file names}}).
+# The ZipFile reads the central directory once; the directory map finds
+# members by name without scanning the archive. A replaced archive's old
+# handle is never closed here: threads may still be reading from it, and
+# it is closed when the last of them drops its reference.
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def split_archive_path(path: str):
+    """
+    Splits a path into (zip file, member name) if it points into a zip
+    archive, or returns None for a regular file system path.
+    """
+    normalized = str(path).replace(os.sep, "/")
+    start = 0
+    while True:
+        position = normalized.lower().find(".zip/", start)
+        if position == -1:
+            return None
+        zip_path = normalized[: position + 4]
+        if os.path.isfile(zip_path):
+            member = posixpath.normpath(normalized[position + 5 :])
+            return zip_path, "" if member == "." else member
+        start = position + 5
+
+
+def _open_archive(zip_path: str):
+    """Returns the cached ZipFile and directory map of an archive."""
+    mtime = os.path.getmtime(zip_path)
+    with _archives_lock:
+        cached = _archives.get(zip_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        archive = zipfile.ZipFile(zip_path)
+        directories = {}
+        for name in archive.namelist():
+            if not name.endswith("/"):
+                directory, file_name = posixpath.split(name)
+                directories.setdefault(directory, set()).add(file_name)
+
+        _archives[zip_path] = (mtime, archive, directories)
+        return archive, directories
+
+
+def exists(path: str) -> bool:
+    """os.path.exists for files that may live inside a zip archive."""
+    location = split_archive_path(path)
+    if location is None:
+        return os.path.exists(path)
+    zip_path, member = location
+    _, directories = _open_archive(zip_path)
+    directory, file_name = posixpath.split(member)
+    return file_name in directories.get(directory, ()) or member in directories
+
+
+def stat(path: str) -> tuple:
+    """
+    Returns (modification time, size in bytes) of a file that may live
+    inside a zip archive, without reading its contents.
+    """
+    location = split_archive_path(path)
+    if location is None:
+        result = os.stat(path)
+        return result.st_mtime, result.st_size
+    zip_path, member = location
+    archive, _ = _open_archive(zip_path)
+    try:
+        info = archive.getinfo(member)
+    except KeyError:
+        raise FileNotFoundError(f"'{member}' not found in archive '{zip_path}'.")
+    return time.mktime(info.date_time + (0, 0, -1)), info.file_size
+
+
+def glob(pattern: str) -> list:
+    """glob.glob for file name patterns that may point inside a zip archive."""
+    location = split_archive_path(pattern)
+    if location is None:
+        return file_glob.glob(pattern)
+    zip_path, member_pattern = location
+    _, directories = _open_archive(zip_path)
+    directory, name_pattern = posixpath.split(member_pattern)
+    return [
+        f"{zip_path}/{posixpath.join(directory, name)}"
+        for name in sorted(directories.get(directory, ()))
+        if fnmatchcase(name, name_pattern)
+    ]
+
+
+def read_csv(path: str, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv for files that may live inside a zip archive. Archive
+    members are decompressed as a stream straight into the parser.
+    Raises FileNotFoundError for missing files, like pd.read_csv.
+    """
+    location = split_archive_path(path)
+    if location is None:
+        return pd.read_csv(path, **kwargs)
+    zip_path, member = location
+    archive, _ = _open_archive(zip_path)
+    try:
+        stream = archive.open(member)
+    except KeyError:
+        raise FileNotFoundError(f"'{member}' not found in archive '{zip_path}'.")
+    with stream:
+        return pd.read_csv(stream, **kwargs)
+
+
+def read_csvs(paths: list, max_workers: int = None, **kwargs) -> list:
+    """
+    Reads several independent files in parallel threads and returns the
+    DataFrames in the order of paths. Decompression and parsing release
+    the GIL for most of their work, so members are decompressed in parallel.
+    """
+    if len(paths) <= 1:
+        return [read_csv(path, **kwargs) for path in paths]
+    max_workers = max_workers or config.ARCHIVE_READ_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(lambda path: read_csv(path, **kwargs), paths))
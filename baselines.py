@@ -0,0 +1,95 @@
+# baselines.py
+#
+# Scalable Local Outlier Factor and One-Class SVM baselines. Exact LOF and
+# kernel OCSVM are quadratic in the number of rows, which rules them out on
+# weeks of second-level data. Both variants here fit on a uniform subsample
+# of reference rows and score the full data in chunks, so time is linear in
+# the number of rows and memory is bounded by the reference and chunk sizes:
+#
+# - LOF: novelty-mode LocalOutlierFactor with a kd-tree over the references.
+# - OCSVM: a Nystroem approximation of the RBF kernel followed by a linear
+#   one-class SVM trained with SGD.
+#
+# Both follow the detector interface of evaluation.py: run(X, timestamps)
+# returns (anomaly_mask, scores) with higher scores more anomalous.
+
+import numpy as np
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.neighbors import LocalOutlierFactor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+import config
+
+
+def reference_sample(X: np.ndarray, size: int = None) -> np.ndarray:
+    """A deterministic uniform subsample of at most size rows of X."""
+    size = size or config.BASELINE_REFERENCE_ROWS
+    if len(X) <= size:
+        return X
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    return X[np.sort(rng.choice(len(X), size, replace=False))]
+
+
+def chunked_scores(score_samples, X: np.ndarray, chunk_rows: int = None) -> np.ndarray:
+    """Applies score_samples to X in chunks, returning one score per row."""
+    chunk_rows = chunk_rows or config.BASELINE_CHUNK_ROWS
+    scores = np.empty(len(X))
+    for start in range(0, len(X), chunk_rows):
+        scores[start : start + chunk_rows] = score_samples(
+            X[start : start + chunk_rows]
+        )
+    return scores
+
+
+def run_lof(X: np.ndarray, timestamps: np.ndarray = None):
+    """
+    Local Outlier Factor fit on a subsample of reference rows. Duplicate
+    references are dropped, since identical neighbors make the local
+    density infinite on the repeated readings of wearable data. With fewer
+    than two distinct references there are no neighbors to compare to, so
+    no row is flagged and every score is zero.
+    """
+    scaler = StandardScaler().fit(X)
+    references = np.unique(scaler.transform(reference_sample(X)), axis=0)
+    if len(references) < 2:
+        print("[WARNING] LOF needs at least 2 distinct reference rows. Skipping.")
+        return np.zeros(len(X), dtype=bool), np.zeros(len(X))
+    model = LocalOutlierFactor(
+        n_neighbors=min(config.LOF_NEIGHBORS, len(references) - 1),
+        algorithm="kd_tree",
+        novelty=True,
+        contamination=config.ISOLATION_FOREST_CONTAMINATION,
+    )
+    model.fit(references)
+
+    scores = -chunked_scores(
+        lambda chunk: model.score_samples(scaler.transform(chunk)), X
+    )
+    # Same rule as model.predict, without scoring the rows twice
+    return -scores < model.offset_, scores
+
+
+def run_ocsvm(X: np.ndarray, timestamps: np.ndarray = None):
+    """
+    One-Class SVM over a Nystroem approximation of the RBF kernel, trained
+    with a linear SGD solver on a subsample of reference rows.
+    """
+    features = make_pipeline(
+        StandardScaler(),
+        Nystroem(
+            n_components=config.OCSVM_COMPONENTS, random_state=config.RANDOM_STATE
+        ),
+    )
+    references = features.fit_transform(reference_sample(X))
+    model = SGDOneClassSVM(
+        nu=config.ISOLATION_FOREST_CONTAMINATION, random_state=config.RANDOM_STATE
+    )
+    model.fit(references)
+    del references
+
+    scores = -chunked_scores(
+        lambda chunk: model.score_samples(features.transform(chunk)), X
+    )
+    return -scores < model.offset_, scores
@@ -0,0 +1,289 @@
+# batch_runner.py
+
+import argparse
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+import config
+from daily_summary import update_from_scored
+from data_loader import DAILY_STEPS_ATTR, load_data_range
+from feature_engineering import create_features
+from anomaly_model import score_anomalies
+
+# Columns written for every participant so the consolidated output has a
+# single schema (questionnaire encodings differ between participants).
+OUTPUT_COLUMNS = {
+    "heart_rate": "float64",
+    "steps": "float64",
+    "hour": "int64",
+    "hr_rolling_avg": "float64",
+    "hr_rolling_std": "float64",
+    "anomaly_score": "float64",
+}
+
+# Participant IDs name output partitions, so they must be plain path components
+PARTICIPANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def load_manifest(manifest_path: str) -> pd.DataFrame:
+    """
+    Loads a batch manifest from a CSV or JSON file.
+
+    Each row describes one participant and must provide 'participant_id',
+    'export_root', 'start_date' and 'end_date'. The data paths inside each
+    export root follow the layout configured in config.py.
+    """
+    if manifest_path.endswith(".json"):
+        manifest = pd.read_json(manifest_path, dtype=str)
+    else:
+        manifest = pd.read_csv(manifest_path, dtype=str)
+
+    required = ["participant_id", "export_root", "start_date", "end_date"]
+    missing = [col for col in required if col not in manifest.columns]
+    if missing:
+        raise ValueError(f"Manifest is missing required columns: {missing}")
+
+    if manifest["participant_id"].duplicated().any():
+        raise ValueError("Manifest contains duplicate participant IDs.")
+
+    invalid = [
+        pid
+        for pid in manifest["participant_id"]
+        if not PARTICIPANT_ID_PATTERN.match(pid)
+    ]
+    if invalid:
+        raise ValueError(
+            f"Invalid participant IDs (use letters, digits, '_' and '-'): {invalid}"
+        )
+
+    return manifest
+
+
+def participant_paths(export_root: str) -> dict:
+    """Resolves the configured data paths relative to a participant's export root."""
+    return {
+        "base_path": os.path.join(export_root, config.BASE_PATH),
+        "sleep_path": os.path.join(export_root, config.SLEEP_PATH),
+        "hrv_path": os.path.join(export_root, config.HRV_PATH),
+        "questionnaire_path": os.path.join(export_root, config.QUESTIONNAIRE_PATH),
+    }
+
+
+def partition_dir(output_dir: str, participant_id: str) -> str:
+    """The participant's partition of the output dataset."""
+    if not PARTICIPANT_ID_PATTERN.match(str(participant_id)):
+        raise ValueError(f"Invalid participant ID '{participant_id}'.")
+    return os.path.join(output_dir, f"participant_id={participant_id}")
+
+
+def failure_result(task: dict, output_dir: str, message: str, seconds: float) -> dict:
+    """
+    Reports a failed participant and removes their partition, so anomalies
+    of an earlier run are not mistaken for the result of this one.
+    """
+    try:
+        shutil.rmtree(partition_dir(output_dir, task["participant_id"]))
+    except (OSError, ValueError):
+        pass  # No partition, or an ID that never had one
+    return {
+        "participant_id": task["participant_id"],
+        "status": "error",
+        "message": message,
+        "rows": 0,
+        "anomalies": 0,
+        "seconds": seconds,
+    }
+
+
+def analyze_participant(task: dict, output_dir: str) -> dict:
+    """
+    Runs load -> features -> detect for a single participant and writes
+    all flagged rows to the participant's partition of the output dataset.
+
+    Runs inside a worker process. Errors are caught and reported so one
+    participant's failure never affects the others.
+    """
+    participant_id = task["participant_id"]
+    start_time = time.time()
+    try:
+        output_partition = partition_dir(output_dir, participant_id)
+        paths = participant_paths(task["export_root"])
+        df = load_data_range(
+            paths["base_path"],
+            paths["sleep_path"],
+            paths["hrv_path"],
+            paths["questionnaire_path"],
+            task["start_date"],
+            task["end_date"],
+            features=config.FEATURES,
+        )
+        df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
+        score_anomalies(
+            df_featured,
+            config.FEATURES,
+            config.ISOLATION_FOREST_CONTAMINATION,
+            config.RANDOM_STATE,
+        )
+
+        anomalies = df_featured.loc[
+            df_featured["anomaly"] == -1, list(OUTPUT_COLUMNS)
+        ].astype(OUTPUT_COLUMNS)
+        anomalies.index.name = "timestamp"
+
+        shutil.rmtree(output_partition, ignore_errors=True)
+        os.makedirs(output_partition)
+        anomalies.to_parquet(os.path.join(output_partition, "anomalies.parquet"))
+        update_from_scored(
+            participant_id,
+            df_featured,
+            "batch",
+            paths["base_path"],
+            daily_steps=df.attrs.get(DAILY_STEPS_ATTR),
+        )
+
+        return {
+            "participant_id": participant_id,
+            "status": "success",
+            "rows": len(df_featured),
+            "anomalies": len(anomalies),
+            "seconds": time.time() - start_time,
+        }
+    except Exception as e:
+        return failure_result(task, output_dir, str(e), time.time() - start_time)
+
+
+def _participant_process(task: dict, output_dir: str, connection):
+    connection.send(analyze_participant(task, output_dir))
+    connection.close()
+
+
+def run_isolated(tasks: list, output_dir: str, max_workers: int):
+    """
+    Yields the result of every task as it finishes. Each participant runs
+    in a fresh process, at most max_workers at a time, so a worker that
+    dies (e.g. killed when out of memory) only fails its own participant.
+    """
+    context = multiprocessing.get_context()
+    pending = list(tasks)
+    running = {}
+    while pending or running:
+        while pending and len(running) < max_workers:
+            task = pending.pop(0)
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_participant_process, args=(task, output_dir, writer)
+            )
+            process.start()
+            writer.close()
+            running[reader] = (process, task, time.time())
+
+        # A reader is ready when its result arrives or its process dies
+        for reader in wait(list(running)):
+            process, task, start_time = running.pop(reader)
+            try:
+                result = reader.recv()
+            except EOFError:
+                result = None
+            reader.close()
+            process.join()
+            if result is None:
+                result = failure_result(
+                    task,
+                    output_dir,
+                    f"Worker process failed (exit code {process.exitcode}).",
+                    time.time() - start_time,
+                )
+            yield result
+
+
+def run_batch(manifest: pd.DataFrame, output_dir: str, max_workers: int = None) -> dict:
+    """
+    Runs the anomaly detection pipeline for every participant in the
+    manifest in parallel worker processes (see run_isolated).
+
+    Anomalies are written as a Parquet dataset partitioned by participant
+    under output_dir. Returns a summary with per-participant results and
+    overall throughput.
+    """
+    max_workers = max_workers or config.BATCH_MAX_WORKERS or os.cpu_count()
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = manifest.to_dict(orient="records")
+
+    print(f"--- Starting batch analysis of {len(tasks)} participants ---")
+    print(f"Using {max_workers} worker processes.")
+
+    start_time = time.time()
+    participant_results = []
+    for result in run_isolated(tasks, output_dir, max_workers):
+        participant_results.append(result)
+        print(
+            f"  -> [{len(participant_results)}/{len(tasks)}] "
+            f"{result['participant_id']}: {result['status']}"
+        )
+
+    elapsed = time.time() - start_time
+    succeeded = [r for r in participant_results if r["status"] == "success"]
+    total_rows = sum(r["rows"] for r in succeeded)
+
+    summary = {
+        "participants": len(tasks),
+        "succeeded": len(succeeded),
+        "failed": len(tasks) - len(succeeded),
+        "rows": total_rows,
+        "anomalies": sum(r["anomalies"] for r in succeeded),
+        "seconds": elapsed,
+        "rows_per_second": total_rows / elapsed if elapsed > 0 else 0.0,
+        "output_dir": output_dir,
+        "results": sorted(participant_results, key=lambda r: r["participant_id"]),
+    }
+    print_summary(summary)
+    return summary
+
+
+def print_summary(summary: dict):
+    """Prints the throughput summary of a batch run."""
+    print("-" * 50)
+    print(
+        f"Participants: {summary['participants']} "
+        f"({summary['succeeded']} succeeded, {summary['failed']} failed)"
+    )
+    print(f"Rows processed: {summary['rows']}")
+    print(f"Anomalies found: {summary['anomalies']}")
+    print(f"Wall time: {summary['seconds']:.2f} seconds")
+    print(f"Throughput: {summary['rows_per_second']:.0f} rows/second")
+    for result in summary["results"]:
+        if result["status"] == "error":
+            print(f"  [FAILED] {result['participant_id']}: {result['message']}")
+    print(f"Anomalies saved to '{summary['output_dir']}'")
+    print("-" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run anomaly detection for many participants in parallel."
+    )
+    parser.add_argument("manifest", help="CSV or JSON manifest of participants.")
+    parser.add_argument(
+        "--output-dir",
+        default=config.BATCH_OUTPUT_DIR,
+        help="Directory for the consolidated Parquet anomaly dataset.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Number of worker processes."
+    )
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    summary = run_batch(manifest, args.output_dir, args.workers)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
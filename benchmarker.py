@@ -1,18 +1,29 @@
 # benchmarker.py
 
+import argparse
+import numpy as np
 import pandas as pd
 import time
+import tracemalloc
 import os
 import config
+from anomaly_overlap import NS_PER_SECOND, overlap_summary
+from anomaly_store import record_results
 from data_loader import load_data_range
+from evaluation import DETECTORS
 from feature_engineering import create_features
 from sklearn.ensemble import IsolationForest
 
+# Detectors compared by run_baseline_benchmark; agreement is measured
+# against the first one
+BASELINE_DETECTORS = ["Complex_Isolation_Forest", "LOF_Subsampled", "OCSVM_Nystroem"]
+
 
 def run_ab_test(start_date: str, end_date: str):
     """
     Performs an A/B test between a simple and a complex model and saves
-    the detected anomalies to CSV files for qualitative review.
+    the detected anomalies to CSV files for qualitative review. They are
+    also recorded in the anomaly store (see anomaly_store.py).
     """
     print("--- Starting Model A/B Test ---")
 
@@ -25,6 +36,7 @@ def run_ab_test(start_date: str, end_date: str):
         config.QUESTIONNAIRE_PATH,
         start_date,
         end_date,
+        features=config.FEATURES,
     )
     df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
     print("Data preparation complete.")
@@ -64,9 +76,23 @@ def run_ab_test(start_date: str, end_date: str):
         predictions = model.predict(X)
         end_time = time.time()
 
-        # Isolate the anomalies and save them
-        anomalies_df = df_featured[predictions == -1]
+        # Isolate the anomalies and save them with their scores
+        anomalies_df = df_featured[predictions == -1].copy()
+        anomalies_df["anomaly_score"] = -model.score_samples(X[predictions == -1])
         anomalies_df.to_csv(output_file)
+        record_results(
+            config.DEFAULT_PARTICIPANT_ID,
+            "ab_test",
+            name,
+            {
+                "features": features,
+                "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+                "random_state": config.RANDOM_STATE,
+            },
+            anomalies_df,
+            start_date,
+            end_date,
+        )
 
         num_anomalies = len(anomalies_df)
         print(f"  -> Found {num_anomalies} anomalies.")
@@ -80,5 +106,95 @@ def run_ab_test(start_date: str, end_date: str):
     )
 
 
+def run_baseline_benchmark(start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Runs the forest and the scalable LOF and One-Class SVM baselines on the
+    same features and reports the time, peak traced memory and agreement
+    with the forest of each. The table is saved to
+    config.BASELINE_BENCHMARK_PATH.
+    """
+    print("--- Starting Baseline Benchmark ---")
+
+    print("\nLoading and preparing data...")
+    df = load_data_range(
+        config.BASE_PATH,
+        config.SLEEP_PATH,
+        config.HRV_PATH,
+        config.QUESTIONNAIRE_PATH,
+        start_date,
+        end_date,
+        features=config.FEATURES,
+    )
+    df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
+    features = [f for f in config.FEATURES if f in df_featured.columns]
+    X = df_featured[features].select_dtypes(include="number").to_numpy(np.float32)
+    index = df_featured.index
+    timestamps = (
+        (index.tz_convert(None) if index.tz is not None else index)
+        .to_numpy(dtype="datetime64[ns]")
+        .view("int64")
+    )
+    print(f"Data preparation complete. Feature matrix: {X.shape}")
+    print("-" * 50)
+
+    anomaly_times = {}
+    rows = []
+    for name in BASELINE_DETECTORS:
+        print(f"Testing: {name}")
+        tracemalloc.start()
+        start_time = time.time()
+        try:
+            anomaly_mask, _ = DETECTORS[name]["run"](X, timestamps)
+            seconds = time.time() - start_time
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        anomaly_times[name] = np.unique(timestamps[anomaly_mask])
+        rows.append(
+            {
+                "model": name,
+                "rows": len(X),
+                "anomalies": int(anomaly_mask.sum()),
+                "seconds": round(seconds, 2),
+                "rows_per_second": round(len(X) / seconds),
+                "peak_mb": round(peak / (1024 * 1024), 1),
+            }
+        )
+        print(f"  -> Found {rows[-1]['anomalies']} anomalies.")
+        print(
+            f"  -> Time taken: {seconds:.2f} seconds, peak memory {rows[-1]['peak_mb']} MB."
+        )
+
+    reference = BASELINE_DETECTORS[0]
+    tolerance_ns = int(config.COMPARISON_TOLERANCE_SECONDS * NS_PER_SECOND)
+    for row in rows:
+        summary = overlap_summary(
+            anomaly_times[row["model"]], anomaly_times[reference], tolerance_ns
+        )
+        row["matched_forest"] = summary["matched_a"]
+        row["jaccard_vs_forest"] = round(summary["jaccard"], 3)
+
+    report = pd.DataFrame(rows)
+    report.to_csv(config.BASELINE_BENCHMARK_PATH, index=False)
+    print("-" * 50)
+    print(report.to_string(index=False))
+    print(f"\nBenchmark saved to '{config.BASELINE_BENCHMARK_PATH}'")
+    return report
+
+
 if __name__ == "__main__":
-    run_ab_test(config.START_DATE, config.END_DATE)
+    parser = argparse.ArgumentParser(
+        description="A/B test the forest models, or benchmark the baselines."
+    )
+    parser.add_argument(
+        "--baselines",
+        action="store_true",
+        help="Compare the forest with the scalable LOF and One-Class SVM baselines.",
+    )
+    args = parser.parse_args()
+
+    if args.baselines:
+        run_baseline_benchmark(config.START_DATE, config.END_DATE)
+    else:
+        run_ab_test(config.START_DATE, config.END_DATE)
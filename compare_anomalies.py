@@ -1,31 +1,139 @@
 # compare_anomalies.py
 
+import argparse
+import os
 import pandas as pd
 import config
-import google.generativeai as genai
-
-
-def generate_comparison_report():
+from anomaly_overlap import (
+    NS_PER_SECOND,
+    compare_models,
+    load_anomalies,
+    load_anomaly_times,
+    load_result_set_times,
+    match_within,
+    result_set_run,
+    per_day_agreement,
+    representative_examples,
+)
+
+# Result files written by benchmarker.py. Models from the evaluation.py
+# result set (config.EVALUATION_RESULTS_PATH) are added when it exists and
+# was run on the same participant and date range.
+MODEL_RESULT_FILES = {
+    "Simple": "simple_model_anomalies.csv",
+    "Complex": "complex_model_anomalies.csv",
+}
+
+# Columns needed to describe an example anomaly in the report
+EXAMPLE_COLUMNS = [
+    "heart_rate",
+    "steps",
+    "hr_rolling_avg",
+    "hr_rolling_std",
+    "sleep_deep_minutes",
+    "hrv_rmssd",
+    "anomaly_score",
+]
+
+
+def compare_results(
+    result_files: dict,
+    tolerance_seconds: float,
+    labels_path: str = None,
+    run: dict = None,
+) -> dict:
+    """
+    Compares the anomalies of several models by their timestamps.
+
+    Only the timestamp column of each results file is loaded. run is the
+    participant_id, start_date and end_date the result files cover; every
+    model of the evaluation result set is added only if the result set was
+    run on exactly those. Returns the pairwise overlap table (with
+    precision/recall if labels_path is given) and the per-day agreement of
+    every model pair.
+    """
+    model_times = {
+        name: load_anomaly_times(path)
+        for name, path in result_files.items()
+        if os.path.exists(path)
+    }
+    if run is not None and os.path.exists(config.EVALUATION_RESULTS_PATH):
+        result_set = result_set_run(config.EVALUATION_RESULTS_PATH)
+        if result_set == run:
+            model_times.update(load_result_set_times(config.EVALUATION_RESULTS_PATH))
+        else:
+            covered = result_set or "an unknown run"
+            print(
+                f"Skipping the evaluation result set: it covers {covered}, "
+                f"not {run}."
+            )
+    labels = load_anomaly_times(labels_path) if labels_path else None
+
+    tolerance_ns = int(tolerance_seconds * NS_PER_SECOND)
+    names = list(model_times)
+    per_day = {
+        (name_a, name_b): per_day_agreement(
+            model_times[name_a], model_times[name_b], tolerance_ns
+        )
+        for i, name_a in enumerate(names)
+        for name_b in names[i + 1 :]
+    }
+
+    return {
+        "model_times": model_times,
+        "summary": compare_models(model_times, tolerance_seconds, labels),
+        "per_day": per_day,
+    }
+
+
+def generate_comparison_report(
+    tolerance_seconds: float = None,
+    labels_path: str = None,
+    start_date: str = None,
+    end_date: str = None,
+):
     """
     Loads anomalies from the A/B test, selects examples, and uses an LLM
-    to generate a report comparing the quality of the findings.
+    to generate a report comparing the quality of the findings. The A/B
+    test is taken to cover start_date to end_date (by default the
+    config.py range benchmarker.py runs on).
     """
     print("--- Generating LLM Comparison Report for A/B Test ---")
 
-    try:
-        # 1. Load the results from the benchmark
-        simple_anomalies = pd.read_csv("simple_model_anomalies.csv")
-        complex_anomalies = pd.read_csv("complex_model_anomalies.csv")
-    except FileNotFoundError:
+    if tolerance_seconds is None:
+        tolerance_seconds = config.COMPARISON_TOLERANCE_SECONDS
+
+    simple_file = MODEL_RESULT_FILES["Simple"]
+    complex_file = MODEL_RESULT_FILES["Complex"]
+    if not (os.path.exists(simple_file) and os.path.exists(complex_file)):
         print("\n[ERROR] CSV files not found. Please run 'benchmarker.py' first.")
         return
 
-    # 2. Find an anomaly that is unique to the complex model
-    # We can do this by finding timestamps that exist in the complex set but not the simple one
-    simple_timestamps = set(simple_anomalies["timestamp"])
-    unique_complex_anomalies = complex_anomalies[
-        ~complex_anomalies["timestamp"].isin(simple_timestamps)
-    ]
+    # 1. Compare all available model results by timestamp
+    run = {
+        "participant_id": config.DEFAULT_PARTICIPANT_ID,
+        "start_date": start_date or config.START_DATE,
+        "end_date": end_date or config.END_DATE,
+    }
+    comparison = compare_results(
+        MODEL_RESULT_FILES, tolerance_seconds, labels_path, run
+    )
+    print(f"\nModel agreement (tolerance: {tolerance_seconds}s):")
+    print(comparison["summary"].to_string(index=False))
+    print("\nPer-day agreement (Simple vs Complex):")
+    print(comparison["per_day"][("Simple", "Complex")].to_string(index=False))
+
+    # 2. Find anomalies that are unique to the complex model
+    simple_anomalies = load_anomalies(simple_file, EXAMPLE_COLUMNS)
+    complex_anomalies = load_anomalies(complex_file, EXAMPLE_COLUMNS)
+    for anomalies in (simple_anomalies, complex_anomalies):
+        anomalies["timestamp"] = pd.to_datetime(anomalies["ts_ns"], utc=True)
+    unique_mask = ~match_within(
+        complex_anomalies["ts_ns"].to_numpy(),
+        comparison["model_times"]["Simple"],
+        int(tolerance_seconds * NS_PER_SECOND),
+    )
+    unique_complex_anomalies = complex_anomalies[unique_mask]
 
     if unique_complex_anomalies.empty:
         print(
@@ -33,9 +141,9 @@ def generate_comparison_report():
         )
         return
 
-    # Select one interesting example from each set
-    complex_example = unique_complex_anomalies.iloc[0]
-    simple_example = simple_anomalies.iloc[0]
+    # Select the most representative example from each set
+    complex_example = representative_examples(unique_complex_anomalies).iloc[0]
+    simple_example = representative_examples(simple_anomalies).iloc[0]
 
     print("\nSelected examples for comparison:")
     print("  -> Simple Model Example:", simple_example["timestamp"])
@@ -49,6 +157,8 @@ def generate_comparison_report():
         print("\n[ERROR] Google API key not set in config.py. Cannot generate report.")
         return
 
+    import google.generativeai as genai
+
     genai.configure(api_key=config.GOOGLE_API_KEY)
     llm = genai.GenerativeModel("gemini-1.5-flash")
 
@@ -102,4 +212,29 @@ def generate_comparison_report():
 
 
 if __name__ == "__main__":
-    generate_comparison_report()
+    parser = argparse.ArgumentParser(
+        description="Compare model anomalies and generate an LLM report."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=config.COMPARISON_TOLERANCE_SECONDS,
+        help="Seconds within which two anomalies count as the same event.",
+    )
+    parser.add_argument(
+        "--labels", help="Optional CSV of labeled anomalies with a 'timestamp' column."
+    )
+    parser.add_argument(
+        "--start-date",
+        default=config.START_DATE,
+        help="First day the A/B test covered (default: config.START_DATE).",
+    )
+    parser.add_argument(
+        "--end-date",
+        default=config.END_DATE,
+        help="Last day the A/B test covered (default: config.END_DATE).",
+    )
+    args = parser.parse_args()
+    generate_comparison_report(
+        args.tolerance, args.labels, args.start_date, args.end_date
+    )
@@ -14,6 +14,11 @@ HRV_PATH = (
     "Fitbit/Physical Activity_GoogleData/daily_heart_rate_variability_summary.csv"
 )
 QUESTIONNAIRE_PATH = "questionnaire.csv"
+# Any of these paths may also point into a takeout zip without extracting it,
+# e.g. "takeout.zip/Takeout/Fitbit/Physical Activity_GoogleData/"
+# (see archive_reader.py).
+# Number of files decompressed and parsed in parallel threads
+ARCHIVE_READ_WORKERS = 4
 
 # -- TARGET FEATURE --
 # The default feature to focus on for anomaly ranking.
@@ -27,7 +32,10 @@ RANDOM_STATE = 55
 
 # -- FEATURE ENGINEERING PARAMETERS --
 ROLLING_WINDOW_SIZE = 300
-# The model will use the new one-hot encoded columns from the questionnaire
+# The model will use the new one-hot encoded columns from the questionnaire.
+# Optional streams from data_sources.py (e.g. "spo2", "device_temperature",
+# "calories", "sleep_respiratory_rate", "resting_heart_rate") are only read
+# from the export when listed here.
 FEATURES = [
     "heart_rate",
     "steps",
@@ -44,3 +52,147 @@ FEATURES = [
     "caffeine_user_yes",
     "reports_high_stress_no",
 ]
+
+# -- RESOLUTION --
+# Long ranges can be analyzed on time buckets instead of raw samples.
+# Bucket length in seconds per resolution; "raw" keeps every sample.
+RESOLUTIONS = {"raw": None, "1min": 60, "5min": 300, "1h": 3600}
+DEFAULT_RESOLUTION = "raw"
+# Heart rate aggregates added to the features at coarse resolutions
+RESAMPLED_FEATURES = ["heart_rate_min", "heart_rate_max", "heart_rate_std"]
+# The rolling window always covers at least this many buckets
+RESAMPLED_MIN_WINDOW_BUCKETS = 5
+
+# -- DATA COVERAGE --
+# data_coverage.py indexes per-day, per-stream sample counts, wear time and
+# gaps of each export in this directory.
+COVERAGE_INDEX_DIR = "coverage_index"
+# Gaps between consecutive samples longer than this are counted
+COVERAGE_GAP_SECONDS = 600
+# /analyze_range skips days where heart rate covers less than this share of
+# the day's minutes; the other days are weighted by their wear fraction.
+COVERAGE_MIN_WEAR_FRACTION = 0.1
+# Extra weight factor of days without step data (their steps are imputed as 0)
+COVERAGE_MISSING_STEPS_WEIGHT = 0.5
+
+# -- PARSED CACHE --
+# parsed_cache.py keeps the heart rate and steps of every day the watcher
+# ingested as Parquet in this directory; loads read them instead of the CSVs.
+PARSED_CACHE_DIR = "parsed_cache"
+
+# -- DETECTION MODE --
+# "sample" scores every sample; "window" scores summaries of time windows
+# (see window_model.py) and maps each window's score back to its samples.
+DETECTION_MODES = ("sample", "window")
+DEFAULT_DETECTION_MODE = "sample"
+WINDOW_SECONDS = 600
+# A new window starts every WINDOW_STRIDE_SECONDS. A stride shorter than the
+# window gives overlapping (sliding) windows; it must divide WINDOW_SECONDS.
+WINDOW_STRIDE_SECONDS = 300
+WINDOW_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+# Windows with fewer samples are not scored
+WINDOW_MIN_SAMPLES = 10
+
+# -- STREAMING DETECTION --
+# streaming.py scores samples online against decayed robust baselines.
+# Weight of past samples halves every STREAMING_HALF_LIFE_SECONDS
+STREAMING_HALF_LIFE_SECONDS = 1800
+# A sample is anomalous if its robust z-score exceeds this in either direction.
+# 6.0 flags about 1% of samples on real data, like the forest's contamination.
+STREAMING_Z_THRESHOLD = 6.0
+# Residuals are clipped to this many scales before updating a baseline
+STREAMING_HUBER_CLIP = 3.0
+# A baseline flags nothing until it has seen this many samples
+STREAMING_MIN_SAMPLES = 300
+# Floor of the baseline scale in bpm, for near-constant heart rates
+STREAMING_MIN_SCALE = 1.0
+# Step counts separating the activity levels (rest, light, active)
+STREAMING_STEP_EDGES = [1, 60]
+
+# -- PROFILING --
+# When enabled, a sampled fraction of /analyze_range requests is profiled with
+# cProfile and tracemalloc. A single request can also be profiled on demand
+# by sending the 'X-Profile-Request: 1' header.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.05
+# Minimum number of seconds between two profiled requests
+PROFILING_MIN_INTERVAL_SECONDS = 300
+PROFILING_OUTPUT_DIR = "profiles"
+
+# -- BATCH ANALYSIS --
+# Number of worker processes for batch_runner.py (None uses all CPU cores)
+BATCH_MAX_WORKERS = None
+BATCH_OUTPUT_DIR = "batch_output"
+
+# -- INCREMENTAL SCORING --
+# Days of featured history kept per participant for drift-triggered refits
+INCREMENTAL_HISTORY_DAYS = 14
+# The model is refit when the PSI of new anomaly scores exceeds this value
+DRIFT_PSI_THRESHOLD = 0.2
+# Root directory holding one incremental state directory per participant
+INCREMENTAL_STATE_ROOT = "state"
+
+# -- EXPORT WATCHER --
+# watcher.py polls the export of every participant under
+# INCREMENTAL_STATE_ROOT this often for new or changed data files
+WATCH_POLL_SECONDS = 5
+# A new or changed file is ingested once its size and modification time
+# have not changed for this long, so partially written files are not read
+WATCH_DEBOUNCE_SECONDS = 10
+
+# -- OUT-OF-CORE EXECUTION --
+# out_of_core.py streams long ranges in chunks of at most a month, sized so
+# the loaded chunk and the training sample stay within this budget.
+OUT_OF_CORE_MEMORY_BUDGET_MB = 512
+# Number of highest-scoring anomalies kept across the whole range
+OUT_OF_CORE_TOP_K = 100
+
+# -- MODEL COMPARISON --
+# Two anomalies from different models within this many seconds count as the
+# same event in compare_anomalies.py
+COMPARISON_TOLERANCE_SECONDS = 30
+
+# -- SCALABLE BASELINES --
+# baselines.py fits LOF and One-Class SVM on a uniform subsample of this many
+# rows and scores all rows in chunks of BASELINE_CHUNK_ROWS.
+BASELINE_REFERENCE_ROWS = 20000
+BASELINE_CHUNK_ROWS = 20000
+LOF_NEIGHBORS = 20
+# Size of the Nystroem approximation of the RBF kernel
+OCSVM_COMPONENTS = 200
+# Time, memory and agreement table written by 'benchmarker.py --baselines'
+BASELINE_BENCHMARK_PATH = "baseline_benchmark.csv"
+
+# -- EVALUATION --
+# Flagged rows and scores of every model evaluated by evaluation.py
+EVALUATION_RESULTS_PATH = "evaluation_results.parquet"
+
+# -- SERVICE WARM-UP --
+# Preload dependencies, models and feature tails when the API server starts.
+# The /ready endpoint reports 503 until the warm-up has finished.
+WARMUP_ON_BOOT = True
+# Number of most recently updated participants to preload
+WARMUP_RECENT_PARTICIPANTS = 20
+
+# -- PRE-FORK SERVING --
+# serve.py preloads the hot participants in one process and forks this many
+# workers sharing its memory (None uses all CPU cores).
+SERVE_WORKERS = None
+SERVE_HOST = "0.0.0.0"
+SERVE_PORT = 5000
+
+# -- DAILY SUMMARY INDEX --
+# Per-day facts (heart rate percentiles, steps, sleep, HRV, anomaly counts)
+# are upserted into this SQLite file during scoring and served by /overview.
+DAILY_SUMMARY_DB = "daily_summary.sqlite"
+# Participant ID under which /analyze_range results of the paths above are indexed
+DEFAULT_PARTICIPANT_ID = "default"
+
+# -- ANOMALY STORE --
+# Anomalies (with scores, model versions and explanations) of every pipeline,
+# evaluation and A/B test run are upserted into this SQLite file and served
+# by /anomalies without rerunning the analysis.
+ANOMALY_STORE_DB = "anomaly_store.sqlite"
+# Default and maximum number of anomalies returned by one query
+ANOMALY_QUERY_LIMIT = 100
+ANOMALY_QUERY_MAX_LIMIT = 1000
@@ -0,0 +1,247 @@
+# daily_summary.py
+
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+from archive_reader import exists, read_csv
+from data_sources import load_source
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+# Per-day facts derived from the loaded data, with their SQLite types
+DATA_COLUMNS = {
+    "hr_p05": "REAL",
+    "hr_p50": "REAL",
+    "hr_p95": "REAL",
+    "hr_mean": "REAL",
+    "hr_max": "REAL",
+    "resting_hr": "REAL",
+    "total_steps": "INTEGER",
+    "sleep_minutes": "REAL",
+    "sleep_deep_minutes": "REAL",
+    "sleep_rem_minutes": "REAL",
+    "sleep_awakenings": "REAL",
+    "hrv_rmssd": "REAL",
+    "sample_count": "INTEGER",
+}
+# Per-day facts written by model scoring
+ANOMALY_COLUMNS = {
+    "anomaly_count": "INTEGER",
+    "top_score": "REAL",
+    "scored_by": "TEXT",
+}
+
+
+def connect(db_path: str = None) -> sqlite3.Connection:
+    """Opens the summary database, creating the table if needed."""
+    connection = sqlite3.connect(db_path or config.DAILY_SUMMARY_DB, timeout=30)
+    # WAL lets the API read while batch or incremental runs write
+    connection.execute("PRAGMA journal_mode=WAL")
+    columns = ", ".join(
+        f"{name} {sql_type}"
+        for name, sql_type in {**DATA_COLUMNS, **ANOMALY_COLUMNS}.items()
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS daily_summary ("
+        "participant_id TEXT NOT NULL, date TEXT NOT NULL, "
+        f"{columns}, updated_at REAL, PRIMARY KEY (participant_id, date))"
+    )
+    return connection
+
+
+def day_labels(index: pd.DatetimeIndex) -> pd.Index:
+    """ISO date of every timestamp (in its own timezone), via int64 day numbers."""
+    wall_time = index.tz_localize(None) if index.tz is not None else index
+    day_numbers, inverse = np.unique(wall_time.asi8 // NS_PER_DAY, return_inverse=True)
+    labels = pd.to_datetime(day_numbers * NS_PER_DAY).strftime("%Y-%m-%d")
+    return pd.Index(np.asarray(labels)[inverse], name="date")
+
+
+def load_daily_steps(base_path: str, dates: list) -> pd.Series:
+    """
+    Sums the raw step readings of the monthly steps files per day.
+
+    The loaded data forward-fills steps onto every heart rate sample, so
+    its 'steps' column cannot be summed directly.
+    """
+    totals = []
+    for month in sorted({pd.Timestamp(d).strftime("%Y-%m-01") for d in dates}):
+        steps_file = os.path.join(base_path, f"steps_{month}.csv")
+        if not exists(steps_file):
+            continue
+        steps_df = read_csv(
+            steps_file, usecols=lambda c: c in ("timestamp", "steps", "value")
+        ).rename(columns={"value": "steps"})
+        days = pd.to_datetime(steps_df["timestamp"], format="ISO8601").dt.date
+        totals.append(steps_df["steps"].groupby(days.astype(str)).sum())
+
+    if not totals:
+        return pd.Series(dtype="int64")
+    daily = pd.concat(totals)
+    return daily[daily.index.isin([str(d) for d in dates])]
+
+
+def summarize_days(
+    df: pd.DataFrame, base_path: str = None, daily_steps: dict = None
+) -> pd.DataFrame:
+    """
+    Computes the DATA_COLUMNS facts of every day in a raw-resolution frame
+    from load_data_range, indexed by ISO date. daily_steps are the step
+    totals per day the loader already summed (its attrs[DAILY_STEPS_ATTR]);
+    without them the steps files are read again.
+    """
+    base_path = base_path or config.BASE_PATH
+    days = day_labels(df.index)
+    heart_rate = df["heart_rate"].astype(float)
+    by_day = heart_rate.groupby(days)
+
+    percentiles = by_day.quantile([0.05, 0.5, 0.95]).unstack()
+    summary = pd.DataFrame(
+        {
+            "hr_p05": percentiles[0.05],
+            "hr_p50": percentiles[0.5],
+            "hr_p95": percentiles[0.95],
+            "hr_mean": by_day.mean(),
+            "hr_max": by_day.max(),
+            "sample_count": by_day.size(),
+        }
+    )
+
+    context = (
+        df.reindex(
+            columns=[
+                "sleep_deep_minutes",
+                "sleep_light_minutes",
+                "sleep_rem_minutes",
+                "sleep_awakenings",
+                "hrv_rmssd",
+            ],
+            fill_value=0,
+        )
+        .groupby(days)
+        .mean()
+    )
+    summary["sleep_minutes"] = context[
+        ["sleep_deep_minutes", "sleep_light_minutes", "sleep_rem_minutes"]
+    ].sum(axis=1)
+    for col in ["sleep_deep_minutes", "sleep_rem_minutes", "sleep_awakenings"]:
+        summary[col] = context[col]
+    summary["hrv_rmssd"] = context["hrv_rmssd"]
+
+    if daily_steps is None:
+        daily_steps = load_daily_steps(base_path, list(summary.index))
+    summary["total_steps"] = pd.Series(daily_steps, dtype="int64")
+
+    if "resting_heart_rate" in df.columns:
+        summary["resting_hr"] = df["resting_heart_rate"].groupby(days).mean()
+    else:
+        export_root = os.path.dirname(os.path.normpath(base_path))
+        resting = load_source(
+            "resting_heart_rate", export_root, summary.index[0], summary.index[-1]
+        )
+        if resting is not None:
+            resting_days = resting["timestamp"].dt.date.astype(str)
+            summary["resting_hr"] = (
+                resting["resting_heart_rate"].groupby(resting_days.to_numpy()).mean()
+            )
+
+    return summary.reindex(columns=list(DATA_COLUMNS))
+
+
+def summarize_anomalies(df: pd.DataFrame, scored_by: str) -> pd.DataFrame:
+    """
+    Computes the ANOMALY_COLUMNS facts of every day of a scored frame
+    (with 'anomaly' and 'anomaly_score' columns), indexed by ISO date.
+    """
+    days = day_labels(df.index)
+    flagged = df["anomaly"].to_numpy() == -1
+    summary = pd.DataFrame(
+        {
+            "anomaly_count": pd.Series(flagged, index=days).groupby(level=0).sum(),
+            "top_score": df["anomaly_score"].groupby(days).max(),
+        }
+    )
+    summary["scored_by"] = scored_by
+    return summary
+
+
+def upsert(participant_id: str, daily: pd.DataFrame, db_path: str = None):
+    """
+    Inserts or updates one row per day of daily (indexed by ISO date).
+
+    Only the columns present in daily are written, so data facts and
+    anomaly facts can be refreshed independently.
+    """
+    columns = [c for c in daily.columns if c in DATA_COLUMNS or c in ANOMALY_COLUMNS]
+    values = daily[columns].astype(object).where(daily[columns].notna(), None)
+    now = time.time()
+    rows = [
+        (participant_id, date, *row, now)
+        for date, row in zip(daily.index, values.itertuples(index=False))
+    ]
+
+    names = ", ".join(["participant_id", "date", *columns, "updated_at"])
+    placeholders = ", ".join("?" * (len(columns) + 3))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in [*columns, "updated_at"])
+    with connect(db_path) as connection:
+        connection.executemany(
+            f"INSERT INTO daily_summary ({names}) VALUES ({placeholders}) "
+            f"ON CONFLICT (participant_id, date) DO UPDATE SET {updates}",
+            rows,
+        )
+    connection.close()
+
+
+def update_from_scored(
+    participant_id: str,
+    df: pd.DataFrame,
+    scored_by: str,
+    base_path: str = None,
+    db_path: str = None,
+    daily_steps: dict = None,
+) -> bool:
+    """
+    Refreshes the data and anomaly facts of every day in a scored,
+    raw-resolution frame. Pass the daily_steps of the loaded frame (see
+    summarize_days) to avoid re-reading the steps files. Failures are
+    reported but never raised, so the index can't break an analysis.
+    """
+    try:
+        daily = summarize_days(df, base_path, daily_steps).join(
+            summarize_anomalies(df, scored_by)
+        )
+        upsert(participant_id, daily, db_path)
+        print(f"Updated the daily summary of '{participant_id}' for {len(daily)} days.")
+        return True
+    except Exception as e:
+        print(f"[WARNING] Could not update the daily summary: {e}")
+        return False
+
+
+def query_overview(
+    participant_id: str, start_date: str, end_date: str, db_path: str = None
+) -> list:
+    """Returns the stored facts of a participant's days in [start, end]."""
+    connection = connect(db_path)
+    try:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(
+            "SELECT * FROM daily_summary "
+            "WHERE participant_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (participant_id, start_date, end_date),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    overview = []
+    for row in rows:
+        day = dict(row)
+        day.pop("participant_id")
+        day.pop("updated_at")
+        overview.append(day)
+    return overview
@@ -0,0 +1,297 @@
+# data_coverage.py
+#
+# Per-day, per-stream coverage index of an export. It records how much of
+# every day each stream actually covers, so the loader can skip or
+# down-weight days with little wear time without opening their files. The
+# index is built once per export and afterwards only re-reads files whose
+# modification time or size changed; checking for those needs only
+# directory listings and file metadata.
+
+import argparse
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import archive_reader
+import config
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+MINUTES_PER_DAY = 1440
+
+# Indexed streams: file name pattern under the base path and the time one
+# file covers. The loader needs both streams for a complete day.
+STREAMS = {
+    "heart_rate": {"pattern": "heart_rate_*.csv", "file_span": "day"},
+    "steps": {"pattern": "steps_*.csv", "file_span": "month"},
+}
+COLUMNS = [
+    "date",
+    "stream",
+    "sample_count",
+    "wear_fraction",
+    "first_timestamp",
+    "last_timestamp",
+    "gap_count",
+    "max_gap_seconds",
+    "source_file",
+    "source_mtime",
+    "source_size",
+]
+
+_DATE_IN_NAME = re.compile(r"_(\d{4}-\d{2}-\d{2})\.csv$")
+
+# Stored indexes kept in memory, keyed by index path: (mtime, index).
+# Entries are reloaded whenever the file on disk is replaced.
+_index_cache = {}
+
+
+def index_path(base_path: str) -> str:
+    """Location of the coverage index of the export at base_path."""
+    key = os.path.abspath(os.path.normpath(base_path))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(config.COVERAGE_INDEX_DIR, f"coverage_{digest}.parquet")
+
+
+def day_stats(times_ns: np.ndarray) -> dict:
+    """
+    Coverage facts of one day's sorted int64 UTC timestamps: the wear
+    fraction is the share of the day's minutes with at least one sample.
+    """
+    gaps = np.diff(times_ns)
+    return {
+        "sample_count": len(times_ns),
+        "wear_fraction": len(np.unique(times_ns // NS_PER_MINUTE)) / MINUTES_PER_DAY,
+        "first_timestamp": pd.Timestamp(times_ns[0], tz="UTC"),
+        "last_timestamp": pd.Timestamp(times_ns[-1], tz="UTC"),
+        "gap_count": int((gaps > config.COVERAGE_GAP_SECONDS * NS_PER_SECOND).sum()),
+        "max_gap_seconds": float(gaps.max() / NS_PER_SECOND) if len(gaps) else 0.0,
+    }
+
+
+def summarize_file(path: str, stream: str) -> list:
+    """
+    Parses only the timestamps of a stream file and returns one coverage
+    row per day. A daily file is one day, named by its date; a monthly file
+    is split by the UTC date of its timestamps.
+    """
+    timestamps = pd.to_datetime(
+        archive_reader.read_csv(path, usecols=["timestamp"])["timestamp"],
+        utc=True,
+        format="ISO8601",
+    )
+    times_ns = np.sort(timestamps.dropna().astype("int64").to_numpy())
+    if not len(times_ns):
+        return []
+
+    if STREAMS[stream]["file_span"] == "day":
+        file_date = _DATE_IN_NAME.search(os.path.basename(path)).group(1)
+        return [{"date": file_date, "stream": stream, **day_stats(times_ns)}]
+
+    day_numbers = times_ns // NS_PER_DAY
+    starts = np.flatnonzero(np.diff(day_numbers)) + 1
+    return [
+        {
+            "date": pd.Timestamp(day[0], tz="UTC").strftime("%Y-%m-%d"),
+            "stream": stream,
+            **day_stats(day),
+        }
+        for day in np.split(times_ns, starts)
+    ]
+
+
+def build_coverage_index(base_path: str) -> pd.DataFrame:
+    """
+    Builds or refreshes the coverage index of the export at base_path and
+    returns it. Only files that are new or whose modification time or size
+    changed are parsed; rows of deleted files are dropped.
+    """
+    path = index_path(base_path)
+    index = _stored_index(path)
+
+    known = {
+        source: (mtime, size)
+        for source, mtime, size in index[["source_file", "source_mtime", "source_size"]]
+        .drop_duplicates()
+        .itertuples(index=False)
+    }
+    current = {}
+    for stream, spec in STREAMS.items():
+        for file_path in archive_reader.glob(os.path.join(base_path, spec["pattern"])):
+            name = os.path.basename(file_path)
+            if _DATE_IN_NAME.search(name):
+                current[name] = (stream, file_path, *archive_reader.stat(file_path))
+
+    changed = [
+        name
+        for name, (_, _, mtime, size) in current.items()
+        if known.get(name) != (mtime, size)
+    ]
+    removed = set(known) - set(current)
+    if not changed and not removed:
+        return index
+
+    print(f"Updating the coverage index for {len(changed)} changed files...")
+    rows = []
+    for name in changed:
+        stream, file_path, mtime, size = current[name]
+        for row in summarize_file(file_path, stream):
+            rows.append(
+                {**row, "source_file": name, "source_mtime": mtime, "source_size": size}
+            )
+
+    kept = index[~index["source_file"].isin(set(changed) | removed)]
+    new_rows = pd.DataFrame(rows, columns=COLUMNS)
+    index = pd.concat([df for df in (kept, new_rows) if not df.empty])
+    if index.empty:
+        index = pd.DataFrame(columns=COLUMNS)
+    index = index.sort_values(["date", "stream"]).reset_index(drop=True)
+
+    # Readers of the index never see a partly written file
+    os.makedirs(config.COVERAGE_INDEX_DIR, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    index.to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+    _index_cache[path] = (os.path.getmtime(path), index)
+    return index
+
+
+def _stored_index(path: str) -> pd.DataFrame:
+    """
+    The index stored at path, or an empty one. It is read from disk once
+    per version of the file, so callers must not modify it.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    modified_time = os.path.getmtime(path)
+    cached = _index_cache.get(path)
+    if cached is None or cached[0] != modified_time:
+        cached = (modified_time, pd.read_parquet(path))
+        _index_cache[path] = cached
+    return cached[1]
+
+
+def load_coverage_index(base_path: str) -> pd.DataFrame:
+    """
+    Returns the stored coverage index of the export at base_path without
+    looking at the export's files; it is only built if it doesn't exist
+    yet. Callers must not modify it.
+    """
+    path = index_path(base_path)
+    if not os.path.exists(path):
+        return build_coverage_index(base_path)
+    return _stored_index(path)
+
+
+def day_coverage(index: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    One row per day in [start_date, end_date] with data, indexed by ISO
+    date, with the heart rate facts and the steps wear fraction. A stream
+    split across files (e.g. a day spanning two steps files) is summed.
+    """
+    in_range = index[(index["date"] >= start_date) & (index["date"] <= end_date)]
+    heart_rate = (
+        in_range[in_range["stream"] == "heart_rate"]
+        .groupby("date")
+        .agg(
+            sample_count=("sample_count", "sum"),
+            wear_fraction=("wear_fraction", "sum"),
+            first_timestamp=("first_timestamp", "min"),
+            last_timestamp=("last_timestamp", "max"),
+            gap_count=("gap_count", "sum"),
+            max_gap_seconds=("max_gap_seconds", "max"),
+        )
+    )
+    steps = in_range[in_range["stream"] == "steps"].groupby("date")["wear_fraction"]
+    days = heart_rate.join(steps.sum().rename("steps_wear_fraction"), how="outer")
+    days["wear_fraction"] = days["wear_fraction"].fillna(0.0).clip(upper=1.0)
+    days["steps_wear_fraction"] = (
+        days["steps_wear_fraction"].fillna(0.0).clip(upper=1.0)
+    )
+    days["sample_count"] = days["sample_count"].fillna(0).astype(int)
+    return days
+
+
+def coverage_weights(days: pd.DataFrame) -> pd.Series:
+    """
+    Model weight of every day: its heart rate wear fraction, reduced by
+    config.COVERAGE_MISSING_STEPS_WEIGHT when the day has no step data
+    (its steps are then imputed as zero).
+    """
+    weights = days["wear_fraction"].copy()
+    weights[days["steps_wear_fraction"] == 0] *= config.COVERAGE_MISSING_STEPS_WEIGHT
+    return weights
+
+
+def coverage_report(
+    base_path: str,
+    start_date: str,
+    end_date: str,
+    min_wear_fraction: float = None,
+    refresh: bool = True,
+) -> list:
+    """
+    JSON-ready coverage of every day in the range with data, marking the
+    days a load with min_wear_fraction would skip. Without refresh, the
+    stored index is reported as is, e.g. right after a load refreshed it.
+    """
+    if refresh:
+        index = build_coverage_index(base_path)
+    else:
+        index = load_coverage_index(base_path)
+    days = day_coverage(index, start_date, end_date)
+    min_wear_fraction = min_wear_fraction or 0.0
+    report = []
+    for date, day in days.iterrows():
+        report.append(
+            {
+                "date": date,
+                "heart_rate_samples": int(day["sample_count"]),
+                "wear_fraction": round(float(day["wear_fraction"]), 4),
+                "steps_wear_fraction": round(float(day["steps_wear_fraction"]), 4),
+                "first_timestamp": (
+                    day["first_timestamp"].isoformat()
+                    if pd.notna(day["first_timestamp"])
+                    else None
+                ),
+                "last_timestamp": (
+                    day["last_timestamp"].isoformat()
+                    if pd.notna(day["last_timestamp"])
+                    else None
+                ),
+                "gap_count": int(day["gap_count"]) if pd.notna(day["gap_count"]) else 0,
+                "max_gap_seconds": (
+                    float(day["max_gap_seconds"])
+                    if pd.notna(day["max_gap_seconds"])
+                    else None
+                ),
+                "skipped": bool(day["wear_fraction"] < min_wear_fraction),
+            }
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the coverage index of an export and print a range."
+    )
+    parser.add_argument("start_date", help="First day to report (YYYY-MM-DD).")
+    parser.add_argument("end_date", help="Last day to report (YYYY-MM-DD).")
+    parser.add_argument(
+        "--base-path",
+        default=config.BASE_PATH,
+        help="Directory (or zip path) of the export (default: config.BASE_PATH).",
+    )
+    args = parser.parse_args()
+
+    index = build_coverage_index(args.base_path)
+    days = day_coverage(index, args.start_date, args.end_date)
+    print(days.drop(columns=["first_timestamp", "last_timestamp"]).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
 # data_loader.py
 
+import numpy as np
 import pandas as pd
 import os
 import sys
 from datetime import timedelta
+import config
+from archive_reader import exists, read_csv, read_csvs
+from data_coverage import build_coverage_index, coverage_weights, day_coverage
+from parsed_cache import read_entry, source_signature, write_entry
+from data_sources import DATA_SOURCES, attach_sources, required_sources, source_features
+
+NS_PER_SECOND = 1_000_000_000
+# attrs key of the per-day sums of the raw step readings of a loaded frame,
+# a plain {ISO date: steps} dict so pandas can compare and serialize attrs
+DAILY_STEPS_ATTR = "daily_steps"
 
 
 def load_questionnaire_data(questionnaire_path: str) -> dict:
     """Loads participant questionnaire data."""
     try:
-        q_df = pd.read_csv(questionnaire_path)
+        q_df = read_csv(questionnaire_path)
         participant_data = q_df.iloc[0].to_dict()
         print(f"Loaded questionnaire data: {participant_data}")
         return participant_data
@@ -24,7 +35,7 @@ def load_questionnaire_data(questionnaire_path: str) -> dict:
 def load_and_summarize_sleep(sleep_file_path: str, target_date: pd.Timestamp) -> dict:
     """Loads and summarizes sleep data for the night prior to the target date."""
     try:
-        sleep_df = pd.read_csv(sleep_file_path)
+        sleep_df = read_csv(sleep_file_path)
         sleep_df["startTime"] = pd.to_datetime(sleep_df["startTime"])
         sleep_df["endTime"] = pd.to_datetime(sleep_df["endTime"])
         night_sleep = sleep_df[sleep_df["endTime"].dt.date == target_date.date()]
@@ -55,7 +66,7 @@ def load_and_summarize_sleep(sleep_file_path: str, target_date: pd.Timestamp) ->
 def load_daily_hrv(hrv_file_path: str) -> pd.DataFrame:
     """Loads and prepares the daily HRV data."""
     try:
-        hrv_df = pd.read_csv(hrv_file_path)
+        hrv_df = read_csv(hrv_file_path)
         hrv_df["timestamp"] = pd.to_datetime(hrv_df["timestamp"])
         hrv_df["date"] = hrv_df["timestamp"].dt.date
         return hrv_df[["date", "rmssd", "coverage"]].rename(
@@ -65,6 +76,181 @@ def load_daily_hrv(hrv_file_path: str) -> pd.DataFrame:
         return None
 
 
+def bucket_ids(index: pd.DatetimeIndex, bucket_seconds: int) -> np.ndarray:
+    """Returns the int64 bucket number of each timestamp (UTC for tz-aware)."""
+    return index.asi8 // (bucket_seconds * NS_PER_SECOND)
+
+
+def resample_data(
+    df: pd.DataFrame, bucket_seconds: int, steps: pd.Series = None
+) -> pd.DataFrame:
+    """
+    Aggregates time-sorted samples into fixed buckets of bucket_seconds.
+
+    Heart rate becomes the bucket mean, plus 'heart_rate_min', '_max' and
+    '_std' columns. Steps are summed: from the raw step readings if given
+    (a Series indexed by timestamp), otherwise once per distinct minute of
+    the forward-filled 'steps' column. Other numeric columns are averaged
+    and the rest keep their first value. Buckets without heart rate are
+    dropped and each bucket is labeled by its start time.
+    """
+    buckets = bucket_ids(df.index, bucket_seconds)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(buckets)])
+    labels = buckets[starts]
+
+    heart_rate = df["heart_rate"].to_numpy(dtype=np.float64)
+    hr_sum = np.add.reduceat(heart_rate, starts)
+    hr_sum_sq = np.add.reduceat(heart_rate * heart_rate, starts)
+    hr_mean = hr_sum / counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hr_var = (hr_sum_sq - hr_sum * hr_mean) / (counts - 1)
+    hr_std = np.where(counts > 1, np.sqrt(np.clip(hr_var, 0, None)), 0.0)
+
+    if steps is not None:
+        step_buckets = bucket_ids(steps.index, bucket_seconds)
+        position = np.searchsorted(labels, step_buckets)
+        in_range = position < len(labels)
+        matched = in_range.copy()
+        matched[in_range] = labels[position[in_range]] == step_buckets[in_range]
+        step_sum = np.bincount(
+            position[matched],
+            weights=steps.to_numpy(dtype=np.float64)[matched],
+            minlength=len(labels),
+        )
+    else:
+        minutes = df.index.asi8 // (60 * NS_PER_SECOND)
+        first_in_minute = np.r_[True, minutes[1:] != minutes[:-1]]
+        step_values = df["steps"].to_numpy(dtype=np.float64)
+        step_sum = np.add.reduceat(np.where(first_in_minute, step_values, 0), starts)
+
+    bucket_index = pd.DatetimeIndex(
+        (labels * bucket_seconds * NS_PER_SECOND).astype("datetime64[ns]"),
+        name=df.index.name,
+    )
+    if df.index.tz is not None:
+        bucket_index = bucket_index.tz_localize("UTC").tz_convert(df.index.tz)
+
+    resampled = pd.DataFrame(
+        {
+            "heart_rate": hr_mean,
+            "heart_rate_min": np.minimum.reduceat(heart_rate, starts),
+            "heart_rate_max": np.maximum.reduceat(heart_rate, starts),
+            "heart_rate_std": hr_std,
+            "steps": step_sum.astype(np.int64),
+        },
+        index=bucket_index,
+    )
+
+    others = [c for c in df.columns if c not in ("heart_rate", "steps")]
+    numeric = [c for c in others if pd.api.types.is_numeric_dtype(df[c])]
+    if numeric:
+        values = df[numeric].to_numpy(dtype=np.float64)
+        means = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+        for i, col in enumerate(numeric):
+            resampled[col] = means[:, i]
+    for col in others:
+        if col not in numeric:
+            resampled[col] = df[col].to_numpy()[starts]
+
+    return resampled
+
+
+def heart_rate_file_for(base_path: str, date: pd.Timestamp) -> str:
+    """Path of the daily heart rate file of date."""
+    return os.path.join(base_path, f"heart_rate_{date.strftime('%Y-%m-%d')}.csv")
+
+
+def steps_file_for(base_path: str, date: pd.Timestamp) -> str:
+    """Path of the monthly steps file covering date."""
+    return os.path.join(base_path, f"steps_{date.strftime('%Y-%m-01')}.csv")
+
+
+def parse_heart_rate(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """A heart rate file's frame indexed by timestamp, with a 'heart_rate' column."""
+    hr_df = raw_df.rename(columns={"beats per minute": "heart_rate"})
+    hr_df["timestamp"] = pd.to_datetime(hr_df["timestamp"])
+    return hr_df.set_index("timestamp")
+
+
+def parse_steps(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """A monthly steps file's frame with parsed timestamps."""
+    raw_df["timestamp"] = pd.to_datetime(raw_df["timestamp"])
+    return raw_df
+
+
+def day_steps(monthly_steps_df: pd.DataFrame, date: pd.Timestamp) -> pd.DataFrame:
+    """One day's rows of a parsed steps file, indexed by timestamp."""
+    steps_df = monthly_steps_df[monthly_steps_df["timestamp"].dt.date == date.date()]
+    steps_df = steps_df.set_index("timestamp")
+    return steps_df.rename(columns={"value": "steps"})
+
+
+def iter_heart_rate_files(base_path: str, date_range: pd.DatetimeIndex):
+    """
+    Yields (date, heart rate frame from parse_heart_rate) for every day that
+    has a heart rate file. Days with a fresh parsed cache entry are read
+    from it; the other files are independent, so they are read in parallel
+    batches of config.ARCHIVE_READ_WORKERS days, which also bounds the
+    number of raw frames held at once.
+    """
+    dates = [
+        date for date in date_range if exists(heart_rate_file_for(base_path, date))
+    ]
+    batch_size = config.ARCHIVE_READ_WORKERS
+    for batch_start in range(0, len(dates), batch_size):
+        batch = dates[batch_start : batch_start + batch_size]
+        frames = {
+            date: read_entry(
+                base_path,
+                "heart_rate",
+                date.strftime("%Y-%m-%d"),
+                source_signature(heart_rate_file_for(base_path, date)),
+            )
+            for date in batch
+        }
+        uncached = [date for date in batch if frames[date] is None]
+        raw_frames = read_csvs(
+            [heart_rate_file_for(base_path, date) for date in uncached]
+        )
+        for date, raw_df in zip(uncached, raw_frames):
+            frames[date] = parse_heart_rate(raw_df)
+        yield from frames.items()
+
+
+def cache_parsed_files(base_path: str, changed_files: list) -> int:
+    """
+    Parses the heart rate and steps files among changed_files once and
+    stores them per day in the parsed cache (see parsed_cache.py), so later
+    loads of those days skip the CSV parser. A monthly steps file gets an
+    entry for every day of its month. Returns the number of entries written.
+    """
+    written = 0
+    for path in changed_files:
+        name = os.path.basename(path)
+        signature = source_signature(path)
+        if signature is None:
+            continue
+        if name.startswith("heart_rate_"):
+            date = name[len("heart_rate_") : -len(".csv")]
+            frame = parse_heart_rate(read_csv(path))
+            write_entry(base_path, "heart_rate", date, frame, signature)
+            written += 1
+        elif name.startswith("steps_"):
+            month = pd.Timestamp(name[len("steps_") : -len(".csv")])
+            monthly_steps_df = parse_steps(read_csv(path))
+            for date in pd.date_range(month, month + pd.offsets.MonthEnd(0)):
+                write_entry(
+                    base_path,
+                    "steps",
+                    date.strftime("%Y-%m-%d"),
+                    day_steps(monthly_steps_df, date),
+                    signature,
+                )
+                written += 1
+    return written
+
+
 def load_data_range(
     base_path: str,
     sleep_path: str,
@@ -72,15 +258,64 @@ def load_data_range(
     questionnaire_path: str,
     start_date_str: str,
     end_date_str: str,
+    features: list = None,
+    export_root: str = None,
+    resolution: str = "raw",
+    min_wear_fraction: float = None,
 ) -> pd.DataFrame:
     """
     Loads, merges, and cleans all data sources for a given date range.
+
+    Additional streams registered in data_sources.py are loaded only when
+    one of their columns is listed in features. Their files are looked up
+    under export_root, which defaults to the parent directory of base_path.
+
+    resolution is one of config.RESOLUTIONS. Anything but 'raw' returns one
+    row per time bucket instead of one per heart rate sample (see
+    resample_data).
+
+    Heart rate and steps of days in the parsed cache (see parsed_cache.py)
+    are read from it while their source files are unchanged.
+
+    The frame's attrs[DAILY_STEPS_ATTR] holds the sum of the raw step
+    readings of every loaded day with a steps file, by ISO date; the
+    'steps' column is forward-filled and can't be summed.
+
+    With min_wear_fraction, the coverage index (see data_coverage.py) is
+    brought up to date with new or changed files and used to skip days
+    whose heart rate covers less than that share of the day's minutes,
+    without opening their files. The remaining rows get a
+    'coverage_weight' column for the model (see coverage_weights).
     """
+    if resolution not in config.RESOLUTIONS:
+        raise ValueError(
+            f"Unknown resolution '{resolution}'. "
+            f"Expected one of {list(config.RESOLUTIONS)}."
+        )
+    bucket_seconds = config.RESOLUTIONS[resolution]
+
     print(f"Loading data from {start_date_str} to {end_date_str}...")
 
     all_dfs = []
+    all_steps = []
+    monthly_steps = {}
+    steps_signatures = {}
+    daily_steps = {}
     date_range = pd.to_datetime(pd.date_range(start=start_date_str, end=end_date_str))
 
+    day_weights = None
+    if min_wear_fraction is not None:
+        coverage_days = day_coverage(
+            build_coverage_index(base_path), start_date_str, end_date_str
+        )
+        usable = coverage_days["wear_fraction"] >= min_wear_fraction
+        day_weights = coverage_weights(coverage_days[usable])
+        date_range = date_range[date_range.strftime("%Y-%m-%d").isin(day_weights.index)]
+        print(
+            f"Skipping {int((~usable).sum())} days with less than "
+            f"{min_wear_fraction:.0%} heart rate wear time."
+        )
+
     questionnaire_data = load_questionnaire_data(questionnaire_path)
     daily_hrv_data = load_daily_hrv(hrv_path)
     all_sleep_summaries = {}
@@ -89,30 +324,37 @@ def load_data_range(
         if sleep_summary:
             all_sleep_summaries[date.date()] = sleep_summary
 
-    for date in date_range:
-        current_date_str = date.strftime("%Y-%m-%d")
-
-        hr_file = os.path.join(base_path, f"heart_rate_{current_date_str}.csv")
-        if not os.path.exists(hr_file):
-            continue
-
-        hr_df = pd.read_csv(hr_file)
-        hr_df.rename(columns={"beats per minute": "heart_rate"}, inplace=True)
-        hr_df["timestamp"] = pd.to_datetime(hr_df["timestamp"])
-        hr_df.set_index("timestamp", inplace=True)
-
-        steps_month_str = date.strftime("%Y-%m-01")
-        steps_file = os.path.join(base_path, f"steps_{steps_month_str}.csv")
-        if not os.path.exists(steps_file):
-            continue
-
-        monthly_steps_df = pd.read_csv(steps_file)
-        monthly_steps_df["timestamp"] = pd.to_datetime(monthly_steps_df["timestamp"])
-        steps_df = monthly_steps_df[
-            monthly_steps_df["timestamp"].dt.date == date.date()
-        ].copy()
-        steps_df.set_index("timestamp", inplace=True)
-        steps_df.rename(columns={"value": "steps"}, inplace=True)
+    for date, hr_df in iter_heart_rate_files(base_path, date_range):
+        steps_file = steps_file_for(base_path, date)
+        if steps_file not in steps_signatures:
+            steps_signatures[steps_file] = source_signature(steps_file)
+        steps_df = read_entry(
+            base_path,
+            "steps",
+            date.strftime("%Y-%m-%d"),
+            steps_signatures[steps_file],
+        )
+        if steps_df is None:
+            # Each monthly steps file is parsed once per call, not once per day
+            if steps_file not in monthly_steps:
+                if steps_signatures[steps_file] is not None:
+                    monthly_steps_df = parse_steps(read_csv(steps_file))
+                else:
+                    # The month's heart rate is still used, with steps imputed as 0
+                    print(f"Steps file {steps_file} not found. Using 0 steps.")
+                    monthly_steps_df = None
+                monthly_steps[steps_file] = monthly_steps_df
+            monthly_steps_df = monthly_steps[steps_file]
+            if monthly_steps_df is None:
+                steps_df = pd.DataFrame(
+                    {"steps": pd.Series(dtype=float)}, index=hr_df.index[:0]
+                )
+            else:
+                steps_df = day_steps(monthly_steps_df, date)
+        if steps_signatures[steps_file] is not None:
+            daily_steps[date.strftime("%Y-%m-%d")] = int(steps_df["steps"].sum())
+        if bucket_seconds:
+            all_steps.append(steps_df["steps"])
 
         daily_df = hr_df.join(steps_df, how="outer")
         daily_df.dropna(subset=["heart_rate"], inplace=True)
@@ -133,6 +375,9 @@ def load_data_range(
             for key, value in questionnaire_data.items():
                 daily_df[key] = value
 
+        if day_weights is not None:
+            daily_df["coverage_weight"] = day_weights[date.strftime("%Y-%m-%d")]
+
         all_dfs.append(daily_df)
 
     if not all_dfs:
@@ -140,6 +385,12 @@ def load_data_range(
 
     full_df = pd.concat(all_dfs).sort_index()
 
+    if features:
+        export_root = export_root or os.path.dirname(os.path.normpath(base_path))
+        full_df = attach_sources(
+            full_df, export_root, features, start_date_str, end_date_str
+        )
+
     expected_cols = {
         "sleep_deep_minutes": 0,
         "sleep_light_minutes": 0,
@@ -151,11 +402,14 @@ def load_data_range(
         "caffeine_user": "N/A",
         "reports_high_stress": "N/A",
     }
+    for name in required_sources(features):
+        for feature in source_features(DATA_SOURCES[name]):
+            expected_cols[feature] = 0
     for col, default in expected_cols.items():
         if col not in full_df.columns:
             full_df[col] = default
         else:
-            full_df[col].fillna(default, inplace=True)
+            full_df[col] = full_df[col].fillna(default)
 
     # --- ENCODING LOGIC ---
     print("Encoding questionnaire data for the model...")
@@ -172,5 +426,11 @@ def load_data_range(
     full_df["heart_rate"] = full_df["heart_rate"].astype(int)
     full_df["steps"] = full_df["steps"].astype(int)
 
+    if bucket_seconds:
+        print(f"Resampling {len(full_df)} samples to '{resolution}' buckets...")
+        raw_steps = pd.concat(all_steps).sort_index().fillna(0)
+        full_df = resample_data(full_df, bucket_seconds, raw_steps)
+    full_df.attrs[DAILY_STEPS_ATTR] = daily_steps
+
     print("Data loading and processing for range complete.")
     return full_df
@@ -0,0 +1,251 @@
+# data_sources.py
+
+import os
+import re
+
+import pandas as pd
+
+import archive_reader
+
+# Registry of optional Fitbit export streams, keyed by source name.
+# Sources are only read when one of their feature columns is requested.
+DATA_SOURCES = {}
+
+# How much time a single file of a source covers
+FILE_SPANS = ("day", "month", "all")
+ALIGNMENTS = ("intraday", "daily")
+
+_DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def register_source(
+    name: str,
+    directory: str,
+    pattern: str,
+    timestamp_column: str,
+    columns: dict,
+    alignment: str,
+    file_span: str,
+    tolerance_seconds: int = 60,
+):
+    """
+    Registers a data stream of the Fitbit export.
+
+    Args:
+        name: Unique name of the source.
+        directory: Directory of the files, relative to the export root.
+        pattern: File name, with a '{date}' placeholder for dated files.
+        timestamp_column: Name of the timestamp column in the files.
+        columns: Maps each raw column to a (feature_name, dtype) tuple.
+        alignment: 'intraday' to match samples to the nearest earlier
+            reading, or 'daily' to broadcast one value per calendar day.
+        file_span: Time covered by each file ('day', 'month' or 'all').
+        tolerance_seconds: Maximum age of an intraday reading that may be
+            matched to a heart rate sample.
+    """
+    if alignment not in ALIGNMENTS:
+        raise ValueError(f"Unknown alignment '{alignment}' for source '{name}'.")
+    if file_span not in FILE_SPANS:
+        raise ValueError(f"Unknown file span '{file_span}' for source '{name}'.")
+
+    DATA_SOURCES[name] = {
+        "directory": directory,
+        "pattern": pattern,
+        "timestamp_column": timestamp_column,
+        "columns": columns,
+        "alignment": alignment,
+        "file_span": file_span,
+        "tolerance_seconds": tolerance_seconds,
+    }
+
+
+def source_features(source: dict) -> list:
+    """Returns the feature column names provided by a source."""
+    return [feature for feature, _ in source["columns"].values()]
+
+
+def required_sources(features: list) -> list:
+    """Returns the names of the sources that provide any of the features."""
+    if not features:
+        return []
+    return [
+        name
+        for name, source in DATA_SOURCES.items()
+        if set(source_features(source)) & set(features)
+    ]
+
+
+def _files_for_range(
+    source: dict, export_root: str, start: pd.Timestamp, end: pd.Timestamp
+) -> list:
+    """Lists the files of a source that may contain data for [start, end)."""
+    directory = os.path.join(export_root, source["directory"])
+
+    if "{date}" not in source["pattern"]:
+        path = os.path.join(directory, source["pattern"])
+        return [path] if archive_reader.exists(path) else []
+
+    selected = []
+    for path in archive_reader.glob(
+        os.path.join(directory, source["pattern"].format(date="*"))
+    ):
+        match = _DATE_IN_NAME.search(os.path.basename(path))
+        if not match:
+            continue
+        file_start = pd.Timestamp(match.group(1))
+        if source["file_span"] == "day":
+            file_end = file_start + pd.Timedelta(days=1)
+        elif source["file_span"] == "month":
+            file_end = file_start + pd.offsets.MonthBegin(1)
+        else:
+            file_end = pd.Timestamp.max
+        if file_start < end and file_end > start:
+            selected.append(path)
+
+    return sorted(selected)
+
+
+def _match_timezone(timestamps: pd.Series, index: pd.DatetimeIndex) -> pd.Series:
+    """Converts timestamps to the timezone (or lack of one) of the index."""
+    if index.tz is None and timestamps.dt.tz is not None:
+        return timestamps.dt.tz_convert(None)
+    if index.tz is not None and timestamps.dt.tz is None:
+        return timestamps.dt.tz_localize(index.tz)
+    return timestamps
+
+
+def load_source(
+    name: str, export_root: str, start_date: str, end_date: str
+) -> pd.DataFrame:
+    """
+    Reads the files of a source that overlap the date range, parsing only
+    the declared columns with their fixed dtypes.
+
+    Returns a DataFrame with a 'timestamp' column and one column per
+    feature, or None if no files were found.
+    """
+    source = DATA_SOURCES[name]
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+    files = _files_for_range(source, export_root, start, end)
+    if not files:
+        print(f"No files found for data source '{name}'. Skipping.")
+        return None
+
+    timestamp_column = source["timestamp_column"]
+    dtypes = {raw: dtype for raw, (_, dtype) in source["columns"].items()}
+    renames = {raw: feature for raw, (feature, _) in source["columns"].items()}
+    renames[timestamp_column] = "timestamp"
+
+    frames = archive_reader.read_csvs(
+        files, usecols=[timestamp_column, *dtypes], dtype=dtypes
+    )
+    source_df = pd.concat(frames, ignore_index=True).rename(columns=renames)
+    source_df["timestamp"] = pd.to_datetime(source_df["timestamp"], format="ISO8601")
+
+    print(f"Loaded {len(source_df)} rows from {len(files)} '{name}' files.")
+    return source_df
+
+
+def attach_sources(
+    df: pd.DataFrame,
+    export_root: str,
+    features: list,
+    start_date: str,
+    end_date: str,
+) -> pd.DataFrame:
+    """
+    Loads the sources needed for the requested features and aligns them to
+    the heart rate index of df.
+
+    Intraday sources are matched to the most recent reading within the
+    source's tolerance using merge_asof; daily sources are broadcast to
+    every sample of their calendar day.
+    """
+    for name in required_sources(features):
+        source = DATA_SOURCES[name]
+        feature_columns = source_features(source)
+        source_df = load_source(name, export_root, start_date, end_date)
+        if source_df is None:
+            continue
+
+        source_df["timestamp"] = _match_timezone(source_df["timestamp"], df.index)
+
+        if source["alignment"] == "intraday":
+            source_df = source_df.sort_values("timestamp")
+            aligned = pd.merge_asof(
+                pd.DataFrame(index=df.index),
+                source_df,
+                left_index=True,
+                right_on="timestamp",
+                direction="backward",
+                tolerance=pd.Timedelta(seconds=source["tolerance_seconds"]),
+            )
+            for feature in feature_columns:
+                df[feature] = aligned[feature].to_numpy()
+        else:
+            daily = source_df.groupby(source_df["timestamp"].dt.date)[
+                feature_columns
+            ].mean()
+            day_keys = pd.Series(df.index.date, index=df.index)
+            for feature in feature_columns:
+                df[feature] = day_keys.map(daily[feature])
+
+    return df
+
+
+# --- Built-in sources of the Fitbit export ---
+register_source(
+    "spo2",
+    directory="Oxygen Saturation (SpO2)",
+    pattern="Minute SpO2 - {date}.csv",
+    timestamp_column="timestamp",
+    columns={"value": ("spo2", "float32")},
+    alignment="intraday",
+    file_span="day",
+    tolerance_seconds=120,
+)
+register_source(
+    "device_temperature",
+    directory="Temperature",
+    pattern="Device Temperature - {date}.csv",
+    timestamp_column="recorded_time",
+    columns={"temperature": ("device_temperature", "float32")},
+    alignment="intraday",
+    file_span="day",
+    tolerance_seconds=120,
+)
+register_source(
+    "calories",
+    directory="Physical Activity_GoogleData",
+    pattern="calories_{date}.csv",
+    timestamp_column="timestamp",
+    columns={"calories": ("calories", "float32")},
+    alignment="intraday",
+    file_span="month",
+    tolerance_seconds=60,
+)
+register_source(
+    "respiratory_rate",
+    directory="Physical Activity_GoogleData",
+    pattern="respiratory_rate_sleep_summary_{date}.csv",
+    timestamp_column="timestamp",
+    columns={
+        "full sleep stats - milli breaths per minute": (
+            "sleep_respiratory_rate",
+            "float32",
+        )
+    },
+    alignment="daily",
+    file_span="month",
+)
+register_source(
+    "resting_heart_rate",
+    directory="Physical Activity_GoogleData",
+    pattern="daily_resting_heart_rate.csv",
+    timestamp_column="timestamp",
+    columns={"beats per minute": ("resting_heart_rate", "float32")},
+    alignment="daily",
+    file_span="all",
+)
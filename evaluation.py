@@ -1,8 +1,12 @@
 # evaluation.py
 
-import pandas as pd
-import time
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
 import config
 from data_loader import load_data_range
 from feature_engineering import create_features
@@ -10,16 +14,159 @@ from sklearn.ensemble import IsolationForest
 
 # Import our new deterministic model
 from models import run_deterministic_model
+import streaming
+import baselines
+from anomaly_store import record_results
+
+# Registry of detectors run by the evaluation, keyed by name. Each entry
+# lists the features it needs and a function run(X, timestamps) returning
+# (anomaly_mask, scores) for the rows of X.
+DETECTORS = {}
+
+# Shared arrays attached in each worker process
+_worker_arrays = {}
+
 
+def register_detector(name: str, features: list, run):
+    """
+    Registers a detector for the evaluation.
 
-def run_evaluation(start_date: str, end_date: str):
+    Args:
+        name: Unique name of the detector.
+        features: Feature columns the detector needs, or None for every
+            numeric column of config.FEATURES present in the data.
+        run: Function taking X (a float32 array with one column per feature,
+            in feature matrix order) and the int64 timestamps of its rows,
+            and returning a boolean anomaly mask and a score per row (higher
+            is more anomalous).
     """
-    Runs a comprehensive evaluation of multiple anomaly detection models:
+    DETECTORS[name] = {"features": features, "run": run}
+
+
+def _run_deterministic(X: np.ndarray, timestamps: np.ndarray):
+    """Runs the rule-based model. It has no continuous score, so flags are used."""
+    df = pd.DataFrame({"heart_rate": X[:, 0]}, index=pd.DatetimeIndex(timestamps))
+    anomaly_mask = run_deterministic_model(df)["anomaly"].to_numpy() == -1
+    return anomaly_mask, anomaly_mask.astype(np.float32)
+
+
+def _run_isolation_forest(X: np.ndarray, timestamps: np.ndarray):
+    model = IsolationForest(
+        contamination=config.ISOLATION_FOREST_CONTAMINATION,
+        random_state=config.RANDOM_STATE,
+    )
+    predictions = model.fit_predict(X)
+    return predictions == -1, -model.score_samples(X)
+
+
+def _run_streaming(X: np.ndarray, timestamps: np.ndarray):
+    """Replays the rows through a fresh streaming detector in time order."""
+    order = np.argsort(timestamps, kind="stable")
+    anomalies = streaming.push(
+        streaming.new_state(), timestamps[order], X[order, 0], X[order, 1]
+    )
+    flagged = np.isin(timestamps, anomalies.index.asi8)
+    scores = pd.Series(anomalies["anomaly_score"].to_numpy(), anomalies.index.asi8)
+    return flagged, scores.reindex(timestamps).fillna(0).to_numpy(np.float32)
+
+
+def _resolve_features(df: pd.DataFrame, detectors: dict) -> dict:
+    """Maps each detector to the feature columns it uses on this data."""
+    all_features = [
+        f
+        for f in config.FEATURES
+        if f in df.columns and pd.api.types.is_numeric_dtype(df[f])
+    ]
+    return {
+        name: detector["features"] or all_features
+        for name, detector in detectors.items()
+    }
+
+
+def _build_feature_matrix(df: pd.DataFrame, detector_features: dict):
+    """
+    Builds a single contiguous float32 matrix of all features used by the
+    detectors, and the column indices of each detector in that matrix.
+
+    Features are ordered by first use so that detectors sharing leading
+    features (e.g. heart_rate, hour) read column slices as views. Each
+    detector's indices keep the order it declared its features in, since
+    detectors read their columns by position.
+    """
+    columns = []
+    for features in detector_features.values():
+        for feature in features:
+            if feature not in columns:
+                columns.append(feature)
+
+    matrix = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+    indices = {
+        name: [columns.index(f) for f in features]
+        for name, features in detector_features.items()
+    }
+    return matrix, indices
+
+
+def _create_shared_array(array: np.ndarray):
+    """Copies an array into a new shared memory block and returns both."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[:] = array
+    return block, shared
+
+
+def _attach_shared_arrays(specs: dict):
+    """Worker initializer: maps the shared matrix and timestamps without copying."""
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        _worker_arrays[key] = (
+            block,
+            np.ndarray(shape, dtype=dtype, buffer=block.buf),
+        )
+
+
+def _column_view(matrix: np.ndarray, indices: list) -> np.ndarray:
+    """Returns a zero-copy slice if the columns are contiguous, else a copy."""
+    if indices == list(range(indices[0], indices[0] + len(indices))):
+        return matrix[:, indices[0] : indices[0] + len(indices)]
+    return matrix[:, indices]
+
+
+def _run_detector(name: str, indices: list) -> dict:
+    """Runs one registered detector against the shared feature matrix."""
+    matrix = _worker_arrays["matrix"][1]
+    timestamps = _worker_arrays["timestamps"][1]
+
+    start_time = time.time()
+    anomaly_mask, scores = DETECTORS[name]["run"](
+        _column_view(matrix, indices), timestamps
+    )
+    flagged = np.flatnonzero(anomaly_mask)
+
+    return {
+        "name": name,
+        "rows": flagged,
+        "scores": np.asarray(scores, dtype=np.float32)[flagged],
+        "seconds": time.time() - start_time,
+    }
+
+
+def run_evaluation(
+    start_date: str, end_date: str, detectors: list = None, max_workers: int = None
+):
+    """
+    Runs a comprehensive evaluation of the registered anomaly detection
+    models (by default):
     1. Deterministic (Rule-Based)
     2. Simple Isolation Forest (ML)
     3. Complex Isolation Forest (ML with all features)
+    4. Streaming robust z-scores (streaming.py)
+    5. Subsampled LOF and Nystroem One-Class SVM (baselines.py)
 
-    The anomalies found by each model are saved to separate CSV files.
+    All models read one shared float32 feature matrix and run concurrently
+    in separate processes. The flagged rows and scores of every model are
+    saved to a single Parquet result set, with the participant and date
+    range of the run in its attrs.
     """
     print("--- Starting Full Model Evaluation ---")
 
@@ -32,77 +179,118 @@ def run_evaluation(start_date: str, end_date: str):
         config.QUESTIONNAIRE_PATH,
         start_date,
         end_date,
+        features=config.FEATURES,
     )
     df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
-    print("Data preparation complete.")
-    print("-" * 50)
 
-    # --- Model 1: Deterministic (Rule-Based) Model ---
-    print("Running: 1. Deterministic Model")
-    start_time = time.time()
+    selected = {name: DETECTORS[name] for name in (detectors or list(DETECTORS))}
+    detector_features = _resolve_features(df_featured, selected)
+    matrix, indices = _build_feature_matrix(df_featured, detector_features)
+    timestamps = (
+        (
+            df_featured.index.tz_convert(None)
+            if df_featured.index.tz is not None
+            else df_featured.index
+        )
+        .to_numpy(dtype="datetime64[ns]")
+        .view("int64")
+    )
+    print(f"Data preparation complete. Feature matrix: {matrix.shape}")
+    print("-" * 50)
 
-    deterministic_results_df = run_deterministic_model(df_featured.copy())
-    deterministic_anomalies = deterministic_results_df[
-        deterministic_results_df["anomaly"] == -1
-    ]
+    # 2. Share the matrix with the worker processes
+    matrix_block, _ = _create_shared_array(matrix)
+    timestamps_block, _ = _create_shared_array(timestamps)
+    specs = {
+        "matrix": (matrix_block.name, matrix.shape, matrix.dtype),
+        "timestamps": (timestamps_block.name, timestamps.shape, timestamps.dtype),
+    }
+    del matrix
 
-    end_time = time.time()
+    max_workers = max_workers or min(len(selected), os.cpu_count())
+    print(f"Running {len(selected)} models across {max_workers} processes...")
 
-    output_file_1 = "deterministic_anomalies.csv"
-    deterministic_anomalies.to_csv(output_file_1)
+    start_time = time.time()
+    results = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared_arrays,
+            initargs=(specs,),
+        ) as executor:
+            futures = [
+                executor.submit(_run_detector, name, indices[name]) for name in selected
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"Finished: {result['name']}")
+                print(f"  -> Found {len(result['rows'])} anomalies.")
+                print(f"  -> Time taken: {result['seconds']:.2f} seconds.")
+    finally:
+        for block in (matrix_block, timestamps_block):
+            block.close()
+            block.unlink()
 
-    print(f"  -> Found {len(deterministic_anomalies)} anomalies.")
-    print(f"  -> Results saved to '{output_file_1}'")
-    print(f"  -> Time taken: {end_time - start_time:.2f} seconds.")
+    total_time = time.time() - start_time
     print("-" * 50)
 
-    # --- Machine Learning Model Setups ---
-    ml_models_to_test = {
-        "Simple_Isolation_Forest": {
-            "features": ["heart_rate", "hour"],
-            "output_file": "simple_ml_model_anomalies.csv",
-        },
-        "Complex_Isolation_Forest": {
-            "features": [f for f in config.FEATURES if f in df_featured.columns],
-            "output_file": "complex_ml_model_anomalies.csv",
-        },
+    # 3. Save flagged rows and scores of every model in one compact file
+    result_set = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "model": result["name"],
+                    "row": result["rows"],
+                    "timestamp": pd.to_datetime(timestamps[result["rows"]], utc=True),
+                    "anomaly_score": result["scores"],
+                }
+            )
+            for result in results
+        ],
+        ignore_index=True,
+    )
+    result_set["model"] = result_set["model"].astype("category")
+    # Stored in the Parquet metadata, so comparisons only merge matching runs
+    result_set.attrs = {
+        "participant_id": config.DEFAULT_PARTICIPANT_ID,
+        "start_date": start_date,
+        "end_date": end_date,
     }
+    result_set.to_parquet(config.EVALUATION_RESULTS_PATH, index=False)
 
-    # --- Run ML Models ---
-    model_number = 2
-    for name, model_config in ml_models_to_test.items():
-        print(f"Running: {model_number}. {name}")
-
-        features = model_config["features"]
-        output_file = model_config["output_file"]
-
-        X = df_featured[features].select_dtypes(include="number")
-        print(f"  -> Using {len(features)} features. Data shape: {X.shape}")
-
-        model = IsolationForest(
-            contamination=config.ISOLATION_FOREST_CONTAMINATION,
-            random_state=config.RANDOM_STATE,
+    # 4. Keep every model's anomalies queryable in the result store
+    for result in results:
+        anomalies = df_featured.iloc[result["rows"]].copy()
+        anomalies["anomaly_score"] = result["scores"]
+        record_results(
+            config.DEFAULT_PARTICIPANT_ID,
+            "evaluation",
+            result["name"],
+            {
+                "features": detector_features[result["name"]],
+                "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+                "random_state": config.RANDOM_STATE,
+            },
+            anomalies,
+            start_date,
+            end_date,
         )
 
-        start_time = time.time()
-
-        predictions = model.fit_predict(X)
+    print(f"Full evaluation complete in {total_time:.2f} seconds.")
+    print(f"Results saved to '{config.EVALUATION_RESULTS_PATH}'")
+    return result_set
 
-        end_time = time.time()
 
-        anomalies_df = df_featured[predictions == -1]
-        anomalies_df.to_csv(output_file)
-
-        print(f"  -> Found {len(anomalies_df)} anomalies.")
-        print(f"  -> Results saved to '{output_file}'")
-        print(f"  -> Time taken: {end_time - start_time:.2f} seconds.")
-        print("-" * 50)
-        model_number += 1
-
-    print("Full evaluation complete.")
-    print(
-        "You now have three CSV files with anomalies from each model, ready for the next phase of analysis."
-    )
+# --- Default detectors ---
+register_detector("Deterministic", ["heart_rate"], _run_deterministic)
+register_detector(
+    "Simple_Isolation_Forest", ["heart_rate", "hour"], _run_isolation_forest
+)
+register_detector("Complex_Isolation_Forest", None, _run_isolation_forest)
+register_detector("Streaming_Robust_Z", ["heart_rate", "steps"], _run_streaming)
+register_detector("LOF_Subsampled", None, baselines.run_lof)
+register_detector("OCSVM_Nystroem", None, baselines.run_ocsvm)
 
 
 if __name__ == "__main__":
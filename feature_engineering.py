@@ -22,3 +22,24 @@ def create_features(df: pd.DataFrame, window_size: int) -> pd.DataFrame:
 
     print("Feature creation complete.")
     return df
+
+
+def extend_features(
+    tail_df: pd.DataFrame, new_df: pd.DataFrame, window_size: int
+) -> pd.DataFrame:
+    """
+    Engineers features for new_df, using tail_df (the rows preceding it) so
+    rolling windows continue seamlessly across the boundary. Only needs the
+    last window_size seconds of history in tail_df.
+
+    Returns only the featured rows of new_df.
+    """
+    if tail_df is None or tail_df.empty:
+        return create_features(new_df, window_size)
+
+    first_new_timestamp = new_df.index.min()
+    tail_df = tail_df[tail_df.index < first_new_timestamp]
+    combined = pd.concat([tail_df[["heart_rate"]], new_df]).sort_index()
+    featured = create_features(combined, window_size)
+
+    return featured[featured.index >= first_new_timestamp]
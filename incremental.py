@@ -0,0 +1,312 @@
+# incremental.py
+
+import argparse
+import glob
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+import config
+from daily_summary import update_from_scored
+from data_loader import DAILY_STEPS_ATTR, load_data_range
+from feature_engineering import create_features, extend_features
+
+# Files kept in a participant's state directory
+MODEL_FILE = "model.joblib"
+STATE_FILE = "state.json"
+TAIL_FILE = "tail.parquet"
+REFERENCE_SCORES_FILE = "reference_scores.npy"
+HISTORY_DIR = "history"
+ANOMALIES_DIR = "anomalies"
+
+# Loaded states kept in memory, keyed by state directory. Entries are
+# reloaded whenever the state file on disk changes.
+_state_cache = {}
+
+
+def default_paths() -> dict:
+    """Returns the data paths configured in config.py."""
+    return {
+        "base_path": config.BASE_PATH,
+        "sleep_path": config.SLEEP_PATH,
+        "hrv_path": config.HRV_PATH,
+        "questionnaire_path": config.QUESTIONNAIRE_PATH,
+    }
+
+
+def population_stability_index(
+    reference: np.ndarray, current: np.ndarray, bins: int = 10
+) -> float:
+    """
+    Computes the Population Stability Index of current against reference.
+
+    Bins are the quantiles of the reference distribution. Values above
+    ~0.2 are commonly read as a significant distribution shift.
+    """
+    edges = np.unique(np.quantile(reference, np.linspace(0, 1, bins + 1)))
+    if len(edges) < 2:
+        return 0.0
+    edges[0], edges[-1] = -np.inf, np.inf
+
+    ref_counts = np.histogram(reference, bins=edges)[0]
+    cur_counts = np.histogram(current, bins=edges)[0]
+
+    # A small floor avoids division by zero and log(0) for empty bins
+    ref_frac = np.clip(ref_counts / len(reference), 1e-6, None)
+    cur_frac = np.clip(cur_counts / len(current), 1e-6, None)
+
+    return float(np.sum((cur_frac - ref_frac) * np.log(cur_frac / ref_frac)))
+
+
+def _load_day_range(paths: dict, start_date: str, end_date: str) -> pd.DataFrame:
+    return load_data_range(
+        paths["base_path"],
+        paths["sleep_path"],
+        paths["hrv_path"],
+        paths["questionnaire_path"],
+        start_date,
+        end_date,
+        features=config.FEATURES,
+    )
+
+
+def _model_matrix(df: pd.DataFrame, feature_columns: list) -> pd.DataFrame:
+    """Selects the model's training columns, filling any that are missing with 0."""
+    return df.reindex(columns=feature_columns, fill_value=0).astype(float)
+
+
+def _save_history(state_dir: str, df_featured: pd.DataFrame, keep_days: int):
+    """Stores featured rows as one file per day and drops days outside the window."""
+    history_dir = os.path.join(state_dir, HISTORY_DIR)
+    os.makedirs(history_dir, exist_ok=True)
+
+    for day, day_df in df_featured.groupby(df_featured.index.date):
+        day_df.to_parquet(os.path.join(history_dir, f"{day}.parquet"))
+
+    day_files = sorted(glob.glob(os.path.join(history_dir, "*.parquet")))
+    for old_file in day_files[:-keep_days]:
+        os.remove(old_file)
+
+
+def _load_history(state_dir: str) -> pd.DataFrame:
+    day_files = sorted(glob.glob(os.path.join(state_dir, HISTORY_DIR, "*.parquet")))
+    return pd.concat([pd.read_parquet(f) for f in day_files])
+
+
+def _fit_model(state_dir: str, df_featured: pd.DataFrame, feature_columns: list):
+    """Fits a new model on df_featured and stores it with its reference scores."""
+    X = _model_matrix(df_featured, feature_columns)
+    model = IsolationForest(
+        contamination=config.ISOLATION_FOREST_CONTAMINATION,
+        random_state=config.RANDOM_STATE,
+    )
+    model.fit(X)
+
+    joblib.dump(model, os.path.join(state_dir, MODEL_FILE))
+    np.save(os.path.join(state_dir, REFERENCE_SCORES_FILE), -model.score_samples(X))
+    return model
+
+
+def _save_tail(state_dir: str, df: pd.DataFrame):
+    """Keeps the raw heart rate of the last rolling window for the next run."""
+    cutoff = df.index.max() - pd.Timedelta(seconds=config.ROLLING_WINDOW_SIZE)
+    df.loc[df.index > cutoff, ["heart_rate"]].to_parquet(
+        os.path.join(state_dir, TAIL_FILE)
+    )
+
+
+def load_state(state_dir: str) -> dict:
+    """
+    Loads a participant's incremental state, or None if not initialized.
+
+    The model, tail and reference scores are cached in memory and only
+    read from disk again when the state file has changed.
+    """
+    state_path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(state_path):
+        return None
+
+    modified_time = os.path.getmtime(state_path)
+    cached = _state_cache.get(state_dir)
+    if cached is None or cached[0] != modified_time:
+        with open(state_path) as f:
+            state = json.load(f)
+        state["model"] = joblib.load(os.path.join(state_dir, MODEL_FILE))
+        state["tail"] = pd.read_parquet(os.path.join(state_dir, TAIL_FILE))
+        state["reference_scores"] = np.load(
+            os.path.join(state_dir, REFERENCE_SCORES_FILE)
+        )
+        cached = (modified_time, state)
+        _state_cache[state_dir] = cached
+
+    # Callers update the bookkeeping fields, so they get their own copy
+    state = cached[1]
+    return {**state, "drift_history": list(state["drift_history"])}
+
+
+def _write_state(state_dir: str, state: dict):
+    serializable = {
+        k: v for k, v in state.items() if k not in ("model", "tail", "reference_scores")
+    }
+    with open(os.path.join(state_dir, STATE_FILE), "w") as f:
+        json.dump(serializable, f, indent=2)
+
+
+def initialize_state(
+    state_dir: str, start_date: str, end_date: str, paths: dict = None
+) -> dict:
+    """
+    Builds a participant's incremental state from a full date range: fits
+    the model, stores its score distribution, the recent feature history
+    and the rolling-window tail.
+    """
+    paths = paths or default_paths()
+    print(f"--- Initializing incremental state in '{state_dir}' ---")
+    os.makedirs(state_dir, exist_ok=True)
+
+    df = _load_day_range(paths, start_date, end_date)
+    df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
+    feature_columns = [
+        f
+        for f in config.FEATURES
+        if f in df_featured.columns and pd.api.types.is_numeric_dtype(df_featured[f])
+    ]
+
+    _fit_model(state_dir, df_featured, feature_columns)
+    _save_history(state_dir, df_featured, config.INCREMENTAL_HISTORY_DAYS)
+    _save_tail(state_dir, df_featured)
+
+    state = {
+        "last_date": pd.Timestamp(end_date).strftime("%Y-%m-%d"),
+        "paths": paths,
+        "feature_columns": feature_columns,
+        "refits": 0,
+        "drift_history": [],
+    }
+    _write_state(state_dir, state)
+    print("Incremental state initialized.")
+    return state
+
+
+def _up_to_date_result() -> dict:
+    """The result of a run without new data, with the keys of a scoring run."""
+    return {
+        "status": "up_to_date",
+        "days_ingested": 0,
+        "rows_scored": 0,
+        "psi": None,
+        "refit": False,
+        "anomalies": None,
+    }
+
+
+def run_incremental(state_dir: str, end_date: str = None, paths: dict = None) -> dict:
+    """
+    Scores only the days added since the last run.
+
+    Data is read from paths, or from the paths the state was initialized
+    with. Rolling features are extended from the stored tail, new rows are
+    scored with the stored model, and the model is refit on the recent
+    history only when the score distribution drifts past
+    config.DRIFT_PSI_THRESHOLD.
+    """
+    state = load_state(state_dir)
+    if state is None:
+        raise FileNotFoundError(
+            f"No incremental state in '{state_dir}'. Run initialize_state first."
+        )
+    paths = paths or state.get("paths") or default_paths()
+
+    start_date = pd.Timestamp(state["last_date"]) + pd.Timedelta(days=1)
+    end_date = pd.Timestamp(end_date or pd.Timestamp.today().normalize())
+    if start_date > end_date:
+        print("No new days to ingest.")
+        return _up_to_date_result()
+
+    print(f"--- Incremental scoring from {start_date.date()} to {end_date.date()} ---")
+    try:
+        new_df = _load_day_range(paths, str(start_date.date()), str(end_date.date()))
+    except FileNotFoundError:
+        print("No new data files found.")
+        return _up_to_date_result()
+
+    new_featured = extend_features(state["tail"], new_df, config.ROLLING_WINDOW_SIZE)
+    feature_columns = state["feature_columns"]
+
+    model = state["model"]
+    X_new = _model_matrix(new_featured, feature_columns)
+    scores = -model.score_samples(X_new)
+    psi = population_stability_index(state["reference_scores"], scores)
+    print(f"Score drift (PSI): {psi:.3f}")
+
+    _save_history(state_dir, new_featured, config.INCREMENTAL_HISTORY_DAYS)
+
+    refit = psi > config.DRIFT_PSI_THRESHOLD
+    if refit:
+        print("Drift exceeds threshold. Refitting model on recent history...")
+        model = _fit_model(state_dir, _load_history(state_dir), feature_columns)
+        scores = -model.score_samples(X_new)
+        state["refits"] += 1
+
+    new_featured["anomaly"] = model.predict(X_new)
+    new_featured["anomaly_score"] = scores
+    anomalies = new_featured[new_featured["anomaly"] == -1]
+
+    anomalies_dir = os.path.join(state_dir, ANOMALIES_DIR)
+    os.makedirs(anomalies_dir, exist_ok=True)
+    first_day = new_featured.index.min().strftime("%Y-%m-%d")
+    last_day = new_featured.index.max().strftime("%Y-%m-%d")
+    anomalies.to_parquet(os.path.join(anomalies_dir, f"{first_day}_{last_day}.parquet"))
+    update_from_scored(
+        os.path.basename(os.path.normpath(state_dir)),
+        new_featured,
+        "incremental",
+        paths["base_path"],
+        daily_steps=new_df.attrs.get(DAILY_STEPS_ATTR),
+    )
+
+    _save_tail(state_dir, new_featured)
+    days_ingested = len(np.unique(new_featured.index.date))
+    # Advance only to the last day with data so a day exported late is not skipped
+    state["last_date"] = last_day
+    state["drift_history"].append(
+        {"date": state["last_date"], "psi": psi, "refit": bool(refit)}
+    )
+    _write_state(state_dir, state)
+
+    print(f"Scored {len(new_featured)} new rows. Found {len(anomalies)} anomalies.")
+    return {
+        "status": "success",
+        "days_ingested": days_ingested,
+        "rows_scored": len(new_featured),
+        "psi": psi,
+        "refit": bool(refit),
+        "anomalies": anomalies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score newly added days with a participant's stored model."
+    )
+    parser.add_argument("state_dir", help="Directory holding the participant's state.")
+    parser.add_argument(
+        "--init",
+        nargs=2,
+        metavar=("START_DATE", "END_DATE"),
+        help="Initialize the state from this date range before scoring.",
+    )
+    parser.add_argument("--end-date", help="Last day to ingest (default: today).")
+    args = parser.parse_args()
+
+    if args.init:
+        initialize_state(args.state_dir, *args.init)
+    run_incremental(args.state_dir, args.end_date)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 # llm_explainer.py
 
 import pandas as pd
-import google.generativeai as genai
 
 
 def get_anomaly_explanations(
@@ -29,6 +28,9 @@ def get_anomaly_explanations(
         return explanations
 
     print("\n--- Generating LLM Explanations ---")
+    # Imported here so requests that never reach the LLM don't pay for it
+    import google.generativeai as genai
+
     genai.configure(api_key=api_key)
     llm = genai.GenerativeModel("gemini-1.5-flash")
 
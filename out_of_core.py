@@ -0,0 +1,224 @@
+# out_of_core.py
+
+import argparse
+import heapq
+
+import numpy as np
+import pandas as pd
+from sklearn import config_context
+from sklearn.ensemble import IsolationForest
+
+import config
+from daily_summary import update_from_scored
+from data_loader import DAILY_STEPS_ATTR, load_data_range
+from feature_engineering import extend_features
+
+# Shares of config.OUT_OF_CORE_MEMORY_BUDGET_MB given to the loaded chunk
+# (including its parsing overhead) and to the training reservoir
+CHUNK_SHARE = 0.25
+RESERVOIR_SHARE = 0.25
+# Loading and parsing a chunk peaks at a few times the size of the result
+PARSE_OVERHEAD = 5
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def next_chunk_end(cursor: pd.Timestamp, end: pd.Timestamp, max_days: int):
+    """Last day of the chunk starting at cursor: at most max_days, within its month."""
+    month_end = cursor + pd.offsets.MonthEnd(0)
+    return min(month_end, cursor + pd.Timedelta(days=max_days - 1), end)
+
+
+def iter_featured_chunks(start_date: str, end_date: str, budget_bytes: int):
+    """
+    Yields the featured rows of [start_date, end_date] chunk by chunk.
+
+    Chunks never cross a month boundary. Their length starts at one day
+    and at most doubles from chunk to chunk, limited by the largest size
+    per day with data seen so far and the chunk's share of the budget. The
+    last ROLLING_WINDOW_SIZE seconds of each chunk are carried over so
+    rolling features continue seamlessly into the next one.
+    """
+    cursor = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    # A one-day first chunk measures the data size before larger chunks
+    max_days = 1
+    bytes_per_day = 0
+    tail = None
+    window = pd.Timedelta(seconds=config.ROLLING_WINDOW_SIZE)
+
+    while cursor <= end:
+        chunk_end = next_chunk_end(cursor, end, max_days)
+        try:
+            df = load_data_range(
+                config.BASE_PATH,
+                config.SLEEP_PATH,
+                config.HRV_PATH,
+                config.QUESTIONNAIRE_PATH,
+                str(cursor.date()),
+                str(chunk_end.date()),
+                features=config.FEATURES,
+            )
+        except FileNotFoundError:
+            df = None
+
+        if df is not None:
+            featured = extend_features(tail, df, config.ROLLING_WINDOW_SIZE)
+            featured.attrs[DAILY_STEPS_ATTR] = df.attrs.get(DAILY_STEPS_ATTR)
+            tail = featured.loc[featured.index > featured.index.max() - window]
+
+            days_with_data = len(np.unique(featured.index.asi8 // NS_PER_DAY))
+            bytes_per_day = max(
+                bytes_per_day,
+                featured.memory_usage(deep=True).sum() / days_with_data,
+            )
+            max_days = int(
+                np.clip(
+                    budget_bytes * CHUNK_SHARE / (bytes_per_day * PARSE_OVERHEAD),
+                    1,
+                    min(31, 2 * max_days),
+                )
+            )
+            yield featured
+            del df, featured
+
+        cursor = chunk_end + pd.Timedelta(days=1)
+
+
+def _model_matrix(df: pd.DataFrame, feature_columns: list) -> np.ndarray:
+    """Selects the model columns, filling any missing from a chunk with 0."""
+    return df.reindex(columns=feature_columns, fill_value=0).to_numpy(np.float64)
+
+
+def fill_reservoir(
+    reservoir: np.ndarray, seen: int, rows: np.ndarray, rng: np.random.Generator
+) -> int:
+    """
+    Adds rows to a uniform reservoir sample (Algorithm R, vectorized) and
+    returns the new number of rows seen. reservoir is updated in place; its
+    first min(seen, len(reservoir)) rows are filled.
+    """
+    capacity = len(reservoir)
+    free = max(0, min(capacity - seen, len(rows)))
+    reservoir[seen : seen + free] = rows[:free]
+
+    remaining = rows[free:]
+    if len(remaining):
+        # Row i of the stream replaces a random slot with probability k / (i + 1)
+        positions = seen + free + np.arange(len(remaining))
+        slots = rng.integers(0, positions + 1)
+        keep = slots < capacity
+        # Repeated slots keep the last row, as a sequential pass would
+        reservoir[slots[keep]] = remaining[keep]
+
+    return seen + len(rows)
+
+
+def run_out_of_core(start_date: str, end_date: str, top_k: int = None) -> dict:
+    """
+    Runs anomaly detection over an arbitrarily long range with bounded memory.
+
+    Pass 1 streams the range and keeps a uniform reservoir sample of the
+    model rows, sized by the memory budget, to fit the IsolationForest.
+    Pass 2 streams the range again, scores every chunk and keeps only the
+    top_k anomalies by score in a heap. Memory depends on the budget and
+    top_k, not on the length of the range.
+    """
+    budget_bytes = config.OUT_OF_CORE_MEMORY_BUDGET_MB * 1024 * 1024
+    top_k = top_k or config.OUT_OF_CORE_TOP_K
+    feature_columns = config.FEATURES
+    capacity = max(
+        1000, int(budget_bytes * RESERVOIR_SHARE / (8 * len(feature_columns)))
+    )
+
+    print(f"--- Out-of-core pass 1: sampling up to {capacity} rows for training ---")
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    reservoir = np.empty((capacity, len(feature_columns)))
+    seen = 0
+    chunks = 0
+    for featured in iter_featured_chunks(start_date, end_date, budget_bytes):
+        seen = fill_reservoir(
+            reservoir, seen, _model_matrix(featured, feature_columns), rng
+        )
+        chunks += 1
+    if seen == 0:
+        raise FileNotFoundError("No data could be loaded for the specified date range.")
+
+    # scikit-learn scores rows in blocks of at most working_memory MB
+    working_memory = config.OUT_OF_CORE_MEMORY_BUDGET_MB * CHUNK_SHARE
+    model = IsolationForest(
+        contamination=config.ISOLATION_FOREST_CONTAMINATION,
+        random_state=config.RANDOM_STATE,
+    )
+    with config_context(working_memory=working_memory):
+        model.fit(reservoir[: min(seen, capacity)])
+    del reservoir
+
+    print(f"--- Out-of-core pass 2: scoring {seen} rows in {chunks} chunks ---")
+    # Min-heap of (score, sequence, row); the sequence breaks score ties
+    heap = []
+    sequence = 0
+    anomaly_count = 0
+    for featured in iter_featured_chunks(start_date, end_date, budget_bytes):
+        with config_context(working_memory=working_memory):
+            scores = -model.score_samples(_model_matrix(featured, feature_columns))
+        # Same rule as model.predict, without scoring the rows twice
+        is_anomaly = -scores < model.offset_
+        featured["anomaly"] = np.where(is_anomaly, -1, 1)
+        featured["anomaly_score"] = scores
+        update_from_scored(
+            config.DEFAULT_PARTICIPANT_ID,
+            featured,
+            "out_of_core",
+            daily_steps=featured.attrs.get(DAILY_STEPS_ATTR),
+        )
+
+        flagged = np.flatnonzero(is_anomaly)
+        anomaly_count += len(flagged)
+
+        # Only this chunk's best top_k can enter the heap
+        for position in flagged[np.argsort(-scores[flagged])[:top_k]]:
+            if len(heap) == top_k and scores[position] <= heap[0][0]:
+                break
+            entry = (scores[position], sequence, featured.iloc[position])
+            sequence += 1
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+    top_anomalies = pd.DataFrame([row for _, _, row in sorted(heap, reverse=True)])
+
+    print(f"Scored {seen} rows. Found {anomaly_count} anomalies.")
+    return {
+        "status": "success",
+        "chunks": chunks,
+        "rows_scored": seen,
+        "anomaly_count": anomaly_count,
+        "top_anomalies": top_anomalies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run anomaly detection over a long date range with bounded memory."
+    )
+    parser.add_argument("start_date", help="First day of the range (YYYY-MM-DD).")
+    parser.add_argument("end_date", help="Last day of the range (YYYY-MM-DD).")
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="Number of top anomalies to keep (default: config.OUT_OF_CORE_TOP_K).",
+    )
+    args = parser.parse_args()
+
+    result = run_out_of_core(args.start_date, args.end_date, args.top_k)
+    print(
+        result["top_anomalies"][["heart_rate", "steps", "anomaly_score"]]
+        .head(10)
+        .to_string()
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# parsed_cache.py
+#
+# Parsed copies of heart rate and steps files as one Parquet file per day,
+# so a day is parsed from CSV once and later loads of it skip the CSV
+# parser. Every entry records the modification time and size of the file it
+# was parsed from and is only used while that file is unchanged. Entries
+# are written by the watcher (see watcher.py) for the files it ingests and
+# read by the loader (see data_loader.py).
+
+import hashlib
+import os
+
+import pandas as pd
+
+import archive_reader
+import config
+
+# attrs key of the (modification time, size) of an entry's source file;
+# pandas stores attrs in the Parquet metadata
+SOURCE_ATTR = "source_signature"
+
+
+def cache_dir(base_path: str) -> str:
+    """Directory of the parsed entries of the export at base_path."""
+    key = os.path.abspath(os.path.normpath(base_path))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(config.PARSED_CACHE_DIR, digest)
+
+
+def entry_path(base_path: str, stream: str, date: str) -> str:
+    """Location of the parsed stream of one day (an ISO date)."""
+    return os.path.join(cache_dir(base_path), f"{stream}_{date}.parquet")
+
+
+def source_signature(source_path: str) -> list:
+    """(modification time, size) of a data file, or None if it is missing."""
+    try:
+        return list(archive_reader.stat(source_path))
+    except FileNotFoundError:
+        return None
+
+
+def read_entry(base_path: str, stream: str, date: str, signature: list) -> pd.DataFrame:
+    """
+    The parsed stream of one day, or None if there is no entry or it was
+    parsed from another version of the source file than signature.
+    """
+    path = entry_path(base_path, stream, date)
+    if signature is None or not os.path.exists(path):
+        return None
+    try:
+        frame = pd.read_parquet(path)
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable cache entry '{path}': {e}")
+        return None
+    if frame.attrs.get(SOURCE_ATTR) != signature:
+        return None
+    del frame.attrs[SOURCE_ATTR]
+    return frame
+
+
+def write_entry(
+    base_path: str, stream: str, date: str, frame: pd.DataFrame, signature: list
+):
+    """Stores the parsed stream of one day, replacing the entry atomically."""
+    path = entry_path(base_path, stream, date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    frame = frame.copy()
+    frame.attrs = {SOURCE_ATTR: list(signature)}
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_parquet(temp_path)
+    os.replace(temp_path, path)
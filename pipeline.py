@@ -1,16 +1,106 @@
 # pipeline.py
 
 import config
-from data_loader import load_data_range
-from feature_engineering import create_features
-from anomaly_model import detect_anomalies
-from llm_explainer import get_anomaly_explanations
 
+# Stored model of the raw samples found by drilling down into coarse buckets
+DRILL_DOWN_MODEL = "drill_down_isolation_forest"
 
-def run_pipeline(start_date: str, end_date: str, target_feature: str) -> dict:
+
+def window_size_for(resolution: str) -> int:
+    """Rolling window in seconds, covering a few buckets at coarse resolutions."""
+    bucket_seconds = config.RESOLUTIONS[resolution]
+    if not bucket_seconds:
+        return config.ROLLING_WINDOW_SIZE
+    return max(
+        config.ROLLING_WINDOW_SIZE,
+        bucket_seconds * config.RESAMPLED_MIN_WINDOW_BUCKETS,
+    )
+
+
+def drill_down(coarse_anomalies, resolution: str, target_feature: str):
+    """
+    Re-runs the analysis at raw resolution inside the given coarse
+    anomalies' buckets only (normally the top-ranked ones).
+
+    Raw data is loaded just for the days containing those buckets (one
+    load per run of consecutive days). Features are computed over those
+    whole days so rolling windows have context, then the model is fitted on
+    the samples inside the flagged buckets to pick out the most unusual ones.
+    """
+    import numpy as np
+    import pandas as pd
+    from data_loader import bucket_ids, load_data_range
+    from feature_engineering import create_features
+    from anomaly_model import detect_anomalies
+
+    bucket_seconds = config.RESOLUTIONS[resolution]
+    flagged = np.unique(bucket_ids(coarse_anomalies.index, bucket_seconds))
+
+    days = np.unique(coarse_anomalies.index.date.astype("datetime64[D]"))
+    run_starts = np.flatnonzero(np.r_[True, np.diff(days).astype(int) > 1])
+    run_ends = np.r_[run_starts[1:], len(days)] - 1
+
+    frames = []
+    for first, last in zip(days[run_starts], days[run_ends]):
+        raw = load_data_range(
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            str(first),
+            str(last),
+            features=config.FEATURES,
+        )
+        raw = create_features(raw, config.ROLLING_WINDOW_SIZE)
+        frames.append(raw[np.isin(bucket_ids(raw.index, bucket_seconds), flagged)])
+
+    raw_df = pd.concat(frames)
+    print(
+        f"Drilling down into {len(flagged)} '{resolution}' buckets "
+        f"({len(raw_df)} raw samples)..."
+    )
+    return detect_anomalies(
+        raw_df,
+        config.FEATURES,
+        config.ISOLATION_FOREST_CONTAMINATION,
+        config.RANDOM_STATE,
+        target_feature,
+    )
+
+
+def run_pipeline(
+    start_date: str,
+    end_date: str,
+    target_feature: str,
+    resolution: str = None,
+    drill_down_buckets: bool = False,
+    mode: str = None,
+) -> dict:
     """
     Runs the full anomaly detection pipeline for a given date range and target.
+
+    At a coarse resolution (see config.RESOLUTIONS) features and model run on
+    time buckets. With drill_down_buckets, the reported anomalies are raw
+    samples from inside the top-ranked buckets instead of the buckets.
+
+    mode is one of config.DETECTION_MODES: 'sample' scores every row,
+    'window' scores time windows and maps their scores back to the rows.
     """
+    # Heavy dependencies (pandas, scikit-learn) are imported on first use so
+    # that importing this module, e.g. from app.py, stays fast.
+    from data_loader import load_data_range
+    from feature_engineering import create_features
+    from anomaly_model import detect_anomalies, rank_anomalies
+    from llm_explainer import get_anomaly_explanations
+    from data_coverage import coverage_report
+    from anomaly_store import record_results
+
+    resolution = resolution or config.DEFAULT_RESOLUTION
+    mode = mode or config.DEFAULT_DETECTION_MODE
+    features = config.FEATURES
+    if resolution != "raw":
+        features = features + config.RESAMPLED_FEATURES
+
     try:
         df = load_data_range(
             config.BASE_PATH,
@@ -19,25 +109,122 @@ def run_pipeline(start_date: str, end_date: str, target_feature: str) -> dict:
             config.QUESTIONNAIRE_PATH,
             start_date,
             end_date,
+            features=config.FEATURES,
+            resolution=resolution,
+            min_wear_fraction=config.COVERAGE_MIN_WEAR_FRACTION,
         )
 
-        df_featured = create_features(df, config.ROLLING_WINDOW_SIZE)
+        df_featured = create_features(df, window_size_for(resolution))
+
+        if mode == "window":
+            from window_model import score_windows
+
+            score_windows(
+                df_featured,
+                features,
+                config.ISOLATION_FOREST_CONTAMINATION,
+                config.RANDOM_STATE,
+                config.WINDOW_SECONDS,
+                config.WINDOW_STRIDE_SECONDS,
+                config.WINDOW_QUANTILES,
+                config.WINDOW_MIN_SAMPLES,
+            )
+            anomalies = df_featured[df_featured["anomaly"] == -1]
+            top_anomalies = rank_anomalies(df_featured, anomalies, target_feature)
+        else:
+            top_anomalies = detect_anomalies(
+                df_featured,
+                features,
+                config.ISOLATION_FOREST_CONTAMINATION,
+                config.RANDOM_STATE,
+                target_feature,
+                sample_weight=df_featured.get("coverage_weight"),
+            )
+
+        if resolution == "raw":
+            from daily_summary import update_from_scored
+            from data_loader import DAILY_STEPS_ATTR
 
-        top_anomalies = detect_anomalies(
-            df_featured,
-            config.FEATURES,
-            config.ISOLATION_FOREST_CONTAMINATION,
-            config.RANDOM_STATE,
-            target_feature,
+            update_from_scored(
+                config.DEFAULT_PARTICIPANT_ID,
+                df_featured,
+                mode,
+                daily_steps=df.attrs.get(DAILY_STEPS_ATTR),
+            )
+
+        # Everything that changes the scores goes into the stored model version
+        params = {
+            "resolution": resolution,
+            "features": features,
+            "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+            "random_state": config.RANDOM_STATE,
+            "rolling_window_size": window_size_for(resolution),
+        }
+        if mode == "window":
+            params.update(
+                {
+                    "window_seconds": config.WINDOW_SECONDS,
+                    "window_stride_seconds": config.WINDOW_STRIDE_SECONDS,
+                    "window_quantiles": config.WINDOW_QUANTILES,
+                    "window_min_samples": config.WINDOW_MIN_SAMPLES,
+                }
+            )
+        flagged = df_featured[df_featured["anomaly"] == -1]
+
+        drilled_down = (
+            drill_down_buckets and resolution != "raw" and not top_anomalies.empty
         )
+        if drilled_down:
+            top_anomalies = drill_down(top_anomalies, resolution, target_feature)
 
         results = get_anomaly_explanations(
             top_anomalies, config.GOOGLE_API_KEY, target_feature
         )
+        # Each model version holds one resolution: with drill-down, the
+        # explained raw samples are stored as a model of their own
+        record_results(
+            config.DEFAULT_PARTICIPANT_ID,
+            "pipeline",
+            f"{mode}_isolation_forest",
+            params,
+            flagged,
+            start_date,
+            end_date,
+            explanations=None if drilled_down else results,
+        )
+        if drilled_down:
+            record_results(
+                config.DEFAULT_PARTICIPANT_ID,
+                "pipeline",
+                DRILL_DOWN_MODEL,
+                {
+                    "resolution": "raw",
+                    "drilled_from": resolution,
+                    "features": config.FEATURES,
+                    "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+                    "random_state": config.RANDOM_STATE,
+                    "rolling_window_size": config.ROLLING_WINDOW_SIZE,
+                },
+                top_anomalies,
+                start_date,
+                end_date,
+                explanations=results,
+            )
+        # The load has just refreshed the coverage index
+        coverage = coverage_report(
+            config.BASE_PATH,
+            start_date,
+            end_date,
+            config.COVERAGE_MIN_WEAR_FRACTION,
+            refresh=False,
+        )
 
         return {
             "status": "success",
             "date_range_analyzed": f"{start_date} to {end_date}",
+            "resolution": resolution,
+            "mode": mode,
+            "coverage": coverage,
             "results": results,
         }
 
@@ -50,3 +237,102 @@ def run_pipeline(start_date: str, end_date: str, target_feature: str) -> dict:
         print(f"\n[ERROR] {error_message}")
         return {"status": "error", "message": error_message}
 
+
+def run_incremental_pipeline(participant_id: str, target_feature: str) -> dict:
+    """
+    Scores the days added since a participant's last run with their stored
+    model (see incremental.py) and explains the top anomalies.
+    """
+    import os
+    from incremental import run_incremental
+    from anomaly_model import rank_anomalies
+    from llm_explainer import get_anomaly_explanations
+
+    try:
+        state_dir = os.path.join(config.INCREMENTAL_STATE_ROOT, participant_id)
+        result = run_incremental(state_dir)
+
+        anomalies = result.pop("anomalies")
+        explanations = []
+        if anomalies is not None and not anomalies.empty:
+            top_anomalies = rank_anomalies(anomalies, anomalies, target_feature)
+            explanations = get_anomaly_explanations(
+                top_anomalies, config.GOOGLE_API_KEY, target_feature
+            )
+
+        return {
+            **result,
+            "status": "success",
+            "ingest_status": result["status"],
+            "participant_id": participant_id,
+            "anomaly_count": 0 if anomalies is None else len(anomalies),
+            "results": explanations,
+        }
+
+    except FileNotFoundError as e:
+        error_message = f"Data file not found: {e}."
+        print(f"\n[ERROR] {error_message}")
+        return {"status": "error", "message": error_message}
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(f"\n[ERROR] {error_message}")
+        return {"status": "error", "message": error_message}
+
+
+def run_out_of_core_pipeline(
+    start_date: str, end_date: str, target_feature: str
+) -> dict:
+    """
+    Runs the pipeline over an arbitrarily long date range in bounded memory
+    (see out_of_core.py), explains the top anomalies and records them in
+    the anomaly store.
+    """
+    from out_of_core import run_out_of_core
+    from anomaly_model import rank_anomalies
+    from llm_explainer import get_anomaly_explanations
+    from anomaly_store import record_results
+
+    try:
+        result = run_out_of_core(start_date, end_date)
+
+        top_anomalies = result.pop("top_anomalies")
+        explanations = []
+        if not top_anomalies.empty:
+            explanations = get_anomaly_explanations(
+                rank_anomalies(top_anomalies, top_anomalies, target_feature),
+                config.GOOGLE_API_KEY,
+                target_feature,
+            )
+            record_results(
+                config.DEFAULT_PARTICIPANT_ID,
+                "out_of_core",
+                "out_of_core_isolation_forest",
+                {
+                    "features": config.FEATURES,
+                    "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+                    "random_state": config.RANDOM_STATE,
+                    "rolling_window_size": config.ROLLING_WINDOW_SIZE,
+                    "memory_budget_mb": config.OUT_OF_CORE_MEMORY_BUDGET_MB,
+                    "top_k": config.OUT_OF_CORE_TOP_K,
+                },
+                top_anomalies,
+                start_date,
+                end_date,
+                explanations=explanations,
+            )
+
+        return {
+            **result,
+            "date_range_analyzed": f"{start_date} to {end_date}",
+            "execution": "out_of_core",
+            "results": explanations,
+        }
+
+    except FileNotFoundError as e:
+        error_message = f"Data file not found: {e}."
+        print(f"\n[ERROR] {error_message}")
+        return {"status": "error", "message": error_message}
+    except Exception as e:
+        error_message = f"An unexpected error occurred: {e}"
+        print(f"\n[ERROR] {error_message}")
+        return {"status": "error", "message": error_message}
@@ -0,0 +1,142 @@
+# profiler.py
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+
+import config
+
+# Only one request may be profiled at a time: cProfile and tracemalloc are
+# process-wide and overlapping sessions would corrupt each other's reports.
+_profile_lock = threading.Lock()
+_last_profile_time = 0.0
+
+
+def should_profile(force: bool = False) -> bool:
+    """
+    Decides whether the current request should be profiled.
+
+    A request is profiled when it is forced (e.g. via the request header) or
+    when profiling is enabled in config and the request wins the sampling
+    draw. In both cases a minimum interval between profiles is enforced so
+    the mode is safe to leave enabled in production.
+    """
+    if not force:
+        if not config.PROFILING_ENABLED:
+            return False
+        if random.random() >= config.PROFILING_SAMPLE_RATE:
+            return False
+
+    elapsed = time.time() - _last_profile_time
+    return elapsed >= config.PROFILING_MIN_INTERVAL_SECONDS
+
+
+def _format_tag(params: dict) -> str:
+    """Builds a filesystem-safe tag from the request parameters."""
+    parts = [f"{key}-{value}" for key, value in params.items() if value is not None]
+    tag = "_".join(parts) or "request"
+    return re.sub(r"[^A-Za-z0-9_.-]", "", tag)
+
+
+def _function_label(func: tuple) -> str:
+    """Formats a pstats function key as 'module:function'."""
+    filename, _, name = func
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{name}" if module and module != "~" else name
+
+
+def write_collapsed_stacks(stats: pstats.Stats, output_path: str):
+    """
+    Writes the profile in collapsed-stack format ('caller;callee value').
+
+    cProfile only records caller/callee pairs, so each line is a two-frame
+    stack weighted by the callee's own time (in microseconds) attributed to
+    that caller. This is enough for flame graph tools to show where the time
+    goes (read_csv, rolling windows, forest fitting, ...).
+    """
+    with open(output_path, "w") as f:
+        for func, (_, _, _, _, callers) in stats.stats.items():
+            callee = _function_label(func)
+            if not callers:
+                continue
+            for caller, caller_stats in callers.items():
+                own_time_us = int(caller_stats[2] * 1e6)
+                if own_time_us > 0:
+                    f.write(f"{_function_label(caller)};{callee} {own_time_us}\n")
+
+
+def write_top_allocations(
+    snapshot: tracemalloc.Snapshot, output_path: str, limit: int = 25
+):
+    """Writes the top memory allocations of a tracemalloc snapshot by line."""
+    top_stats = snapshot.statistics("lineno")
+    with open(output_path, "w") as f:
+        f.write(f"Top {limit} allocations by line\n")
+        for stat in top_stats[:limit]:
+            f.write(f"{stat}\n")
+
+
+def _write_reports(
+    profiler, snapshot, peak_memory: int, params: dict, output_base: str
+):
+    """Writes the cProfile, collapsed stack, allocation and summary reports."""
+    os.makedirs(config.PROFILING_OUTPUT_DIR, exist_ok=True)
+    profiler.dump_stats(f"{output_base}.prof")
+    stats = pstats.Stats(profiler)
+    write_collapsed_stacks(stats, f"{output_base}.collapsed")
+    write_top_allocations(snapshot, f"{output_base}.alloc.txt")
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+    with open(f"{output_base}.summary.txt", "w") as f:
+        f.write(f"Parameters: {params}\n")
+        f.write(f"Peak traced memory: {peak_memory / 1024 / 1024:.1f} MB\n\n")
+        f.write(summary.getvalue())
+
+
+def run_profiled(func, params: dict, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) under cProfile and tracemalloc and writes
+    the reports to config.PROFILING_OUTPUT_DIR, tagged with params.
+
+    If another profile is already in progress, func is run unprofiled.
+    Failing to write the reports never discards func's result.
+    """
+    global _last_profile_time
+
+    if not _profile_lock.acquire(blocking=False):
+        print("Profiler busy. Running request without profiling.")
+        return func(*args, **kwargs)
+
+    try:
+        _last_profile_time = time.time()
+        run_tag = f"{time.strftime('%Y%m%d-%H%M%S')}_{_format_tag(params)}"
+        output_base = os.path.join(config.PROFILING_OUTPUT_DIR, run_tag)
+
+        print(f"Profiling request. Reports will be written to '{output_base}.*'")
+
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        try:
+            _write_reports(profiler, snapshot, peak_memory, params, output_base)
+        except Exception as e:
+            print(f"[WARNING] Could not write the profiling reports: {e}")
+
+        return result
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,180 @@
+# serve.py
+#
+# Production serving mode. The parent process loads the dependencies and
+# the models and feature tails of the hot participants once, then forks
+# worker processes that all accept connections on one listening socket.
+# Forked workers share the parent's memory pages copy-on-write, so the
+# preloaded state is held once instead of once per worker.
+#
+#     python serve.py --workers 4 --port 5000
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import config
+
+# A worker that dies this soon after being forked is not restarted in a
+# tight loop; the parent waits this long before forking it again.
+RESTART_DELAY_SECONDS = 1.0
+# Signals that stop the server; the parent forwards them to the workers
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+def freeze_shared_state(state_cache: dict) -> int:
+    """
+    Marks the reference score arrays of the preloaded participant states
+    read-only and returns the size of the preloaded scores and tails in
+    bytes. A worker writing to a shared array would silently copy its
+    pages; the fitted trees keep their nodes in C buffers that scoring
+    only reads.
+    """
+    shared_bytes = 0
+    for _, state in state_cache.values():
+        state["reference_scores"].setflags(write=False)
+        shared_bytes += state["reference_scores"].nbytes
+        shared_bytes += state["tail"].memory_usage(deep=True).sum()
+    return int(shared_bytes)
+
+
+def preload():
+    """
+    Imports the app and warms up in the parent, before any worker exists.
+    The warm-up runs synchronously here instead of in the background
+    thread app.py would start, since a fork must not happen mid-warm-up.
+    """
+    config.WARMUP_ON_BOOT = False
+    from app import app
+    import incremental
+    from warmup import warm_up
+
+    warm_up()
+    shared_bytes = freeze_shared_state(incremental._state_cache)
+    print(
+        f"Preloaded {len(incremental._state_cache)} participants "
+        f"({shared_bytes / (1024 * 1024):.1f} MB of scores and tails)."
+    )
+    return app
+
+
+def run_worker(app, listener: socket.socket):
+    """Serves requests from the shared listening socket until terminated."""
+    from werkzeug.serving import make_server
+
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    # Blocked across the fork (see serve); a pending SIGTERM now stops the worker
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+    # Workers would otherwise share the parent's random state, e.g. for
+    # the profiler's request sampling
+    random.seed()
+    gc.enable()
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, fd=listener.fileno())
+    print(f"Worker {os.getpid()} serving on http://{host}:{port}")
+    server.serve_forever()
+
+
+def fork_worker(app, listener: socket.socket) -> int:
+    """Forks a worker process and returns its PID in the parent."""
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            run_worker(app, listener)
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+    return pid
+
+
+def serve(host: str, port: int, workers: int):
+    """
+    Preloads, forks the workers and restarts any that die until SIGTERM or
+    SIGINT, which is forwarded to the workers; the parent exits once they
+    have all stopped.
+    """
+    # Collections in the parent would touch (and so copy) every object page
+    gc.disable()
+    app = preload()
+
+    listener = socket.create_server((host, port), backlog=128)
+    # Everything allocated so far is moved out of the collector's reach,
+    # so the workers' collections don't write to the shared pages
+    gc.freeze()
+
+    stopping = False
+    children = set()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def start_worker():
+        # A stop signal waits until the new worker is in children, so stop()
+        # reaches every worker that exists
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        try:
+            if not stopping:
+                children.add(fork_worker(app, listener))
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, stop)
+
+    for _ in range(workers):
+        start_worker()
+    print(f"Started {workers} workers on http://{host}:{port}")
+
+    while children:
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"[WARNING] Worker {pid} exited with status {status}. Restarting.")
+            # Skipped by start_worker if a stop signal arrives meanwhile
+            time.sleep(RESTART_DELAY_SECONDS)
+            start_worker()
+
+    listener.close()
+    print("All workers stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the API from pre-forked workers sharing preloaded state."
+    )
+    parser.add_argument("--host", default=config.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVE_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.SERVE_WORKERS or os.cpu_count(),
+        help="Number of worker processes (default: config.SERVE_WORKERS or all CPU cores).",
+    )
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py needs os.fork; use 'python app.py' on this platform.")
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
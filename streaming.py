@@ -0,0 +1,195 @@
+# streaming.py
+#
+# Online heart rate anomaly detection. Unlike the batch detectors, which
+# need the full range in a DataFrame, samples are pushed in micro-batches
+# and scored as they arrive against exponentially decayed robust baselines:
+#
+#     state = new_state()
+#     anomalies = push(state, timestamps, heart_rate, steps)
+#     save_state(state, "monitor_p01.json")
+#
+# Each activity level (set by the concurrent step count) keeps its own
+# baseline, since a heart rate that is normal while walking is not normal
+# at rest. A baseline is a Huber-type location estimate and the mean
+# absolute deviation around it, both updated in O(1) per sample with a
+# weight that decays with the time since the previous sample. Residuals are
+# clipped before updating, so anomalies barely move the baseline. The state
+# is a small JSON-serializable dict and the result depends only on the
+# samples pushed, so monitoring can run continuously and resume from a
+# checkpoint without batch refits.
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Mean absolute deviation -> standard deviation for normally distributed data
+MAD_TO_STD = math.sqrt(math.pi / 2)
+STATE_VERSION = 1
+
+
+def new_state() -> dict:
+    """Returns the state of a detector that has not seen any samples."""
+    return {
+        "version": STATE_VERSION,
+        "last_timestamp_ns": None,
+        "samples_seen": 0,
+        "anomalies_flagged": 0,
+        # One baseline per activity level: [location, scale, count, last_ns]
+        "baselines": [None] * (len(config.STREAMING_STEP_EDGES) + 1),
+    }
+
+
+def activity_levels(steps: np.ndarray) -> np.ndarray:
+    """Activity level of every sample: 0 at rest, rising with the step count."""
+    return np.searchsorted(config.STREAMING_STEP_EDGES, steps, side="right")
+
+
+def push(state: dict, timestamps, heart_rate, steps=None) -> pd.DataFrame:
+    """
+    Scores a micro-batch of samples and updates state in place.
+
+    Samples must arrive in time order; samples at or before the last
+    timestamp already pushed are ignored, so a re-sent batch is harmless.
+    Returns the flagged samples with their robust z-score, in time order.
+    """
+    timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    heart_rate = np.asarray(heart_rate, dtype=np.float64)
+    steps = np.zeros(len(heart_rate)) if steps is None else np.asarray(steps)
+    if not len(timestamps) == len(heart_rate) == len(steps):
+        raise ValueError("timestamps, heart_rate and steps must have equal lengths.")
+
+    # Nanoseconds since the epoch (UTC for timezone-aware timestamps)
+    times_ns = timestamps.asi8
+    levels = activity_levels(steps)
+
+    tau_ns = config.STREAMING_HALF_LIFE_SECONDS * 1e9 / math.log(2)
+    clip = config.STREAMING_HUBER_CLIP
+    threshold = config.STREAMING_Z_THRESHOLD
+    min_samples = config.STREAMING_MIN_SAMPLES
+    min_scale = config.STREAMING_MIN_SCALE
+    baselines = state["baselines"]
+    last_ns = state["last_timestamp_ns"]
+
+    accepted = 0
+    flagged = []
+    z_scores = []
+    # Plain Python floats keep the per-sample loop cheap
+    for position, (time_ns, value, level) in enumerate(
+        zip(times_ns.tolist(), heart_rate.tolist(), levels.tolist())
+    ):
+        if last_ns is not None and time_ns <= last_ns:
+            continue
+        last_ns = time_ns
+        accepted += 1
+        if value != value:  # NaN
+            continue
+
+        baseline = baselines[level]
+        if baseline is None:
+            baselines[level] = [value, min_scale, 1, time_ns]
+            continue
+        location, scale, count, baseline_ns = baseline
+
+        residual = value - location
+        z_score = residual / (scale * MAD_TO_STD)
+        if count >= min_samples and abs(z_score) > threshold:
+            flagged.append(position)
+            z_scores.append(z_score)
+
+        # Early samples are averaged evenly; later ones decay with time
+        weight = max(
+            1.0 - math.exp(-(time_ns - baseline_ns) / tau_ns), 1.0 / (count + 1)
+        )
+        bound = clip * scale
+        clipped = min(max(residual, -bound), bound)
+        location += weight * clipped
+        scale = max(scale + weight * (abs(clipped) - scale), min_scale)
+        baselines[level] = [location, scale, count + 1, time_ns]
+
+    state["last_timestamp_ns"] = last_ns
+    state["samples_seen"] += accepted
+    state["anomalies_flagged"] += len(flagged)
+
+    anomalies = pd.DataFrame(
+        {
+            "heart_rate": heart_rate[flagged],
+            "steps": steps[flagged],
+            "activity_level": levels[flagged],
+            "z_score": z_scores,
+            "anomaly_score": np.abs(z_scores),
+        },
+        index=timestamps[flagged],
+    )
+    anomalies.index.name = "timestamp"
+    return anomalies
+
+
+def save_state(state: dict, path: str):
+    """Checkpoints the state atomically, so a crash never leaves a partial file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+
+def load_state(path: str) -> dict:
+    """Loads a checkpoint, or returns a new state if none exists yet."""
+    if not os.path.exists(path):
+        return new_state()
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION:
+        raise ValueError(f"Unsupported streaming state version in '{path}'.")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay an export range through the streaming detector."
+    )
+    parser.add_argument("state_file", help="JSON checkpoint, created if missing.")
+    parser.add_argument("start_date", help="First day to replay (YYYY-MM-DD).")
+    parser.add_argument("end_date", help="Last day to replay (YYYY-MM-DD).")
+    parser.add_argument(
+        "--batch-seconds",
+        type=int,
+        default=60,
+        help="Length of the micro-batches pushed to the detector.",
+    )
+    args = parser.parse_args()
+
+    from data_loader import load_data_range
+
+    df = load_data_range(
+        config.BASE_PATH,
+        config.SLEEP_PATH,
+        config.HRV_PATH,
+        config.QUESTIONNAIRE_PATH,
+        args.start_date,
+        args.end_date,
+    )
+    state = load_state(args.state_file)
+
+    batch_ids = df.index.asi8 // (args.batch_seconds * 1_000_000_000)
+    boundaries = np.flatnonzero(np.diff(batch_ids)) + 1
+    found = []
+    for batch in np.split(np.arange(len(df)), boundaries):
+        rows = df.iloc[batch]
+        anomalies = push(state, rows.index, rows["heart_rate"], rows["steps"])
+        if len(anomalies):
+            found.append(anomalies)
+    save_state(state, args.state_file)
+
+    print(f"Pushed {len(df)} samples. Found {state['anomalies_flagged']} anomalies.")
+    if found:
+        print(pd.concat(found).sort_values("anomaly_score").tail(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
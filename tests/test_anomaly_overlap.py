@@ -0,0 +1,110 @@
+# tests/test_anomaly_overlap.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+from compare_anomalies import compare_results
+from anomaly_overlap import (
+    NS_PER_SECOND,
+    match_within,
+    overlap_summary,
+    per_day_agreement,
+    precision_recall,
+    representative_examples,
+    to_int64_ns,
+)
+
+
+class TestAnomalyOverlap(unittest.TestCase):
+
+    def setUp(self):
+        """Create two small sets of anomaly timestamps."""
+        self.a = to_int64_ns(
+            [
+                "2025-07-01 12:00:00+00:00",
+                "2025-07-01 12:10:00+00:00",
+                "2025-07-02 08:00:00+00:00",
+            ]
+        )
+        self.b = to_int64_ns(
+            [
+                "2025-07-01 12:00:20+00:00",
+                "2025-07-02 08:00:00+00:00",
+                "2025-07-02 09:00:00+00:00",
+            ]
+        )
+
+    def test_match_within_tolerance(self):
+        """Test that timestamps match only within the tolerance."""
+        exact = match_within(self.a, self.b, 0)
+        np.testing.assert_array_equal(exact, [False, False, True])
+
+        tolerant = match_within(self.a, self.b, 30 * NS_PER_SECOND)
+        np.testing.assert_array_equal(tolerant, [True, False, True])
+
+    def test_overlap_and_per_day(self):
+        """Test the overall and per-day Jaccard index."""
+        summary = overlap_summary(self.a, self.b, 30 * NS_PER_SECOND)
+        self.assertEqual(summary["matched_a"], 2)
+        self.assertEqual(summary["only_b"], 1)
+        self.assertAlmostEqual(summary["jaccard"], 2 / 4)
+
+        per_day = per_day_agreement(self.a, self.b, 30 * NS_PER_SECOND)
+        self.assertEqual(per_day["count_a"].tolist(), [2, 1])
+        self.assertEqual(per_day["count_b"].tolist(), [1, 2])
+        np.testing.assert_allclose(per_day["jaccard"], [1 / 2, 1 / 2])
+
+    def test_precision_recall(self):
+        """Test precision and recall against a labeled set."""
+        scores = precision_recall(self.a, self.b, 30 * NS_PER_SECOND)
+        self.assertAlmostEqual(scores["precision"], 2 / 3)
+        self.assertAlmostEqual(scores["recall"], 2 / 3)
+
+    def test_representative_examples(self):
+        """Test that examples are chosen by score, not by file order."""
+        anomalies = pd.DataFrame({"ts_ns": self.a, "anomaly_score": [0.51, 0.72, 0.60]})
+        example = representative_examples(anomalies).iloc[0]
+        self.assertEqual(example["ts_ns"], self.a[1])
+
+    def test_result_set_merged_only_for_same_run(self):
+        """Test that evaluation models are compared only on the same run."""
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        result_file = os.path.join(work_dir.name, "simple.csv")
+        pd.DataFrame({"timestamp": pd.to_datetime(self.a, utc=True)}).to_csv(
+            result_file, index=False
+        )
+        run = {
+            "participant_id": "p1",
+            "start_date": "2025-07-01",
+            "end_date": "2025-07-02",
+        }
+        result_set = pd.DataFrame(
+            {"model": "Forest", "timestamp": pd.to_datetime(self.b, utc=True)}
+        )
+        result_set.attrs = dict(run)
+
+        saved_path = config.EVALUATION_RESULTS_PATH
+        config.EVALUATION_RESULTS_PATH = os.path.join(work_dir.name, "results.parquet")
+        self.addCleanup(setattr, config, "EVALUATION_RESULTS_PATH", saved_path)
+        result_set.to_parquet(config.EVALUATION_RESULTS_PATH, index=False)
+
+        merged = compare_results({"Simple": result_file}, 0, run=run)
+        self.assertEqual(set(merged["model_times"]), {"Simple", "Forest"})
+        other_range = {**run, "end_date": "2025-07-31"}
+        for other in (None, other_range):
+            compared = compare_results({"Simple": result_file}, 0, run=other)
+            self.assertEqual(set(compared["model_times"]), {"Simple"})
+
+
+if __name__ == "__main__":
+    unittest.main()
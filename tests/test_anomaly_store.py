@@ -0,0 +1,199 @@
+# tests/test_anomaly_store.py
+
+import unittest
+import numpy as np
+import pandas as pd
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import pipeline
+from anomaly_store import list_runs, model_version, query_anomalies, store_results
+
+PARAMS = {"features": ["heart_rate", "hour"], "contamination": 0.01}
+
+
+class TestAnomalyStore(unittest.TestCase):
+
+    def setUp(self):
+        """Build three scored anomalies on two days and an explanation."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.work_dir.name, "store.sqlite")
+
+        self.anomalies = pd.DataFrame(
+            {
+                "heart_rate": [150.0, 40.0, 170.0],
+                "steps": [0.0, 0.0, 12.0],
+                "anomaly_score": [0.6, 0.7, 0.8],
+            },
+            index=pd.to_datetime(
+                ["2025-07-01 08:00:00", "2025-07-01 23:59:00", "2025-07-02 10:00:00"]
+            ),
+        )
+        self.explanations = [
+            {
+                "anomaly_data": {
+                    "timestamp": "2025-07-02T10:00:00",
+                    "heart_rate": 170.0,
+                    "steps": 12.0,
+                    "anomaly_score": 0.8,
+                },
+                "explanation": "Heart rate far above the rolling average.",
+            }
+        ]
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _store(self, model="forest", params=PARAMS, **kwargs):
+        return store_results(
+            "p1",
+            "pipeline",
+            model,
+            params,
+            self.anomalies,
+            "2025-07-01",
+            "2025-07-02",
+            db_path=self.db_path,
+            **kwargs,
+        )
+
+    def test_query_by_range_score_and_model(self):
+        """Test the time range, score and model filters and both orders."""
+        self._store(explanations=self.explanations)
+        self._store(model="lof")
+
+        by_score = query_anomalies("p1", model="forest", db_path=self.db_path)
+        self.assertEqual([a["score"] for a in by_score], [0.8, 0.7, 0.6])
+        self.assertEqual(
+            by_score[0]["explanation"], self.explanations[0]["explanation"]
+        )
+        self.assertIsNone(by_score[1]["explanation"])
+        self.assertEqual(by_score[0]["anomaly_data"]["heart_rate"], 170.0)
+
+        first_day = query_anomalies(
+            "p1", "2025-07-01", "2025-07-01", order="time", db_path=self.db_path
+        )
+        self.assertEqual(len(first_day), 4, "Both models, end day inclusive")
+        self.assertEqual(first_day[0]["timestamp"], "2025-07-01T08:00:00+00:00")
+
+        high = query_anomalies("p1", min_score=0.7, db_path=self.db_path)
+        self.assertEqual(len(high), 4)
+        self.assertEqual(query_anomalies("p2", db_path=self.db_path), [])
+
+    def test_reruns_upsert_and_keep_explanations(self):
+        """Test that rerunning a model version updates rows in place."""
+        first_run = self._store(explanations=self.explanations)
+        self.anomalies["anomaly_score"] = [0.65, 0.75, 0.85]
+        second_run = self._store()
+
+        stored = query_anomalies("p1", db_path=self.db_path)
+        self.assertEqual(len(stored), 3)
+        self.assertEqual(stored[0]["score"], 0.85)
+        self.assertEqual(stored[0]["run_id"], second_run)
+        self.assertEqual(stored[0]["explanation"], self.explanations[0]["explanation"])
+
+        runs = list_runs("p1", db_path=self.db_path)
+        self.assertEqual([run["run_id"] for run in runs], [second_run, first_run])
+        self.assertEqual(runs[0]["params"], PARAMS)
+
+    def test_model_versions_are_kept_apart(self):
+        """Test that changed parameters give a new, separately queryable version."""
+        self._store()
+        self._store(params={**PARAMS, "contamination": 0.05})
+
+        version = model_version({"model": "forest", **PARAMS})
+        self.assertEqual(len(query_anomalies("p1", db_path=self.db_path)), 6)
+        self.assertEqual(
+            len(query_anomalies("p1", version=version, db_path=self.db_path)), 3
+        )
+
+    def test_explanation_of_unscored_sample_is_added(self):
+        """Test that a drilled-down sample missing from the frame is stored too."""
+        self.explanations[0]["anomaly_data"]["timestamp"] = "2025-07-02T10:00:05"
+        self._store(explanations=self.explanations)
+
+        stored = query_anomalies("p1", order="time", db_path=self.db_path)
+        self.assertEqual(len(stored), 4)
+        self.assertEqual(stored[-1]["timestamp"], "2025-07-02T10:00:05+00:00")
+        self.assertEqual(stored[-1]["score"], 0.8)
+
+    def test_drill_down_stores_one_resolution_per_version(self):
+        """Test that drilled-down samples are stored apart from the buckets."""
+        export = os.path.join(self.work_dir.name, "export")
+        os.makedirs(export)
+        rng = np.random.default_rng(0)
+        timestamps = pd.date_range("2025-07-01", periods=8640, freq="10s")
+        heart_rate = rng.normal(70, 5, len(timestamps)).round()
+        heart_rate[3000:3030] = 160
+        pd.DataFrame({"timestamp": timestamps, "beats per minute": heart_rate}).to_csv(
+            os.path.join(export, "heart_rate_2025-07-01.csv"), index=False
+        )
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+
+        settings = [
+            "BASE_PATH",
+            "SLEEP_PATH",
+            "HRV_PATH",
+            "QUESTIONNAIRE_PATH",
+            "GOOGLE_API_KEY",
+            "ANOMALY_STORE_DB",
+            "DAILY_SUMMARY_DB",
+            "COVERAGE_INDEX_DIR",
+        ]
+        saved = {name: getattr(config, name) for name in settings}
+        config.BASE_PATH = export
+        config.SLEEP_PATH = config.HRV_PATH = config.QUESTIONNAIRE_PATH = missing
+        config.GOOGLE_API_KEY = None
+        config.ANOMALY_STORE_DB = self.db_path
+        config.DAILY_SUMMARY_DB = os.path.join(self.work_dir.name, "summary.sqlite")
+        config.COVERAGE_INDEX_DIR = os.path.join(self.work_dir.name, "coverage")
+        try:
+            result = pipeline.run_pipeline(
+                "2025-07-01",
+                "2025-07-01",
+                "heart_rate",
+                "5min",
+                drill_down_buckets=True,
+            )
+        finally:
+            for name, value in saved.items():
+                setattr(config, name, value)
+        self.assertEqual(result["status"], "success")
+
+        runs = {
+            run["model"]: run
+            for run in list_runs(config.DEFAULT_PARTICIPANT_ID, db_path=self.db_path)
+        }
+        buckets = runs["sample_isolation_forest"]
+        self.assertEqual(buckets["params"]["resolution"], "5min")
+        self.assertEqual(
+            buckets["params"]["rolling_window_size"], pipeline.window_size_for("5min")
+        )
+        drilled = runs[pipeline.DRILL_DOWN_MODEL]
+        self.assertEqual(drilled["params"]["resolution"], "raw")
+
+        stored = query_anomalies(
+            config.DEFAULT_PARTICIPANT_ID,
+            version=buckets["model_version"],
+            db_path=self.db_path,
+        )
+        self.assertTrue(all(a["explanation"] is None for a in stored))
+        bucket_starts = pd.to_datetime([a["timestamp"] for a in stored])
+        self.assertTrue((bucket_starts.second == 0).all())
+        self.assertTrue((bucket_starts.minute % 5 == 0).all())
+        explained = query_anomalies(
+            config.DEFAULT_PARTICIPANT_ID,
+            model=pipeline.DRILL_DOWN_MODEL,
+            db_path=self.db_path,
+        )
+        self.assertEqual(len(explained), len(result["results"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# tests/test_archive_reader.py
+
+import unittest
+import pandas as pd
+import os
+import sys
+import tempfile
+import zipfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import archive_reader
+from data_loader import load_data_range
+
+
+class TestArchiveReader(unittest.TestCase):
+
+    def setUp(self):
+        """Pack the sample data into a takeout-style zip archive."""
+        self.test_data_path = os.path.join(os.path.dirname(__file__), "sample_data")
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.work_dir.name, "takeout.zip")
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name in os.listdir(self.test_data_path):
+                archive.write(
+                    os.path.join(self.test_data_path, name),
+                    f"Takeout/Fitbit/Physical Activity_GoogleData/{name}",
+                )
+        self.archive_data_path = os.path.join(
+            self.zip_path, "Takeout/Fitbit/Physical Activity_GoogleData"
+        )
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _paths(self, root: str) -> list:
+        return [
+            root,
+            os.path.join(root, "sleep-stages-2025.csv"),
+            os.path.join(root, "daily_heart_rate_variability_summary.csv"),
+            os.path.join(root, "questionnaire.csv"),
+        ]
+
+    def test_split_archive_path(self):
+        """Test that only paths into an existing zip are split."""
+        zip_path, member = archive_reader.split_archive_path(
+            os.path.join(self.archive_data_path, "steps_2025-07-01.csv")
+        )
+        self.assertEqual(zip_path, self.zip_path.replace(os.sep, "/"))
+        self.assertEqual(
+            member, "Takeout/Fitbit/Physical Activity_GoogleData/steps_2025-07-01.csv"
+        )
+        self.assertIsNone(archive_reader.split_archive_path(self.test_data_path))
+
+    def test_exists_and_glob(self):
+        """Test member lookup by name and pattern inside the archive."""
+        self.assertTrue(
+            archive_reader.exists(
+                os.path.join(self.archive_data_path, "heart_rate_2025-07-01.csv")
+            )
+        )
+        self.assertFalse(
+            archive_reader.exists(
+                os.path.join(self.archive_data_path, "heart_rate_2025-07-02.csv")
+            )
+        )
+        matches = archive_reader.glob(
+            os.path.join(self.archive_data_path, "heart_rate_*.csv")
+        )
+        self.assertEqual(len(matches), 1)
+        self.assertTrue(matches[0].endswith("heart_rate_2025-07-01.csv"))
+
+    def test_read_csv_missing_member(self):
+        """Test that a missing member raises FileNotFoundError like pd.read_csv."""
+        with self.assertRaises(FileNotFoundError):
+            archive_reader.read_csv(os.path.join(self.archive_data_path, "none.csv"))
+
+    def test_read_csvs_keeps_order(self):
+        """Test that parallel reads return the frames in the order of the paths."""
+        names = [
+            "steps_2025-07-01.csv",
+            "questionnaire.csv",
+            "heart_rate_2025-07-01.csv",
+        ]
+        frames = archive_reader.read_csvs(
+            [os.path.join(self.archive_data_path, name) for name in names],
+            max_workers=3,
+        )
+        for name, frame in zip(names, frames):
+            expected = pd.read_csv(os.path.join(self.test_data_path, name))
+            pd.testing.assert_frame_equal(frame, expected)
+
+    def test_replaced_archive_keeps_open_handle(self):
+        """Test that a reader holding the old handle can finish after a rewrite."""
+        zip_path = self.zip_path.replace(os.sep, "/")
+        old_archive, _ = archive_reader._open_archive(zip_path)
+        os.utime(self.zip_path, (2e9, 2e9))
+        new_archive, _ = archive_reader._open_archive(zip_path)
+        self.assertIsNot(new_archive, old_archive)
+
+        member = "Takeout/Fitbit/Physical Activity_GoogleData/questionnaire.csv"
+        with old_archive.open(member) as stream:
+            frame = pd.read_csv(stream)
+        expected = pd.read_csv(os.path.join(self.test_data_path, "questionnaire.csv"))
+        pd.testing.assert_frame_equal(frame, expected)
+
+    def test_load_data_range_from_archive(self):
+        """Test that loading from the zip matches loading the extracted files."""
+        extracted = load_data_range(
+            *self._paths(self.test_data_path), "2025-07-01", "2025-07-01"
+        )
+        archived = load_data_range(
+            *self._paths(self.archive_data_path), "2025-07-01", "2025-07-01"
+        )
+        pd.testing.assert_frame_equal(archived, extracted)
+
+
+if __name__ == "__main__":
+    unittest.main()
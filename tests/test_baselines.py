@@ -0,0 +1,84 @@
+# tests/test_baselines.py
+
+import unittest
+import numpy as np
+import os
+import sys
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import baselines
+import config
+
+
+class TestBaselines(unittest.TestCase):
+
+    def setUp(self):
+        """Create resting heart rate and steps with a few injected outliers."""
+        rng = np.random.default_rng(3)
+        rows = 30_000
+        self.X = np.column_stack(
+            [
+                rng.normal(65, 3, rows).round(),
+                rng.poisson(2, rows),
+                np.repeat(np.arange(24), rows // 24 + 1)[:rows],
+            ]
+        ).astype(np.float32)
+        self.outliers = rng.choice(rows, 30, replace=False)
+        self.X[self.outliers, 0] = 180
+        self.X[self.outliers, 1] = 0
+
+        self.saved = (config.BASELINE_REFERENCE_ROWS, config.BASELINE_CHUNK_ROWS)
+        config.BASELINE_REFERENCE_ROWS = 5000
+        config.BASELINE_CHUNK_ROWS = 7000
+
+    def tearDown(self):
+        config.BASELINE_REFERENCE_ROWS, config.BASELINE_CHUNK_ROWS = self.saved
+
+    def test_reference_sample(self):
+        """Test that the reference sample is a deterministic subsample."""
+        sample = baselines.reference_sample(self.X)
+
+        self.assertEqual(len(sample), 5000)
+        np.testing.assert_array_equal(sample, baselines.reference_sample(self.X))
+        small = self.X[:100]
+        self.assertIs(baselines.reference_sample(small), small)
+
+    def test_chunked_scores_match_single_pass(self):
+        """Test that scoring in chunks gives the same scores as one pass."""
+        score = lambda chunk: chunk.sum(axis=1)
+        np.testing.assert_allclose(
+            baselines.chunked_scores(score, self.X), score(self.X)
+        )
+
+    def _check_detector(self, run):
+        anomaly_mask, scores = run(self.X)
+
+        self.assertEqual(anomaly_mask.shape, (len(self.X),))
+        self.assertEqual(scores.shape, (len(self.X),))
+        self.assertTrue(anomaly_mask[self.outliers].all(), "Outliers are flagged")
+        self.assertLess(anomaly_mask.mean(), 0.05)
+        # Flagged rows score higher than the rest
+        self.assertGreater(scores[anomaly_mask].min(), scores[~anomaly_mask].max())
+
+    def test_run_lof(self):
+        """Test the subsampled LOF baseline."""
+        self._check_detector(baselines.run_lof)
+
+    def test_run_lof_constant_rows(self):
+        """Test that LOF flags nothing when all references are identical."""
+        X = np.tile(np.float32([[65, 0, 12]]), (500, 1))
+        anomaly_mask, scores = baselines.run_lof(X)
+
+        self.assertFalse(anomaly_mask.any())
+        np.testing.assert_array_equal(scores, np.zeros(len(X)))
+
+    def test_run_ocsvm(self):
+        """Test the Nystroem One-Class SVM baseline."""
+        self._check_detector(baselines.run_ocsvm)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_batch_runner.py
+
+import unittest
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import batch_runner
+from batch_runner import load_manifest, participant_paths, run_batch
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        """Create two participant export roots from the sample data."""
+        self.test_data_path = os.path.join(os.path.dirname(__file__), "sample_data")
+        self.work_dir = tempfile.TemporaryDirectory()
+
+        manifest_rows = []
+        for participant_id in ["p01", "p02"]:
+            export_root = os.path.join(self.work_dir.name, participant_id)
+            paths = participant_paths(export_root)
+            os.makedirs(paths["base_path"], exist_ok=True)
+            for name in ["heart_rate_2025-07-01.csv", "steps_2025-07-01.csv"]:
+                shutil.copy(os.path.join(self.test_data_path, name), paths["base_path"])
+            for key, name in [
+                ("sleep_path", "sleep-stages-2025.csv"),
+                ("hrv_path", "daily_heart_rate_variability_summary.csv"),
+                ("questionnaire_path", "questionnaire.csv"),
+            ]:
+                os.makedirs(os.path.dirname(paths[key]) or ".", exist_ok=True)
+                shutil.copy(os.path.join(self.test_data_path, name), paths[key])
+            manifest_rows.append(
+                {
+                    "participant_id": participant_id,
+                    "export_root": export_root,
+                    "start_date": "2025-07-01",
+                    "end_date": "2025-07-01",
+                }
+            )
+
+        # A participant whose export does not exist must fail in isolation
+        manifest_rows.append(
+            {
+                "participant_id": "missing",
+                "export_root": os.path.join(self.work_dir.name, "missing"),
+                "start_date": "2025-07-01",
+                "end_date": "2025-07-01",
+            }
+        )
+        self.manifest = pd.DataFrame(manifest_rows)
+        self.output_dir = os.path.join(self.work_dir.name, "output")
+
+        self.original_summary_db = config.DAILY_SUMMARY_DB
+        config.DAILY_SUMMARY_DB = os.path.join(self.work_dir.name, "summary.sqlite")
+
+    def tearDown(self):
+        config.DAILY_SUMMARY_DB = self.original_summary_db
+        self.work_dir.cleanup()
+
+    def test_run_batch(self):
+        """Test that participants are processed independently and consolidated."""
+        summary = run_batch(self.manifest, self.output_dir, max_workers=2)
+
+        self.assertEqual(summary["succeeded"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["rows"], 4)
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            ["participant_id=p01", "participant_id=p02"],
+        )
+        anomalies = pd.read_parquet(self.output_dir)
+        self.assertIn("participant_id", anomalies.columns)
+        self.assertIn("anomaly_score", anomalies.columns)
+
+    def test_dead_worker_fails_only_its_participant(self):
+        """Test that a killed worker neither fails others nor leaves stale output."""
+        stale = os.path.join(self.output_dir, "participant_id=p01")
+        os.makedirs(stale)
+        original = batch_runner.analyze_participant
+
+        def crash_p01(task, output_dir):
+            if task["participant_id"] == "p01":
+                os._exit(9)  # Like a worker killed when out of memory
+            return original(task, output_dir)
+
+        batch_runner.analyze_participant = crash_p01
+        try:
+            summary = run_batch(self.manifest, self.output_dir, max_workers=1)
+        finally:
+            batch_runner.analyze_participant = original
+
+        results = {r["participant_id"]: r for r in summary["results"]}
+        self.assertIn("exit code 9", results["p01"]["message"])
+        self.assertEqual(results["p02"]["status"], "success")
+        self.assertFalse(os.path.exists(stale), "Stale partition removed")
+
+    def test_invalid_participant_id(self):
+        """Test that IDs which are not plain path components are rejected."""
+        manifest_path = os.path.join(self.work_dir.name, "manifest.csv")
+        self.manifest.assign(participant_id=["p01", "../p02", "x"]).to_csv(
+            manifest_path, index=False
+        )
+        with self.assertRaises(ValueError):
+            load_manifest(manifest_path)
+
+        result = batch_runner.analyze_participant(
+            {**self.manifest.iloc[0].to_dict(), "participant_id": "../p01"},
+            self.output_dir,
+        )
+        self.assertEqual(result["status"], "error")
+        self.assertFalse(os.path.exists(self.output_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
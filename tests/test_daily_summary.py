@@ -0,0 +1,117 @@
+# tests/test_daily_summary.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from daily_summary import (
+    load_daily_steps,
+    query_overview,
+    summarize_anomalies,
+    summarize_days,
+    update_from_scored,
+    upsert,
+)
+from data_loader import DAILY_STEPS_ATTR, load_data_range
+
+
+class TestDailySummary(unittest.TestCase):
+
+    def setUp(self):
+        """Build two days of scored samples and their steps file."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.work_dir.name, "summary.sqlite")
+
+        timestamps = pd.date_range("2025-07-01", periods=2 * 1440, freq="min")
+        self.df = pd.DataFrame(
+            {
+                "heart_rate": np.tile(np.arange(60, 120), 48),
+                # Forward-filled steps repeat on every sample
+                "steps": 5,
+                "hrv_rmssd": 40.0,
+                "sleep_deep_minutes": 60.0,
+                "anomaly": 1,
+                "anomaly_score": 0.4,
+            },
+            index=timestamps,
+        )
+        self.df.iloc[100, self.df.columns.get_loc("anomaly")] = -1
+        self.df.iloc[100, self.df.columns.get_loc("anomaly_score")] = 0.8
+
+        pd.DataFrame(
+            {
+                "timestamp": ["2025-07-01 08:00:00", "2025-07-02 09:00:00"],
+                "value": [7, 3],
+            }
+        ).to_csv(os.path.join(self.work_dir.name, "steps_2025-07-01.csv"), index=False)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_summarize_days(self):
+        """Test per-day percentiles, sleep and steps from the raw readings."""
+        summary = summarize_days(self.df, self.work_dir.name)
+
+        self.assertEqual(list(summary.index), ["2025-07-01", "2025-07-02"])
+        self.assertEqual(summary.loc["2025-07-01", "hr_p50"], 89.5)
+        self.assertEqual(summary.loc["2025-07-01", "hr_max"], 119)
+        self.assertEqual(summary.loc["2025-07-01", "sample_count"], 1440)
+        self.assertEqual(summary.loc["2025-07-01", "sleep_minutes"], 60.0)
+        self.assertEqual(summary["total_steps"].tolist(), [7, 3])
+
+        anomalies = summarize_anomalies(self.df, "sample")
+        self.assertEqual(anomalies["anomaly_count"].tolist(), [1, 0])
+        self.assertEqual(anomalies["top_score"].tolist(), [0.8, 0.4])
+
+    def test_loaded_steps_are_reused(self):
+        """Test that the loader's step totals match the files and are used as is."""
+        sample_data = os.path.join(os.path.dirname(__file__), "sample_data")
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+        df = load_data_range(
+            sample_data, missing, missing, missing, "2025-07-01", "2025-07-01"
+        )
+        daily_steps = df.attrs[DAILY_STEPS_ATTR]
+
+        self.assertEqual(
+            daily_steps,
+            load_daily_steps(sample_data, ["2025-07-01"]).to_dict(),
+        )
+        # No steps files under the base path: the totals come from the loader
+        summary = summarize_days(df, self.work_dir.name + "/none", daily_steps)
+        self.assertEqual(summary["total_steps"].tolist(), [daily_steps["2025-07-01"]])
+
+    def test_upsert_and_query(self):
+        """Test that upserts only overwrite the columns they are given."""
+        self.assertTrue(
+            update_from_scored(
+                "p01", self.df, "sample", self.work_dir.name, self.db_path
+            )
+        )
+        rescored = pd.DataFrame(
+            {"anomaly_count": [4], "top_score": [0.9], "scored_by": ["window"]},
+            index=["2025-07-02"],
+        )
+        upsert("p01", rescored, self.db_path)
+
+        overview = query_overview("p01", "2025-07-02", "2025-07-31", self.db_path)
+        self.assertEqual(len(overview), 1)
+        self.assertEqual(overview[0]["anomaly_count"], 4)
+        self.assertEqual(overview[0]["scored_by"], "window")
+        # Data facts written by the first update are kept
+        self.assertEqual(overview[0]["total_steps"], 3)
+        self.assertEqual(overview[0]["hr_max"], 119)
+
+        self.assertEqual(
+            query_overview("p02", "2025-07-01", "2025-07-31", self.db_path), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+# tests/test_data_coverage.py
+
+import unittest
+import numpy as np
+import pandas as pd
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import data_coverage
+from data_loader import load_data_range
+
+
+def write_heart_rate(directory: str, day: str, hours: float):
+    """Writes one heart rate sample every 10 seconds for the first hours of day."""
+    timestamps = pd.date_range(day, periods=int(hours * 360), freq="10s", tz="UTC")
+    pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "beats per minute": 70 + np.arange(len(timestamps)) % 5,
+        }
+    ).to_csv(os.path.join(directory, f"heart_rate_{day}.csv"), index=False)
+
+
+class TestDataCoverage(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small export: two full days, one day with one hour of wear."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.export = os.path.join(self.work_dir.name, "export")
+        os.makedirs(self.export)
+        write_heart_rate(self.export, "2025-07-01", 24)
+        write_heart_rate(self.export, "2025-07-02", 1)
+        write_heart_rate(self.export, "2025-07-03", 24)
+        minutes = pd.date_range("2025-07-01", periods=3 * 1440, freq="min", tz="UTC")
+        pd.DataFrame({"timestamp": minutes, "value": 10}).to_csv(
+            os.path.join(self.export, "steps_2025-07-01.csv"), index=False
+        )
+        self.missing = os.path.join(self.work_dir.name, "missing.csv")
+
+        self.saved_dir = config.COVERAGE_INDEX_DIR
+        config.COVERAGE_INDEX_DIR = os.path.join(self.work_dir.name, "coverage")
+
+    def tearDown(self):
+        config.COVERAGE_INDEX_DIR = self.saved_dir
+        self.work_dir.cleanup()
+
+    def _load(self, min_wear_fraction=None):
+        return load_data_range(
+            self.export,
+            self.missing,
+            self.missing,
+            self.missing,
+            "2025-07-01",
+            "2025-07-03",
+            min_wear_fraction=min_wear_fraction,
+        )
+
+    def test_build_coverage_index(self):
+        """Test the per-day, per-stream facts of the index."""
+        index = data_coverage.build_coverage_index(self.export)
+        days = data_coverage.day_coverage(index, "2025-07-01", "2025-07-03")
+
+        self.assertEqual(len(index), 6, "Two streams for three days")
+        self.assertEqual(days.loc["2025-07-01", "sample_count"], 8640)
+        self.assertAlmostEqual(days.loc["2025-07-01", "wear_fraction"], 1.0)
+        self.assertAlmostEqual(days.loc["2025-07-02", "wear_fraction"], 60 / 1440)
+        self.assertAlmostEqual(days.loc["2025-07-02", "steps_wear_fraction"], 1.0)
+        self.assertEqual(days.loc["2025-07-01", "gap_count"], 0)
+        self.assertEqual(days.loc["2025-07-01", "max_gap_seconds"], 10)
+
+    def test_refresh_parses_only_changed_files(self):
+        """Test that a rebuild only re-reads new or modified files."""
+        data_coverage.build_coverage_index(self.export)
+        write_heart_rate(self.export, "2025-07-02", 12)
+        os.utime(os.path.join(self.export, "heart_rate_2025-07-02.csv"), (2e9, 2e9))
+
+        parsed = []
+        original = data_coverage.summarize_file
+        data_coverage.summarize_file = lambda path, stream: (
+            parsed.append(os.path.basename(path)) or original(path, stream)
+        )
+        try:
+            index = data_coverage.build_coverage_index(self.export)
+        finally:
+            data_coverage.summarize_file = original
+
+        self.assertEqual(parsed, ["heart_rate_2025-07-02.csv"])
+        days = data_coverage.day_coverage(index, "2025-07-02", "2025-07-02")
+        self.assertAlmostEqual(days.loc["2025-07-02", "wear_fraction"], 0.5)
+
+    def test_unchanged_export_reuses_the_stored_index(self):
+        """Test that loads and reports of an unchanged export neither parse nor rewrite."""
+        first = data_coverage.build_coverage_index(self.export)
+        path = data_coverage.index_path(self.export)
+        self.assertEqual(
+            os.listdir(config.COVERAGE_INDEX_DIR),
+            [os.path.basename(path)],
+            "No temporary file left behind",
+        )
+        written_at = os.path.getmtime(path)
+
+        original = data_coverage.summarize_file
+        data_coverage.summarize_file = lambda path, stream: self.fail("Parsed")
+        try:
+            self._load(min_wear_fraction=0.1)
+            report = data_coverage.coverage_report(
+                self.export, "2025-07-01", "2025-07-03", refresh=False
+            )
+            self.assertIs(data_coverage.load_coverage_index(self.export), first)
+        finally:
+            data_coverage.summarize_file = original
+        self.assertEqual(len(report), 3)
+        self.assertEqual(os.path.getmtime(path), written_at)
+
+    def test_load_indexes_files_added_later(self):
+        """Test that a day added after the index was built is loaded."""
+        data_coverage.build_coverage_index(self.export)
+        write_heart_rate(self.export, "2025-07-04", 24)
+        write_heart_rate(self.export, "2025-07-02", 24)
+        os.utime(os.path.join(self.export, "heart_rate_2025-07-02.csv"), (2e9, 2e9))
+
+        df = load_data_range(
+            self.export,
+            self.missing,
+            self.missing,
+            self.missing,
+            "2025-07-01",
+            "2025-07-04",
+            min_wear_fraction=0.1,
+        )
+        self.assertEqual(
+            set(df.index.strftime("%Y-%m-%d")),
+            {"2025-07-01", "2025-07-02", "2025-07-03", "2025-07-04"},
+            "New day and the grown day are loaded",
+        )
+
+    def test_load_skips_low_coverage_days(self):
+        """Test that low-coverage days are skipped and the rest are weighted."""
+        df = self._load(min_wear_fraction=0.1)
+
+        loaded_days = set(df.index.strftime("%Y-%m-%d"))
+        self.assertEqual(loaded_days, {"2025-07-01", "2025-07-03"})
+        self.assertTrue((df["coverage_weight"] == 1.0).all())
+        self.assertEqual(len(self._load()), len(df) + 360, "Without coverage")
+
+        report = data_coverage.coverage_report(
+            self.export, "2025-07-01", "2025-07-03", 0.1
+        )
+        self.assertEqual([day["skipped"] for day in report], [False, True, False])
+
+    def test_missing_steps_month_keeps_day(self):
+        """Test that a day without a steps file is loaded with 0 steps and down-weighted."""
+        os.remove(os.path.join(self.export, "steps_2025-07-01.csv"))
+        df = self._load(min_wear_fraction=0.1)
+
+        self.assertEqual(len(df), 2 * 8640)
+        self.assertTrue((df["steps"] == 0).all())
+        self.assertTrue(
+            (df["coverage_weight"] == config.COVERAGE_MISSING_STEPS_WEIGHT).all()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,12 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
-from data_loader import load_and_summarize_sleep, load_daily_hrv, load_data_range
+from data_loader import (
+    load_and_summarize_sleep,
+    load_daily_hrv,
+    load_data_range,
+    resample_data,
+)
 
 
 class TestDataLoader(unittest.TestCase):
@@ -64,6 +69,57 @@ class TestDataLoader(unittest.TestCase):
             full_df["primary_non_step_activity_stationary_bike"].iloc[0], 1.0
         )
 
+    def test_load_data_range_resolution(self):
+        """Test that a coarse resolution returns one row per bucket."""
+        full_df = load_data_range(
+            self.test_data_path,
+            self.sleep_path,
+            self.hrv_path,
+            self.questionnaire_path,
+            "2025-07-01",
+            "2025-07-01",
+            resolution="1min",
+        )
+
+        self.assertEqual(full_df.shape[0], 1)
+        self.assertEqual(full_df["heart_rate"].iloc[0], 71)
+        self.assertEqual(full_df["heart_rate_max"].iloc[0], 72)
+        # The single step reading is counted once, not once per sample
+        self.assertEqual(full_df["steps"].iloc[0], 10)
+
+        with self.assertRaises(ValueError):
+            load_data_range(
+                self.test_data_path,
+                self.sleep_path,
+                self.hrv_path,
+                self.questionnaire_path,
+                "2025-07-01",
+                "2025-07-01",
+                resolution="2min",
+            )
+
+    def test_resample_data(self):
+        """Test bucket aggregates against a pandas groupby reference."""
+        index = pd.date_range("2025-07-01", periods=600, freq="3s", tz="UTC")
+        heart_rate = pd.Series(range(600), index=index) % 37 + 60
+        df = pd.DataFrame(
+            {"heart_rate": heart_rate, "steps": 4, "hrv_rmssd": 50.0}, index=index
+        )
+
+        resampled = resample_data(df, 300)
+        expected = df["heart_rate"].resample("5min")
+
+        self.assertEqual(len(resampled), 6)
+        self.assertEqual(str(resampled.index.tz), "UTC")
+        self.assertTrue((resampled["heart_rate"] == expected.mean()).all())
+        self.assertTrue((resampled["heart_rate_min"] == expected.min()).all())
+        self.assertTrue(
+            ((resampled["heart_rate_std"] - expected.std()).abs() < 1e-9).all()
+        )
+        # Forward-filled steps are counted once per distinct minute
+        self.assertTrue((resampled["steps"] == 20).all())
+        self.assertTrue((resampled["hrv_rmssd"] == 50.0).all())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,92 @@
+# tests/test_data_sources.py
+
+import unittest
+import pandas as pd
+import os
+import shutil
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from data_loader import load_data_range
+from data_sources import required_sources
+
+
+class TestDataSources(unittest.TestCase):
+
+    def setUp(self):
+        """Build a small export with heart rate, SpO2 and resting heart rate."""
+        self.test_data_path = os.path.join(os.path.dirname(__file__), "sample_data")
+        self.export_root = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(
+            self.export_root.name, "Physical Activity_GoogleData"
+        )
+        os.makedirs(self.base_path)
+        for name in [
+            "heart_rate_2025-07-01.csv",
+            "steps_2025-07-01.csv",
+            "sleep-stages-2025.csv",
+            "daily_heart_rate_variability_summary.csv",
+            "questionnaire.csv",
+        ]:
+            shutil.copy(os.path.join(self.test_data_path, name), self.base_path)
+
+        spo2_dir = os.path.join(self.export_root.name, "Oxygen Saturation (SpO2)")
+        os.makedirs(spo2_dir)
+        with open(os.path.join(spo2_dir, "Minute SpO2 - 2025-07-01.csv"), "w") as f:
+            f.write("timestamp,value\n2025-07-01 12:00:03,97.5\n")
+        # A file outside the requested range must never be opened
+        with open(os.path.join(spo2_dir, "Minute SpO2 - 2025-07-02.csv"), "w") as f:
+            f.write("not a valid csv file\n")
+
+        with open(
+            os.path.join(self.base_path, "daily_resting_heart_rate.csv"), "w"
+        ) as f:
+            f.write("timestamp,beats per minute\n2025-07-01T00:00:00Z,61.5\n")
+
+        # An unrequested source is broken on purpose; loading it would fail
+        with open(os.path.join(self.base_path, "calories_2025-07-01.csv"), "w") as f:
+            f.write("not a valid csv file\n")
+
+    def tearDown(self):
+        self.export_root.cleanup()
+
+    def _load(self, features):
+        return load_data_range(
+            self.base_path,
+            os.path.join(self.base_path, "sleep-stages-2025.csv"),
+            os.path.join(self.base_path, "daily_heart_rate_variability_summary.csv"),
+            os.path.join(self.base_path, "questionnaire.csv"),
+            "2025-07-01",
+            "2025-07-01",
+            features=features,
+        )
+
+    def test_required_sources(self):
+        """Test that only sources providing requested features are selected."""
+        self.assertEqual(required_sources(["heart_rate", "steps"]), [])
+        self.assertEqual(required_sources(["heart_rate", "spo2"]), ["spo2"])
+
+    def test_load_data_range_with_sources(self):
+        """Test that intraday and daily sources are aligned to heart rate."""
+        full_df = self._load(["heart_rate", "spo2", "resting_heart_rate"])
+
+        self.assertEqual(full_df.shape[0], 2)
+        # 12:00:00 precedes the first SpO2 reading; 12:00:05 matches it
+        self.assertEqual(full_df["spo2"].tolist(), [0.0, 97.5])
+        self.assertEqual(full_df["resting_heart_rate"].tolist(), [61.5, 61.5])
+        self.assertNotIn("calories", full_df.columns)
+
+    def test_load_data_range_without_sources(self):
+        """Test that heart-rate-only requests do not read any extra source."""
+        full_df = self._load(["heart_rate", "steps"])
+
+        self.assertNotIn("spo2", full_df.columns)
+        self.assertNotIn("resting_heart_rate", full_df.columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# tests/test_evaluation.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import evaluation
+from anomaly_store import query_anomalies
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        """Write one day of synthetic data and point config at it."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(config.RANDOM_STATE)
+
+        timestamps = pd.date_range("2025-07-01", periods=3000, freq="5s")
+        heart_rate = rng.normal(70, 4, len(timestamps)).round()
+        heart_rate[1500] = 200  # Above the deterministic threshold
+        pd.DataFrame({"timestamp": timestamps, "beats per minute": heart_rate}).to_csv(
+            os.path.join(self.work_dir.name, "heart_rate_2025-07-01.csv"), index=False
+        )
+        pd.DataFrame({"timestamp": timestamps[::12], "value": 5}).to_csv(
+            os.path.join(self.work_dir.name, "steps_2025-07-01.csv"), index=False
+        )
+
+        self.original_settings = (
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            config.EVALUATION_RESULTS_PATH,
+            config.ANOMALY_STORE_DB,
+        )
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+        config.BASE_PATH = self.work_dir.name
+        config.SLEEP_PATH = config.HRV_PATH = config.QUESTIONNAIRE_PATH = missing
+        config.EVALUATION_RESULTS_PATH = os.path.join(
+            self.work_dir.name, "results.parquet"
+        )
+        config.ANOMALY_STORE_DB = os.path.join(self.work_dir.name, "store.sqlite")
+
+    def tearDown(self):
+        (
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            config.EVALUATION_RESULTS_PATH,
+            config.ANOMALY_STORE_DB,
+        ) = self.original_settings
+        self.work_dir.cleanup()
+
+    def test_run_evaluation(self):
+        """Test that all registered models run and share one result set."""
+        result_set = evaluation.run_evaluation(
+            "2025-07-01", "2025-07-01", max_workers=2
+        )
+
+        self.assertEqual(
+            set(result_set["model"]), set(evaluation.DETECTORS), "All models ran"
+        )
+        saved = pd.read_parquet(config.EVALUATION_RESULTS_PATH)
+        self.assertEqual(len(saved), len(result_set))
+        self.assertEqual(
+            saved.attrs,
+            {
+                "participant_id": config.DEFAULT_PARTICIPANT_ID,
+                "start_date": "2025-07-01",
+                "end_date": "2025-07-01",
+            },
+        )
+
+        deterministic = saved[saved["model"] == "Deterministic"]
+        self.assertIn(1500, deterministic["row"].tolist())
+
+        forest = saved[saved["model"] == "Simple_Isolation_Forest"]
+        self.assertGreater(len(forest), 0)
+        self.assertTrue((forest["anomaly_score"] > 0).all())
+
+        stored = query_anomalies(
+            config.DEFAULT_PARTICIPANT_ID,
+            model="Simple_Isolation_Forest",
+            limit=len(forest) + 1,
+        )
+        self.assertEqual(len(stored), len(forest), "Anomalies are stored")
+
+    def test_feature_matrix_keeps_declared_order(self):
+        """Test that each detector gets its columns in the order it declared."""
+        df = pd.DataFrame({"heart_rate": [70.0, 80.0], "steps": [1.0, 2.0]})
+        matrix, indices = evaluation._build_feature_matrix(
+            df, {"a": ["heart_rate", "steps"], "b": ["steps", "heart_rate"]}
+        )
+
+        for name, features in [
+            ("a", ["heart_rate", "steps"]),
+            ("b", ["steps", "heart_rate"]),
+        ]:
+            np.testing.assert_array_equal(
+                evaluation._column_view(matrix, indices[name]), df[features]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+# tests/test_incremental.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+from daily_summary import query_overview
+from data_loader import load_data_range
+from feature_engineering import create_features
+from incremental import (
+    initialize_state,
+    load_state,
+    population_stability_index,
+    run_incremental,
+)
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        """Write three days of synthetic heart rate and steps data."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.work_dir.name, "export")
+        self.state_dir = os.path.join(self.work_dir.name, "state")
+        os.makedirs(self.base_path)
+
+        rng = np.random.default_rng(config.RANDOM_STATE)
+        for day in ["2025-07-01", "2025-07-02", "2025-07-03"]:
+            timestamps = pd.date_range(f"{day} 00:00:00", periods=2000, freq="10s")
+            pd.DataFrame(
+                {
+                    "timestamp": timestamps,
+                    "beats per minute": rng.normal(70, 5, len(timestamps)).round(),
+                }
+            ).to_csv(os.path.join(self.base_path, f"heart_rate_{day}.csv"), index=False)
+
+        minutes = pd.date_range(
+            "2025-07-01", "2025-07-04", freq="min", inclusive="left"
+        )
+        pd.DataFrame(
+            {"timestamp": minutes, "value": rng.integers(0, 30, len(minutes))}
+        ).to_csv(os.path.join(self.base_path, "steps_2025-07-01.csv"), index=False)
+
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+        self.paths = {
+            "base_path": self.base_path,
+            "sleep_path": missing,
+            "hrv_path": missing,
+            "questionnaire_path": missing,
+        }
+
+        self.original_summary_db = config.DAILY_SUMMARY_DB
+        config.DAILY_SUMMARY_DB = os.path.join(self.work_dir.name, "summary.sqlite")
+
+    def tearDown(self):
+        config.DAILY_SUMMARY_DB = self.original_summary_db
+        self.work_dir.cleanup()
+
+    def test_incremental_matches_full_features(self):
+        """Test that new days are scored with features continued from the tail."""
+        initialize_state(self.state_dir, "2025-07-01", "2025-07-02", self.paths)
+        result = run_incremental(self.state_dir, "2025-07-03", self.paths)
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["days_ingested"], 1)
+        self.assertEqual(load_state(self.state_dir)["last_date"], "2025-07-03")
+
+        full_df = load_data_range(
+            self.base_path,
+            self.paths["sleep_path"],
+            self.paths["hrv_path"],
+            self.paths["questionnaire_path"],
+            "2025-07-01",
+            "2025-07-03",
+        )
+        full_featured = create_features(full_df, config.ROLLING_WINDOW_SIZE)
+        expected = full_featured.loc["2025-07-03", "hr_rolling_avg"]
+
+        flagged = result["anomalies"]
+        self.assertGreater(len(flagged), 0)
+        np.testing.assert_allclose(
+            flagged["hr_rolling_avg"], expected.loc[flagged.index]
+        )
+
+        # The scored day is added to the daily summary index
+        overview = query_overview("state", "2025-07-01", "2025-07-31")
+        self.assertEqual([day["date"] for day in overview], ["2025-07-03"])
+        self.assertEqual(overview[0]["anomaly_count"], len(flagged))
+        self.assertEqual(overview[0]["scored_by"], "incremental")
+
+        # Nothing new to ingest on a second run, reported with the same keys
+        up_to_date = run_incremental(self.state_dir, "2025-07-03", self.paths)
+        self.assertEqual(up_to_date["status"], "up_to_date")
+        self.assertEqual(set(up_to_date), set(result))
+        self.assertEqual(up_to_date["rows_scored"], 0)
+
+    def test_population_stability_index(self):
+        """Test that PSI is near zero for the same distribution and large for a shift."""
+        rng = np.random.default_rng(0)
+        reference = rng.normal(0, 1, 5000)
+        self.assertLess(
+            population_stability_index(reference, rng.normal(0, 1, 5000)), 0.05
+        )
+        self.assertGreater(
+            population_stability_index(reference, rng.normal(2, 1, 5000)), 1.0
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
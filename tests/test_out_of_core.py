@@ -0,0 +1,155 @@
+# tests/test_out_of_core.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+from data_loader import load_data_range
+from feature_engineering import create_features
+from anomaly_store import list_runs, query_anomalies
+from out_of_core import fill_reservoir, run_out_of_core
+from pipeline import run_out_of_core_pipeline
+
+
+class TestOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        """Write six days across a month boundary with one heart rate spike."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(config.RANDOM_STATE)
+
+        for day in pd.date_range("2025-06-28", "2025-07-03"):
+            timestamps = pd.date_range(day, periods=2880, freq="30s")
+            heart_rate = rng.normal(70, 4, len(timestamps)).round()
+            if day == pd.Timestamp("2025-07-02"):
+                heart_rate[1000:1004] = 190
+            pd.DataFrame(
+                {"timestamp": timestamps, "beats per minute": heart_rate}
+            ).to_csv(
+                os.path.join(
+                    self.work_dir.name, f"heart_rate_{day.strftime('%Y-%m-%d')}.csv"
+                ),
+                index=False,
+            )
+        for month, start, end in [
+            ("2025-06-01", "2025-06-28", "2025-07-01"),
+            ("2025-07-01", "2025-07-01", "2025-07-04"),
+        ]:
+            minutes = pd.date_range(start, end, freq="min", inclusive="left")
+            pd.DataFrame(
+                {"timestamp": minutes, "value": rng.integers(0, 30, len(minutes))}
+            ).to_csv(
+                os.path.join(self.work_dir.name, f"steps_{month}.csv"), index=False
+            )
+
+        self.original_settings = (
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            config.DAILY_SUMMARY_DB,
+            config.OUT_OF_CORE_MEMORY_BUDGET_MB,
+        )
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+        config.BASE_PATH = self.work_dir.name
+        config.SLEEP_PATH = config.HRV_PATH = config.QUESTIONNAIRE_PATH = missing
+        config.DAILY_SUMMARY_DB = os.path.join(self.work_dir.name, "summary.sqlite")
+        # Small enough that every chunk is a single day
+        config.OUT_OF_CORE_MEMORY_BUDGET_MB = 1
+
+    def tearDown(self):
+        (
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            config.DAILY_SUMMARY_DB,
+            config.OUT_OF_CORE_MEMORY_BUDGET_MB,
+        ) = self.original_settings
+        self.work_dir.cleanup()
+
+    def test_fill_reservoir(self):
+        """Test that the reservoir fills first, then samples the whole stream."""
+        rng = np.random.default_rng(0)
+        reservoir = np.empty((100, 1))
+        seen = fill_reservoir(reservoir, 0, np.arange(60.0)[:, None], rng)
+        self.assertEqual(seen, 60)
+        np.testing.assert_array_equal(reservoir[:60, 0], np.arange(60.0))
+
+        for start in range(60, 10_000, 500):
+            rows = np.arange(start, min(start + 500, 10_000), dtype=float)[:, None]
+            seen = fill_reservoir(reservoir, seen, rows, rng)
+        self.assertEqual(seen, 10_000)
+        self.assertEqual(len(np.unique(reservoir)), 100)
+        # A uniform sample of 0..9999 has a mean near 5000
+        self.assertLess(abs(reservoir.mean() - 5000), 1000)
+
+    def test_run_out_of_core(self):
+        """Test chunked scoring against features computed in one piece."""
+        result = run_out_of_core("2025-06-28", "2025-07-03", top_k=10)
+
+        self.assertEqual(result["chunks"], 6)
+        self.assertEqual(result["rows_scored"], 6 * 2880)
+
+        top_anomalies = result["top_anomalies"]
+        self.assertEqual(len(top_anomalies), 10)
+        self.assertTrue(top_anomalies["anomaly_score"].is_monotonic_decreasing)
+        self.assertIn(190, top_anomalies["heart_rate"].tolist())
+
+        # Rolling features carried over between chunks match a single pass
+        full_df = load_data_range(
+            config.BASE_PATH,
+            config.SLEEP_PATH,
+            config.HRV_PATH,
+            config.QUESTIONNAIRE_PATH,
+            "2025-06-28",
+            "2025-07-03",
+        )
+        expected = create_features(full_df, config.ROLLING_WINDOW_SIZE)
+        np.testing.assert_allclose(
+            top_anomalies["hr_rolling_avg"],
+            expected.loc[top_anomalies.index, "hr_rolling_avg"],
+        )
+
+    def test_pipeline_records_top_anomalies(self):
+        """Test that an out-of-core analysis is kept in the anomaly store."""
+        saved = (
+            config.ANOMALY_STORE_DB,
+            config.GOOGLE_API_KEY,
+            config.OUT_OF_CORE_TOP_K,
+        )
+        self.addCleanup(self._restore_store_settings, saved)
+        config.ANOMALY_STORE_DB = os.path.join(self.work_dir.name, "store.sqlite")
+        config.GOOGLE_API_KEY = None
+        config.OUT_OF_CORE_TOP_K = 10
+
+        result = run_out_of_core_pipeline("2025-06-28", "2025-07-03", "heart_rate")
+
+        self.assertEqual(result["status"], "success")
+        runs = list_runs(config.DEFAULT_PARTICIPANT_ID)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]["source"], "out_of_core")
+        self.assertEqual(runs[0]["params"]["top_k"], 10)
+        self.assertEqual(runs[0]["params"]["memory_budget_mb"], 1)
+        stored = query_anomalies(config.DEFAULT_PARTICIPANT_ID)
+        self.assertEqual(len(stored), 10)
+        self.assertEqual(sum(a["explanation"] is not None for a in stored), 5)
+
+    def _restore_store_settings(self, saved):
+        (
+            config.ANOMALY_STORE_DB,
+            config.GOOGLE_API_KEY,
+            config.OUT_OF_CORE_TOP_K,
+        ) = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+# tests/test_performance.py
+#
+# Performance regression tests for the hot path. Each case runs on generated
+# input of a fixed size and must keep its throughput (rows per second) and
+# peak traced memory within a tolerance of tests/performance_baseline.json.
+#
+# Refresh the baseline after an intended change, on the machine that runs
+# the suite:
+#     python tests/test_performance.py --update-baseline
+
+import unittest
+import json
+import numpy as np
+import pandas as pd
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+from anomaly_model import detect_anomalies
+from data_loader import load_data_range
+from feature_engineering import create_features
+from models import run_deterministic_model
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "performance_baseline.json")
+# A case fails if it is slower than this fraction of the baseline throughput...
+RATE_TOLERANCE = 0.5
+# ...or if its peak memory grows beyond this multiple of the baseline
+MEMORY_TOLERANCE = 1.25
+# Throughput is the best of several runs to smooth out scheduling noise
+REPEATS = 3
+
+EXPORT_DAYS = 3
+SAMPLE_SECONDS = 2
+FRAME_ROWS = 200_000
+# The forest is much slower per row, so it runs on a smaller frame
+DETECT_ROWS = 50_000
+
+
+def generated_frame(rows: int) -> pd.DataFrame:
+    """A deterministic frame shaped like the output of load_data_range."""
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    index = pd.date_range("2025-07-01", periods=rows, freq=f"{SAMPLE_SECONDS}s")
+    heart_rate = rng.normal(72, 8, rows).round()
+    heart_rate[rng.choice(rows, rows // 1000, replace=False)] = 190
+    return pd.DataFrame(
+        {
+            "heart_rate": heart_rate.astype(int),
+            "steps": rng.integers(0, 30, rows),
+            "sleep_deep_minutes": 60.0,
+            "hrv_rmssd": 45.0,
+        },
+        index=index,
+    )
+
+
+def write_export(directory: str):
+    """Writes EXPORT_DAYS days of heart rate and a monthly steps file."""
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    for day in pd.date_range("2025-07-01", periods=EXPORT_DAYS):
+        timestamps = pd.date_range(
+            day, periods=86_400 // SAMPLE_SECONDS, freq=f"{SAMPLE_SECONDS}s"
+        )
+        pd.DataFrame(
+            {
+                "timestamp": timestamps,
+                "beats per minute": rng.normal(72, 8, len(timestamps)).round(),
+            }
+        ).to_csv(
+            os.path.join(directory, f"heart_rate_{day.strftime('%Y-%m-%d')}.csv"),
+            index=False,
+        )
+    minutes = pd.date_range("2025-07-01", periods=EXPORT_DAYS * 1440, freq="min")
+    pd.DataFrame(
+        {"timestamp": minutes, "value": rng.integers(0, 30, len(minutes))}
+    ).to_csv(os.path.join(directory, "steps_2025-07-01.csv"), index=False)
+
+
+def _load_case(directory: str):
+    missing = os.path.join(directory, "missing.csv")
+    return lambda: load_data_range(
+        directory, missing, missing, missing, "2025-07-01", "2025-07-03"
+    )
+
+
+def _features_case(directory: str):
+    df = generated_frame(FRAME_ROWS)
+    return lambda: create_features(df.copy(), config.ROLLING_WINDOW_SIZE)
+
+
+def _deterministic_case(directory: str):
+    df = generated_frame(FRAME_ROWS)
+    return lambda: run_deterministic_model(df.copy())
+
+
+def _detect_case(directory: str):
+    df = create_features(generated_frame(DETECT_ROWS), config.ROLLING_WINDOW_SIZE)
+    return lambda: detect_anomalies(
+        df.copy(),
+        config.FEATURES,
+        config.ISOLATION_FOREST_CONTAMINATION,
+        config.RANDOM_STATE,
+        "heart_rate",
+    )
+
+
+# Case name -> (builder returning the timed callable, rows processed per call)
+CASES = {
+    "load_data_range": (_load_case, EXPORT_DAYS * 86_400 // SAMPLE_SECONDS),
+    "create_features": (_features_case, FRAME_ROWS),
+    "run_deterministic_model": (_deterministic_case, FRAME_ROWS),
+    "detect_anomalies": (_detect_case, DETECT_ROWS),
+}
+
+
+def measure(name: str, directory: str) -> dict:
+    """Measures the best throughput and the peak traced memory of a case."""
+    build, rows = CASES[name]
+    run = build(directory)
+
+    durations = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+
+    # tracemalloc slows Python down, so memory is measured on a separate run
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "rows_per_second": round(rows / min(durations)),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def update_baseline():
+    """Re-measures every case and overwrites the checked-in baseline."""
+    import sklearn
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_export(directory)
+        baseline = {
+            "_environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "scikit-learn": sklearn.__version__,
+            }
+        }
+        for name in CASES:
+            print(f"Measuring {name}...")
+            baseline[name] = measure(name, directory)
+
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    print(f"Baseline written to '{BASELINE_PATH}'.")
+
+
+class TestPerformance(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the baseline and write the generated export once."""
+        with open(BASELINE_PATH) as f:
+            cls.baseline = json.load(f)
+        cls.work_dir = tempfile.TemporaryDirectory()
+        write_export(cls.work_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.work_dir.cleanup()
+
+    def _check(self, name: str):
+        if name not in self.baseline:
+            self.skipTest(f"No baseline for '{name}'. Run with --update-baseline.")
+        expected = self.baseline[name]
+        measured = measure(name, self.work_dir.name)
+
+        self.assertEqual(measured["rows"], expected["rows"], "Input size changed")
+        self.assertGreaterEqual(
+            measured["rows_per_second"],
+            expected["rows_per_second"] * RATE_TOLERANCE,
+            f"{name} throughput regressed: {measured['rows_per_second']:.0f} "
+            f"rows/s vs baseline {expected['rows_per_second']:.0f}",
+        )
+        self.assertLessEqual(
+            measured["peak_mb"],
+            expected["peak_mb"] * MEMORY_TOLERANCE,
+            f"{name} peak memory regressed: {measured['peak_mb']:.1f} MB "
+            f"vs baseline {expected['peak_mb']:.1f} MB",
+        )
+
+    def test_load_data_range(self):
+        """Test load_data_range throughput and memory on a generated export."""
+        self._check("load_data_range")
+
+    def test_create_features(self):
+        """Test create_features throughput and memory."""
+        self._check("create_features")
+
+    def test_run_deterministic_model(self):
+        """Test run_deterministic_model throughput and memory."""
+        self._check("run_deterministic_model")
+
+    def test_detect_anomalies(self):
+        """Test detect_anomalies throughput and memory."""
+        self._check("detect_anomalies")
+
+
+if __name__ == "__main__":
+    if "--update-baseline" in sys.argv:
+        update_baseline()
+    else:
+        unittest.main()
@@ -0,0 +1,80 @@
+# tests/test_profiler.py
+
+import unittest
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        """Point the profiler at a temporary output directory."""
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.original_settings = (
+            config.PROFILING_OUTPUT_DIR,
+            config.PROFILING_ENABLED,
+            config.PROFILING_SAMPLE_RATE,
+            config.PROFILING_MIN_INTERVAL_SECONDS,
+        )
+        config.PROFILING_OUTPUT_DIR = self.output_dir.name
+        profiler._last_profile_time = 0.0
+
+    def tearDown(self):
+        (
+            config.PROFILING_OUTPUT_DIR,
+            config.PROFILING_ENABLED,
+            config.PROFILING_SAMPLE_RATE,
+            config.PROFILING_MIN_INTERVAL_SECONDS,
+        ) = self.original_settings
+        self.output_dir.cleanup()
+
+    def test_run_profiled_writes_reports(self):
+        """Test that a profiled call returns its result and writes all reports."""
+        result = profiler.run_profiled(
+            sorted, {"start": "2025-07-01", "end": "2025-07-02"}, [3, 1, 2]
+        )
+
+        self.assertEqual(result, [1, 2, 3])
+        report_files = os.listdir(self.output_dir.name)
+        for suffix in [".prof", ".collapsed", ".alloc.txt", ".summary.txt"]:
+            self.assertTrue(
+                any(name.endswith(suffix) for name in report_files),
+                f"Missing '{suffix}' report",
+            )
+        self.assertTrue(any("start-2025-07-01" in name for name in report_files))
+
+    def test_report_failure_keeps_result(self):
+        """Test that an unwritable output directory does not lose the result."""
+        blocker = os.path.join(self.output_dir.name, "not_a_directory")
+        open(blocker, "w").close()
+        config.PROFILING_OUTPUT_DIR = blocker
+
+        self.assertEqual(profiler.run_profiled(sorted, {}, [2, 1]), [1, 2])
+
+    def test_should_profile_respects_limits(self):
+        """Test the config flag, sampling rate and minimum interval."""
+        config.PROFILING_ENABLED = False
+        self.assertFalse(profiler.should_profile())
+        self.assertTrue(profiler.should_profile(force=True))
+
+        config.PROFILING_ENABLED = True
+        config.PROFILING_SAMPLE_RATE = 1.0
+        config.PROFILING_MIN_INTERVAL_SECONDS = 3600
+        self.assertTrue(profiler.should_profile())
+
+        # A profile has just run, so the interval blocks even forced requests
+        profiler.run_profiled(sorted, {}, [1])
+        self.assertFalse(profiler.should_profile())
+        self.assertFalse(profiler.should_profile(force=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
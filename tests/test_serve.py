@@ -0,0 +1,135 @@
+# tests/test_serve.py
+
+import unittest
+import json
+import numpy as np
+import pandas as pd
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from serve import freeze_shared_state
+
+SERVER_SCRIPT = """
+import sys
+sys.path.insert(0, {project_root!r})
+import config
+config.INCREMENTAL_STATE_ROOT = {state_root!r}
+config.DAILY_SUMMARY_DB = {db_path!r}
+import serve
+serve.RESTART_DELAY_SECONDS = {restart_delay}
+serve.serve("127.0.0.1", {port}, 2)
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestServe(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty state root and a summary database location."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.state_root = os.path.join(self.work_dir.name, "state")
+        os.makedirs(self.state_root)
+        self.db_path = os.path.join(self.work_dir.name, "daily_summary.sqlite")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_freeze_shared_state(self):
+        """Test that preloaded reference scores become read-only."""
+        state = {
+            "reference_scores": np.zeros(100),
+            "tail": pd.DataFrame({"heart_rate": np.arange(10)}),
+            "model": None,
+        }
+        shared_bytes = freeze_shared_state({"p01": (0.0, state)})
+
+        self.assertGreaterEqual(shared_bytes, 800)
+        with self.assertRaises(ValueError):
+            state["reference_scores"][0] = 1.0
+
+    def _start_server(self, restart_delay: float = 1.0):
+        """Starts serve.py in a subprocess and waits until it is ready."""
+        port = free_port()
+        script = SERVER_SCRIPT.format(
+            project_root=project_root,
+            state_root=self.state_root,
+            db_path=self.db_path,
+            port=port,
+            restart_delay=restart_delay,
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-c", script],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        status = None
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/ready", timeout=5
+                ) as response:
+                    status = json.load(response)["status"]
+                break
+            except OSError:
+                time.sleep(0.2)
+        return server, status
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Pre-fork serving needs os.fork")
+    def test_workers_serve_and_stop_on_sigterm(self):
+        """Test that forked workers answer requests and SIGTERM stops them all."""
+        server, status = self._start_server()
+        try:
+            self.assertEqual(status, "ready")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            return_code = server.wait(timeout=30)
+        self.assertEqual(return_code, 0)
+
+    @unittest.skipUnless(
+        os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children"),
+        "Needs the worker PIDs from /proc",
+    )
+    def test_sigterm_during_restart_delay(self):
+        """Test that a stop signal while a worker is being restarted still exits."""
+        server, status = self._start_server(restart_delay=2.0)
+        try:
+            self.assertEqual(status, "ready")
+            with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+                workers = [int(pid) for pid in f.read().split()]
+            os.kill(workers[0], signal.SIGKILL)
+            time.sleep(0.5)
+        finally:
+            server.send_signal(signal.SIGTERM)
+        try:
+            return_code = server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+                workers += [int(pid) for pid in f.read().split()]
+            server.kill()
+            for pid in workers:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            raise
+        self.assertEqual(return_code, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# tests/test_streaming.py
+
+import unittest
+import numpy as np
+import pandas as pd
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import streaming
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        """Create six hours of resting heart rate with three injected spikes."""
+        rng = np.random.default_rng(7)
+        self.timestamps = pd.date_range(
+            "2025-07-01", periods=6 * 720, freq="5s", tz="UTC"
+        )
+        self.heart_rate = rng.normal(65, 3, len(self.timestamps)).round()
+        self.spikes = [1500, 2600, 3900]
+        self.heart_rate[self.spikes] = 160
+        self.steps = np.zeros(len(self.timestamps), dtype=int)
+
+    def test_push_flags_spikes(self):
+        """Test that the injected spikes are flagged with high z-scores."""
+        anomalies = streaming.push(
+            streaming.new_state(), self.timestamps, self.heart_rate, self.steps
+        )
+
+        flagged = set(anomalies.index)
+        for position in self.spikes:
+            self.assertIn(self.timestamps[position], flagged)
+        self.assertTrue((anomalies["z_score"] > 0).all())
+        self.assertLess(len(anomalies), 0.01 * len(self.timestamps))
+
+    def test_micro_batches_match_single_push(self):
+        """Test that splitting the stream into micro-batches changes nothing."""
+        state = streaming.new_state()
+        expected = streaming.push(state, self.timestamps, self.heart_rate, self.steps)
+
+        batched_state = streaming.new_state()
+        batches = [
+            streaming.push(
+                batched_state,
+                self.timestamps[batch],
+                self.heart_rate[batch],
+                self.steps[batch],
+            )
+            for batch in np.array_split(np.arange(len(self.timestamps)), 97)
+        ]
+        pd.testing.assert_frame_equal(pd.concat(batches), expected)
+        self.assertEqual(batched_state, state)
+
+    def test_checkpoint_resume(self):
+        """Test that a saved and reloaded state continues identically."""
+        half = len(self.timestamps) // 2
+        state = streaming.new_state()
+        streaming.push(
+            state, self.timestamps[:half], self.heart_rate[:half], self.steps[:half]
+        )
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, "monitor.json")
+            streaming.save_state(state, path)
+            resumed = streaming.load_state(path)
+
+        rest = slice(half, None)
+        args = (self.timestamps[rest], self.heart_rate[rest], self.steps[rest])
+        pd.testing.assert_frame_equal(
+            streaming.push(resumed, *args), streaming.push(state, *args)
+        )
+
+    def test_resent_samples_are_ignored(self):
+        """Test that samples at or before the last pushed timestamp are skipped."""
+        state = streaming.new_state()
+        streaming.push(state, self.timestamps, self.heart_rate, self.steps)
+        anomalies = streaming.push(state, self.timestamps, self.heart_rate, self.steps)
+
+        self.assertTrue(anomalies.empty)
+        self.assertEqual(state["samples_seen"], len(self.timestamps))
+
+
+if __name__ == "__main__":
+    unittest.main()
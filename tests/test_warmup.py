@@ -0,0 +1,64 @@
+# tests/test_warmup.py
+
+import unittest
+import os
+import sys
+import tempfile
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import incremental
+import warmup
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        """Initialize the incremental state of one participant from the sample data."""
+        self.test_data_path = os.path.join(os.path.dirname(__file__), "sample_data")
+        self.state_root = tempfile.TemporaryDirectory()
+        self.state_dir = os.path.join(self.state_root.name, "participant_01")
+        incremental.initialize_state(
+            self.state_dir,
+            "2025-07-01",
+            "2025-07-01",
+            {
+                "base_path": self.test_data_path,
+                "sleep_path": os.path.join(
+                    self.test_data_path, "sleep-stages-2025.csv"
+                ),
+                "hrv_path": os.path.join(
+                    self.test_data_path, "daily_heart_rate_variability_summary.csv"
+                ),
+                "questionnaire_path": os.path.join(
+                    self.test_data_path, "questionnaire.csv"
+                ),
+            },
+        )
+        self.original_root = config.INCREMENTAL_STATE_ROOT
+        config.INCREMENTAL_STATE_ROOT = self.state_root.name
+        incremental._state_cache.clear()
+        warmup._ready.clear()
+
+    def tearDown(self):
+        config.INCREMENTAL_STATE_ROOT = self.original_root
+        self.state_root.cleanup()
+
+    def test_warm_up_preloads_states(self):
+        """Test that warm-up caches recent participants and flips readiness."""
+        self.assertFalse(warmup.is_ready())
+        self.assertEqual(
+            warmup.recent_state_dirs(self.state_root.name, 5), [self.state_dir]
+        )
+
+        warmup.warm_up()
+
+        self.assertTrue(warmup.is_ready())
+        self.assertIn(self.state_dir, incremental._state_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
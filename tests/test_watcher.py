@@ -0,0 +1,207 @@
+# tests/test_watcher.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import config
+import data_loader
+import watcher
+from anomaly_store import query_anomalies
+from incremental import initialize_state, load_state
+
+
+def write_heart_rate(base_path: str, day: str, rng, periods: int = 2000):
+    timestamps = pd.date_range(f"{day} 00:00:00", periods=periods, freq="10s")
+    pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "beats per minute": rng.normal(70, 5, len(timestamps)).round(),
+        }
+    ).to_csv(os.path.join(base_path, f"heart_rate_{day}.csv"), index=False)
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        """Write two days of data and initialize a participant on them."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.work_dir.name, "export")
+        self.state_root = os.path.join(self.work_dir.name, "state")
+        os.makedirs(self.base_path)
+
+        self.rng = np.random.default_rng(config.RANDOM_STATE)
+        for day in ["2025-07-01", "2025-07-02"]:
+            write_heart_rate(self.base_path, day, self.rng)
+        minutes = pd.date_range(
+            "2025-07-01", "2025-07-04", freq="min", inclusive="left"
+        )
+        pd.DataFrame(
+            {"timestamp": minutes, "value": self.rng.integers(0, 30, len(minutes))}
+        ).to_csv(os.path.join(self.base_path, "steps_2025-07-01.csv"), index=False)
+
+        missing = os.path.join(self.work_dir.name, "missing.csv")
+        self.paths = {
+            "base_path": self.base_path,
+            "sleep_path": missing,
+            "hrv_path": missing,
+            "questionnaire_path": missing,
+        }
+
+        self.original_settings = (
+            config.DAILY_SUMMARY_DB,
+            config.ANOMALY_STORE_DB,
+            config.COVERAGE_INDEX_DIR,
+            config.PARSED_CACHE_DIR,
+            config.WATCH_DEBOUNCE_SECONDS,
+        )
+        config.PARSED_CACHE_DIR = os.path.join(self.work_dir.name, "parsed")
+        config.DAILY_SUMMARY_DB = os.path.join(self.work_dir.name, "summary.sqlite")
+        config.ANOMALY_STORE_DB = os.path.join(self.work_dir.name, "store.sqlite")
+        config.COVERAGE_INDEX_DIR = os.path.join(self.work_dir.name, "coverage")
+
+    def tearDown(self):
+        (
+            config.DAILY_SUMMARY_DB,
+            config.ANOMALY_STORE_DB,
+            config.COVERAGE_INDEX_DIR,
+            config.PARSED_CACHE_DIR,
+            config.WATCH_DEBOUNCE_SECONDS,
+        ) = self.original_settings
+        self.work_dir.cleanup()
+
+    def test_poll_debounces_partial_writes(self):
+        """Test that a file is reported once it has stopped changing."""
+        config.WATCH_DEBOUNCE_SECONDS = 10
+        watch = watcher.new_watch(self.paths)
+        self.assertEqual(watcher.poll(watch, self.paths, now=0), {})
+
+        path = os.path.join(self.base_path, "heart_rate_2025-07-03.csv")
+        write_heart_rate(self.base_path, "2025-07-03", self.rng, periods=100)
+        self.assertEqual(watcher.poll(watch, self.paths, now=1), {})
+        # Still being written: the quiet period restarts
+        write_heart_rate(self.base_path, "2025-07-03", self.rng)
+        os.utime(path, (2e9, 2e9))
+        self.assertEqual(watcher.poll(watch, self.paths, now=8), {})
+        self.assertEqual(watcher.poll(watch, self.paths, now=15), {})
+
+        changes = watcher.poll(watch, self.paths, now=18)
+        self.assertEqual(list(changes), [path])
+        self.assertEqual(watcher.poll(watch, self.paths, now=30), {}, "Ingesting")
+        watcher.finish_ingest(watch, changes, succeeded=True, now=31)
+        self.assertEqual(watcher.poll(watch, self.paths, now=50), {})
+
+    def test_poll_waits_for_the_whole_export(self):
+        """Test that a day's files are reported together once all are quiet."""
+        config.WATCH_DEBOUNCE_SECONDS = 10
+        watch = watcher.new_watch(self.paths)
+        steps_path = os.path.join(self.base_path, "steps_2025-07-01.csv")
+
+        write_heart_rate(self.base_path, "2025-07-03", self.rng)
+        self.assertEqual(watcher.poll(watch, self.paths, now=0), {})
+        # The steps file of the month is still being appended to
+        os.utime(steps_path, (2e9, 2e9))
+        self.assertEqual(watcher.poll(watch, self.paths, now=8), {})
+        self.assertEqual(watcher.poll(watch, self.paths, now=12), {})
+
+        changes = watcher.poll(watch, self.paths, now=18)
+        self.assertEqual(
+            list(changes),
+            sorted(
+                [os.path.join(self.base_path, "heart_rate_2025-07-03.csv"), steps_path]
+            ),
+        )
+
+    def test_failed_ingest_is_retried(self):
+        """Test that files of a failed ingest are reported again."""
+        config.WATCH_DEBOUNCE_SECONDS = 10
+        watch = watcher.new_watch(self.paths)
+        write_heart_rate(self.base_path, "2025-07-03", self.rng)
+        watcher.poll(watch, self.paths, now=0)
+        changes = watcher.poll(watch, self.paths, now=10)
+        self.assertEqual(len(changes), 1)
+
+        watcher.finish_ingest(watch, changes, succeeded=False, now=12)
+        self.assertEqual(watcher.poll(watch, self.paths, now=15), {})
+        self.assertEqual(watcher.poll(watch, self.paths, now=22), changes)
+
+    def test_run_watcher_ingests_new_day(self):
+        """Test that a new day is scored and stored while the watcher runs."""
+        config.WATCH_DEBOUNCE_SECONDS = 0.2
+        state_dir = os.path.join(self.state_root, "p1")
+        initialize_state(state_dir, "2025-07-01", "2025-07-02", self.paths)
+
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watcher.run_watcher, args=(self.state_root, 0.05, stop)
+        )
+        thread.start()
+        try:
+            time.sleep(0.5)
+            write_heart_rate(self.base_path, "2025-07-03", self.rng)
+            deadline = time.time() + 30
+            while load_state(state_dir)["last_date"] != "2025-07-03":
+                self.assertLess(time.time(), deadline, "New day was not ingested")
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            thread.join()
+
+        stored = query_anomalies("p1", model=watcher.INCREMENTAL_MODEL, limit=1000)
+        self.assertGreater(len(stored), 0)
+        self.assertTrue(all(a["timestamp"].startswith("2025-07-03") for a in stored))
+        self.assertTrue(os.listdir(config.COVERAGE_INDEX_DIR), "Coverage indexed")
+        self.assertTrue(os.listdir(config.PARSED_CACHE_DIR), "Parsed files cached")
+
+    def _load(self):
+        return data_loader.load_data_range(
+            *self.paths.values(), "2025-07-01", "2025-07-02"
+        )
+
+    def test_loads_read_the_parsed_cache(self):
+        """Test that cached days skip the CSV parser until their file changes."""
+        expected = self._load()
+        changed = [
+            os.path.join(self.base_path, name)
+            for name in [
+                "heart_rate_2025-07-01.csv",
+                "heart_rate_2025-07-02.csv",
+                "steps_2025-07-01.csv",
+            ]
+        ]
+        self.assertEqual(
+            data_loader.cache_parsed_files(self.base_path, changed), 2 + 31
+        )
+
+        parsed = []
+        read_csv, read_csvs = data_loader.read_csv, data_loader.read_csvs
+        data_loader.read_csv = lambda path, **kwargs: (
+            parsed.append(path) or read_csv(path, **kwargs)
+        )
+        data_loader.read_csvs = lambda paths, **kwargs: (
+            parsed.extend(paths) or read_csvs(paths, **kwargs)
+        )
+        try:
+            cached = self._load()
+        finally:
+            data_loader.read_csv, data_loader.read_csvs = read_csv, read_csvs
+        self.assertFalse([p for p in parsed if p.startswith(self.base_path)])
+        pd.testing.assert_frame_equal(cached, expected)
+        self.assertEqual(cached.attrs, expected.attrs)
+
+        # A rewritten file is read from the CSV again
+        write_heart_rate(self.base_path, "2025-07-02", self.rng, periods=100)
+        self.assertEqual(len(self._load()), len(expected) - 1900)
+
+
+if __name__ == "__main__":
+    unittest.main()
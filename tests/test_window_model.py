@@ -0,0 +1,78 @@
+# tests/test_window_model.py
+
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# This block adds the main project directory to Python's path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from window_model import score_windows, window_features
+
+
+class TestWindowModel(unittest.TestCase):
+
+    def setUp(self):
+        """Create six hours of 5-second samples with one unusual ramp."""
+        rng = np.random.default_rng(55)
+        timestamps = pd.date_range("2025-07-01", periods=4320, freq="5s", tz="UTC")
+        heart_rate = rng.normal(70, 3, len(timestamps))
+        # A steady climb over ten minutes, starting at 03:00
+        heart_rate[2160:2280] += np.linspace(0, 60, 120)
+        self.df = pd.DataFrame(
+            {
+                "heart_rate": heart_rate,
+                "steps": rng.integers(0, 20, len(timestamps)),
+                "hrv_rmssd": 50.0,
+            },
+            index=timestamps,
+        )
+
+    def test_window_features(self):
+        """Test the vectorized window summaries against pandas/numpy."""
+        summary, sample_window, counts = window_features(
+            self.df, 600, 0, [0.1, 0.5, 0.9], ["hrv_rmssd"]
+        )
+        grouped = self.df["heart_rate"].groupby(sample_window)
+
+        self.assertEqual(len(summary), 36)
+        self.assertTrue((counts == 120).all())
+        np.testing.assert_allclose(summary["hr_q10"], grouped.quantile(0.1))
+        np.testing.assert_allclose(summary["hr_q50"], grouped.median())
+        np.testing.assert_allclose(summary["hr_std"], grouped.std())
+        np.testing.assert_allclose(summary["hrv_rmssd"], 50.0)
+
+        # The ramp window rises by 0.5 bpm per 5 seconds, i.e. ~6 bpm/min
+        ramp_minutes = np.arange(120) * 5 / 60
+        expected_slope = np.polyfit(
+            ramp_minutes, self.df["heart_rate"].iloc[2160:2280], 1
+        )[0]
+        self.assertAlmostEqual(summary["hr_slope"].iloc[18], expected_slope)
+
+    def test_score_windows(self):
+        """Test that the ramp's samples are flagged through their windows."""
+        score_windows(
+            self.df,
+            ["heart_rate", "steps", "hrv_rmssd"],
+            contamination=0.02,
+            random_state=55,
+            window_seconds=600,
+            stride_seconds=300,
+            quantiles=[0.1, 0.5, 0.9],
+            min_samples=10,
+        )
+
+        flagged = self.df[self.df["anomaly"] == -1]
+        self.assertGreater(len(flagged), 0)
+        self.assertTrue(self.df.index[2200] in flagged.index)
+        self.assertEqual(
+            self.df["anomaly_score"].idxmax().floor("5min"),
+            pd.Timestamp("2025-07-01 03:00", tz="UTC"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# warmup.py
+
+import glob
+import os
+import threading
+import time
+
+import config
+
+# Set once the warm-up has finished (or was skipped)
+_ready = threading.Event()
+
+
+def is_ready() -> bool:
+    """Returns True once the service has finished warming up."""
+    return _ready.is_set()
+
+
+def recent_state_dirs(state_root: str, limit: int) -> list:
+    """Returns the participant state directories updated most recently."""
+    state_files = glob.glob(os.path.join(state_root, "*", "state.json"))
+    state_files.sort(key=os.path.getmtime, reverse=True)
+    return [os.path.dirname(path) for path in state_files[:limit]]
+
+
+def warm_up():
+    """
+    Imports the heavy dependencies and preloads the models and rolling
+    feature tails of the most recently active participants, so the first
+    requests a worker serves are not slowed down by cold caches.
+    """
+    start_time = time.time()
+    print("--- Warming up ---")
+    try:
+        import data_loader  # noqa: F401 (pandas)
+        import feature_engineering  # noqa: F401
+        import anomaly_model  # noqa: F401 (scikit-learn)
+        import daily_summary  # noqa: F401
+        import incremental
+
+        state_dirs = recent_state_dirs(
+            config.INCREMENTAL_STATE_ROOT, config.WARMUP_RECENT_PARTICIPANTS
+        )
+        for state_dir in state_dirs:
+            incremental.load_state(state_dir)
+        print(
+            f"Warm-up complete in {time.time() - start_time:.2f} seconds "
+            f"({len(state_dirs)} participants preloaded)."
+        )
+    except Exception as e:
+        # A failed warm-up only leaves caches cold; the service still works.
+        print(f"\n[WARNING] Warm-up failed: {e}")
+    finally:
+        _ready.set()
+
+
+def start_warm_up():
+    """Starts the warm-up in a background thread if enabled in config."""
+    if not config.WARMUP_ON_BOOT:
+        _ready.set()
+        return
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
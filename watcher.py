@@ -0,0 +1,314 @@
+# watcher.py
+#
+# Background ingestion service. It polls the export of every participant
+# with an incremental state (see incremental.py) for new or changed heart
+# rate, steps, sleep and HRV files. Once the export has stopped changing, the
+# coverage index and the parsed cache are refreshed from the changed files
+# only and an incremental scoring run is queued for the participant. Its results land in the daily
+# summary index and the anomaly store, so /overview and /anomalies serve
+# them without any analysis at request time.
+
+import argparse
+import glob
+import json
+import os
+import queue
+import signal
+import threading
+import time
+
+import archive_reader
+import config
+
+# File name patterns watched under each export's base path
+WATCHED_PATTERNS = ["heart_rate_*.csv", "steps_*.csv"]
+# Single files watched for each export, by key of the participant's paths
+WATCHED_PATHS = ["sleep_path", "hrv_path"]
+# Incremental models are refit on drift; the version changes with each refit
+INCREMENTAL_MODEL = "incremental_isolation_forest"
+
+
+def watch_targets(state_root: str) -> dict:
+    """
+    Maps every participant with an incremental state under state_root to
+    its state directory and data paths.
+    """
+    from incremental import STATE_FILE, default_paths
+
+    targets = {}
+    for state_path in sorted(glob.glob(os.path.join(state_root, "*", STATE_FILE))):
+        state_dir = os.path.dirname(state_path)
+        try:
+            with open(state_path) as f:
+                paths = json.load(f).get("paths")
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Skipping '{state_dir}': {e}")
+            continue
+        targets[os.path.basename(state_dir)] = {
+            "state_dir": state_dir,
+            "paths": paths or default_paths(),
+        }
+    return targets
+
+
+def watched_files(paths: dict) -> dict:
+    """
+    Returns the (modification time, size) of every watched file of an
+    export. Only directory listings and file metadata are read.
+    """
+    candidates = []
+    for pattern in WATCHED_PATTERNS:
+        candidates += archive_reader.glob(os.path.join(paths["base_path"], pattern))
+    for key in WATCHED_PATHS:
+        if paths.get(key) and archive_reader.exists(paths[key]):
+            candidates.append(paths[key])
+
+    files = {}
+    for path in candidates:
+        try:
+            files[path] = archive_reader.stat(path)
+        except FileNotFoundError:
+            pass  # Deleted between listing and stat
+    return files
+
+
+def new_watch(paths: dict) -> dict:
+    """
+    Starts watching an export; files that exist now count as ingested.
+    known holds the signatures of ingested files, ingesting those handed
+    to the ingest worker, and seen the export as of the last poll.
+    """
+    files = watched_files(paths)
+    return {"known": files, "ingesting": {}, "seen": dict(files), "changed_at": None}
+
+
+def poll(watch: dict, paths: dict, now: float = None) -> dict:
+    """
+    Compares the watched files of an export with the previous polls and
+    returns the (modification time, size) of those that are new or changed,
+    once no watched file of the export has changed for
+    config.WATCH_DEBOUNCE_SECONDS. A day's heart rate file and its month's
+    steps file are thus ingested together, and files still being written
+    are not read. Returned files count as being ingested until
+    finish_ingest is called; deleted files are forgotten.
+    """
+    now = time.time() if now is None else now
+    current = watched_files(paths)
+    if current != watch["seen"]:
+        # New, changed or deleted files: restart the quiet period
+        watch["seen"], watch["changed_at"] = current, now
+
+    known, ingesting = watch["known"], watch["ingesting"]
+    for path in set(known) - set(current):
+        del known[path]
+    changed = {
+        path: signature
+        for path, signature in current.items()
+        if known.get(path) != signature and ingesting.get(path) != signature
+    }
+    if not changed or now - watch["changed_at"] < config.WATCH_DEBOUNCE_SECONDS:
+        return {}
+    ingesting.update(changed)
+    return dict(sorted(changed.items()))
+
+
+def finish_ingest(watch: dict, changes: dict, succeeded: bool, now: float = None):
+    """
+    Marks files returned by poll as ingested. After a failed ingest they
+    are returned again by the first poll after another quiet period.
+    """
+    for path, signature in changes.items():
+        if watch["ingesting"].get(path) == signature:
+            del watch["ingesting"][path]
+    if succeeded:
+        watch["known"].update(changes)
+    else:
+        watch["changed_at"] = time.time() if now is None else now
+
+
+def ingest(participant_id: str, target: dict, changed_files: list) -> dict:
+    """
+    Brings a participant up to date after changed_files changed: refreshes
+    the coverage index (parsing only the changed files), scores the days
+    added since the last run and records the anomalies in the store.
+
+    Changed heart rate and steps files are parsed once into the parsed
+    cache (see parsed_cache.py); the scoring run and later loads of their
+    days read the cached copy instead of the CSV.
+
+    Days are scored once. Changed files of days that were already scored
+    refresh the coverage index but are not rescored.
+    """
+    from anomaly_store import record_results
+    from data_coverage import build_coverage_index
+    from data_loader import cache_parsed_files
+    from incremental import load_state, run_incremental
+
+    paths = target["paths"]
+    if changed_files:
+        print(f"Changed: {', '.join(os.path.basename(p) for p in changed_files)}")
+    # Only re-reads files whose modification time or size changed
+    build_coverage_index(paths["base_path"])
+    cache_parsed_files(paths["base_path"], changed_files)
+
+    result = run_incremental(target["state_dir"], paths=paths)
+    anomalies = result.pop("anomalies")
+    if anomalies is not None and not anomalies.empty:
+        state = load_state(target["state_dir"])
+        record_results(
+            participant_id,
+            "watcher",
+            INCREMENTAL_MODEL,
+            {
+                "features": state["feature_columns"],
+                "contamination": config.ISOLATION_FOREST_CONTAMINATION,
+                "random_state": config.RANDOM_STATE,
+                "refits": state["refits"],
+            },
+            anomalies,
+            anomalies.index.min().strftime("%Y-%m-%d"),
+            anomalies.index.max().strftime("%Y-%m-%d"),
+        )
+    return result
+
+
+def new_service() -> dict:
+    """
+    The update queue shared by the watcher and the ingest worker, and the
+    finished updates the worker reports back as (participant ID, changes,
+    succeeded).
+    """
+    return {
+        "queue": queue.Queue(),
+        "queued": {},
+        "finished": [],
+        "lock": threading.Lock(),
+    }
+
+
+def enqueue(service: dict, participant_id: str, target: dict, changes: dict):
+    """
+    Queues an update of a participant for changes as returned by poll.
+    Changes arriving while an update of the same participant is still
+    queued are merged into it.
+    """
+    with service["lock"]:
+        queued = service["queued"].get(participant_id)
+        if queued is not None:
+            queued["changes"].update(changes)
+            return
+        service["queued"][participant_id] = {"target": target, "changes": dict(changes)}
+    service["queue"].put(participant_id)
+
+
+def ingest_worker(service: dict):
+    """Runs queued updates one at a time until a None is queued."""
+    while True:
+        participant_id = service["queue"].get()
+        if participant_id is None:
+            return
+        with service["lock"]:
+            update = service["queued"].pop(participant_id, None)
+        if update is None:
+            continue  # Dropped on shutdown
+
+        start_time = time.time()
+        print(f"--- Ingesting updates for '{participant_id}' ---")
+        succeeded = False
+        try:
+            result = ingest(participant_id, update["target"], sorted(update["changes"]))
+            succeeded = True
+            print(
+                f"Participant '{participant_id}': {result['status']}, "
+                f"{result['days_ingested']} days ingested in "
+                f"{time.time() - start_time:.2f} seconds."
+            )
+        except Exception as e:
+            # One failing participant must not stop the service
+            print(f"[WARNING] Ingesting '{participant_id}' failed: {e}")
+        with service["lock"]:
+            service["finished"].append((participant_id, update["changes"], succeeded))
+
+
+def run_watcher(
+    state_root: str = None, poll_seconds: float = None, stop: threading.Event = None
+):
+    """
+    Watches the exports of all participants under state_root until stop is
+    set. Every participant is brought up to date once at startup, to catch
+    up on files added while the service was down; afterwards updates are
+    queued only for changed files. Participants initialized later are
+    picked up on the next poll.
+    """
+    state_root = state_root or config.INCREMENTAL_STATE_ROOT
+    poll_seconds = poll_seconds or config.WATCH_POLL_SECONDS
+    stop = stop or threading.Event()
+
+    service = new_service()
+    worker = threading.Thread(target=ingest_worker, args=(service,), name="ingest")
+    worker.start()
+
+    watches = {}
+    print(f"--- Watching the exports of participants in '{state_root}' ---")
+    try:
+        while not stop.is_set():
+            with service["lock"]:
+                finished, service["finished"] = service["finished"], []
+            for participant_id, changes, succeeded in finished:
+                if participant_id in watches:
+                    finish_ingest(watches[participant_id], changes, succeeded)
+
+            for participant_id, target in watch_targets(state_root).items():
+                watch = watches.get(participant_id)
+                if watch is None or watch["paths"] != target["paths"]:
+                    watches[participant_id] = {
+                        **new_watch(target["paths"]),
+                        "paths": target["paths"],
+                    }
+                    enqueue(service, participant_id, target, {})
+                    continue
+
+                changes = poll(watch, target["paths"])
+                if changes:
+                    print(
+                        f"Participant '{participant_id}': {len(changes)} "
+                        "new or changed files."
+                    )
+                    enqueue(service, participant_id, target, changes)
+            stop.wait(poll_seconds)
+    finally:
+        # Finish the update in progress; queued ones are redone at the next start
+        with service["lock"]:
+            service["queued"].clear()
+        while not service["queue"].empty():
+            service["queue"].get_nowait()
+        service["queue"].put(None)
+        worker.join()
+        print("Watcher stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch participants' exports and score new data as it arrives."
+    )
+    parser.add_argument(
+        "--state-root",
+        default=config.INCREMENTAL_STATE_ROOT,
+        help="Directory with one incremental state directory per participant.",
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=config.WATCH_POLL_SECONDS,
+        help="Seconds between two scans of the exports.",
+    )
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    run_watcher(args.state_root, args.poll_seconds, stop)
+
+
+if __name__ == "__main__":
+    main()